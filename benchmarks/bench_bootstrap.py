@@ -0,0 +1,98 @@
+"""
+Post-connect bootstrap benchmark against a SerialRadioEmulator that spends a
+fixed time on each command and has a message waiting when the app connects.
+Compares the previous sequential chain (info, then contacts and channels, then
+subscribe) with BootstrapCoordinator, which subscribes first and fetches
+concurrently. Reports the time from connect to the waiting message reaching
+the app, and to the bootstrap finishing.
+
+    python -m benchmarks.bench_bootstrap
+"""
+import asyncio
+import statistics
+import tempfile
+import time
+
+import meshchat_ui.config
+from meshchat_ui.radio.bootstrap import BootstrapCoordinator
+from meshchat_ui.radio.connector import RadioConnector
+from meshchat_ui.radio.contacts import ContactIndex
+from meshchat_ui.radio.serial_emulator import SerialRadioEmulator
+from meshchat_ui.store import MessageStore
+
+LATENCIES = (0.005, 0.02, 0.05)  # seconds the radio spends per command
+CONTACTS = 200
+RUNS = 3
+
+
+class BenchApp:
+    def __init__(self):
+        self.contacts = []
+        self.contact_index = ContactIndex()
+        self.channels = {}
+        self.message_store = MessageStore(":memory:")
+
+    def add_message(self, message):
+        pass
+
+    def add_message_record(self, record):
+        pass
+
+    def update_contacts(self, contacts):
+        self.contacts = contacts
+        self.contact_index.update(contacts)
+
+    def update_channels(self, channels):
+        self.channels = {channel["name"]: channel["id"] for channel in channels}
+
+
+async def sequential(connector: RadioConnector) -> None:
+    await connector.get_radio_info()
+    await connector.get_contacts_and_channels()
+    await connector.subscribe()
+
+
+async def coordinated(connector: RadioConnector) -> None:
+    await BootstrapCoordinator(connector, connector.app).run()
+
+
+async def measure(bootstrap, latency: float) -> tuple[float, float]:
+    contacts = {f"{i + 1:064x}": {"adv_name": f"node-{i}", "type": 1, "lastmod": i + 1} for i in range(CONTACTS)}
+    emulator = SerialRadioEmulator(channels={0: "Public", 1: "#test"}, contacts=contacts, push_messages=False, command_latency=latency)
+    emulator.start()
+    app = BenchApp()
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    connector.set_serial_radio(emulator.port, 115200)
+    await connector.connect_radio()
+    emulator.queue_channel_message(0, "node-1: waiting since before connect")
+
+    start = time.perf_counter()
+    await bootstrap(connector)
+    done = time.perf_counter() - start
+    handler = connector.radio_handler
+    while handler.first_message_at is None and time.perf_counter() - start < 5:
+        await asyncio.sleep(0.001)
+    first_message = handler.first_message_at - start
+    await connector.disconnect()
+    await emulator.stop()
+    return first_message, done
+
+
+def main():
+    # Keep the emulated radio's contact table out of the real caches
+    meshchat_ui.config.CONTACTS_CACHE_DIR = tempfile.mkdtemp()
+    meshchat_ui.config.CONFIG_PATH = f"{meshchat_ui.config.CONTACTS_CACHE_DIR}/serial.json"
+
+    print(f"{CONTACTS} contacts, median of {RUNS} runs, times in ms from connect")
+    print(f"{'latency (ms)':>12} {'strategy':>12} {'first message':>14} {'bootstrap done':>15}")
+    for latency in LATENCIES:
+        for name, bootstrap in (("sequential", sequential), ("coordinated", coordinated)):
+            runs = [asyncio.run(measure(bootstrap, latency)) for _ in range(RUNS)]
+            first = statistics.median(run[0] for run in runs)
+            done = statistics.median(run[1] for run in runs)
+            print(f"{latency * 1000:>12.0f} {name:>12} {first * 1000:>14.0f} {done * 1000:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Micro-benchmark for sender resolution: linear scans over the contact list
+versus ContactIndex lookups.
+
+    python -m benchmarks.bench_contact_index
+"""
+import random
+import timeit
+
+from meshchat_ui.radio.contacts import ContactIndex
+
+SIZES = (100, 1_000, 10_000)
+LOOKUPS = 1_000
+
+
+def make_contacts(count: int) -> list[dict]:
+    rng = random.Random(count)
+    return [
+        {"name": f"node-{i}", "type": 1, "public_key": rng.randbytes(32).hex()}
+        for i in range(count)
+    ]
+
+
+def linear_lookup(contacts: list[dict], prefix: str) -> dict | None:
+    for contact in contacts:
+        if contact["public_key"].startswith(prefix):
+            return contact
+    return None
+
+
+def main():
+    print(f"{'contacts':>10} {'linear prefix (us)':>20} {'index prefix (us)':>18} {'index key (us)':>15}")
+    for size in SIZES:
+        contacts = make_contacts(size)
+        index = ContactIndex(contacts)
+        targets = [c["public_key"] for c in random.Random(0).choices(contacts, k=LOOKUPS)]
+        prefixes = [key[:12] for key in targets]
+
+        linear = timeit.timeit(lambda: [linear_lookup(contacts, p) for p in prefixes], number=1)
+        by_prefix = timeit.timeit(lambda: [index.match_prefix(p) for p in prefixes], number=1)
+        by_key = timeit.timeit(lambda: [index.get(k) for k in targets], number=1)
+        print(f"{size:>10} {linear / LOOKUPS * 1e6:>20.2f} {by_prefix / LOOKUPS * 1e6:>18.2f} {by_key / LOOKUPS * 1e6:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
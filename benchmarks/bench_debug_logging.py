@@ -0,0 +1,81 @@
+"""
+Benchmark for the cost of debug logging in the message path: CPU time per
+incoming message with debug logging off and on, at growing contact counts.
+With debug off the cost should not depend on the number of contacts.
+
+    python -m benchmarks.bench_debug_logging
+"""
+import os
+import random
+import tempfile
+import time
+
+import meshchat_ui.logger
+from meshcore import EventType
+from meshcore.events import Event
+
+SIZES = (100, 1_000, 10_000)
+MESSAGES = 2_000
+
+
+class BenchApp:
+    def __init__(self, contacts: list[dict]):
+        from meshchat_ui.radio.contacts import ContactIndex
+        from meshchat_ui.store import MessageStore
+
+        self.contacts = contacts
+        self.contact_index = ContactIndex(contacts)
+        self.message_store = MessageStore(":memory:", batch_size=MESSAGES)
+
+    def add_message_record(self, record):
+        pass
+
+
+def make_contacts(count: int) -> list[dict]:
+    rng = random.Random(count)
+    return [
+        {"name": f"node-{i}", "type": 1, "public_key": rng.randbytes(32).hex()}
+        for i in range(count)
+    ]
+
+
+def make_events(contacts: list[dict]) -> list[Event]:
+    rng = random.Random(0)
+    return [
+        Event(EventType.CHANNEL_MSG_RECV, {
+            "text": f"{contact['name']}: message {i}",
+            "channel_idx": 0,
+            "sender_timestamp": 1700000000 + i,
+        })
+        for i, contact in enumerate(rng.choices(contacts, k=MESSAGES))
+    ]
+
+
+def measure(contacts: list[dict], debug_mode: bool) -> float:
+    from meshchat_ui.radio.handler import RadioHandler
+
+    handler = RadioHandler(None, BenchApp(contacts), debug_mode=debug_mode)
+    events = make_events(contacts)
+    start = time.process_time()
+    for event in events:
+        handler.process_message_event(event)
+    return (time.process_time() - start) / MESSAGES
+
+
+def main():
+    # Keep the benchmark's debug output out of app_error.log
+    log_dir = tempfile.mkdtemp()
+    meshchat_ui.logger.LOG_FILE_PATH = os.path.join(log_dir, "bench.log")
+
+    print(f"{MESSAGES} channel messages per run")
+    print(f"{'contacts':>10} {'debug off (us/msg)':>20} {'debug on (us/msg)':>19}")
+    for size in SIZES:
+        contacts = make_contacts(size)
+        debug_off = measure(contacts, debug_mode=False)
+        debug_on = measure(contacts, debug_mode=True)
+        print(f"{size:>10} {debug_off * 1e6:>20.2f} {debug_on * 1e6:>19.2f}")
+    meshchat_ui.logger.shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark of RadioConnector against a FakeMeshCore: time to fetch contacts and
+channels at growing link latencies, and receive throughput from the radio to
+the message store.
+
+    python -m benchmarks.bench_fake_radio
+"""
+import asyncio
+import tempfile
+import time
+
+import meshchat_ui.config
+from meshchat_ui.config import BLE_MAX_CHANNEL_ATTEMPTS
+from meshchat_ui.radio.connector import RadioConnector
+from meshchat_ui.radio.contacts import ContactIndex
+from meshchat_ui.radio.fake import FakeMeshCore, FakeRadio
+from meshchat_ui.radio.replay import drain
+from meshchat_ui.store import MessageStore
+
+LATENCIES = (0.01, 0.05, 0.1)
+JITTER_RATIO = 0.5
+CONTACTS = 500
+MESSAGES = 5_000
+
+
+class BenchApp:
+    def __init__(self):
+        self.contacts = []
+        self.contact_index = ContactIndex()
+        self.message_store = MessageStore(":memory:")
+        self.received = 0
+
+    def add_message_record(self, record):
+        self.received += 1
+
+    def update_contacts(self, contacts):
+        self.contacts = contacts
+        self.contact_index.update(contacts)
+
+
+def make_meshcore(latency: float) -> FakeMeshCore:
+    return FakeMeshCore(
+        channels={0: "Public", 1: "#test"},
+        contacts={f"{i:064x}": {"adv_name": f"node-{i}", "type": 1, "lastmod": i + 1} for i in range(CONTACTS)},
+        latency=latency,
+        jitter=latency * JITTER_RATIO,
+        seed=0,
+    )
+
+
+async def measure_fetch(latency: float) -> float:
+    app = BenchApp()
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    connector.radio = FakeRadio(make_meshcore(latency))
+    await connector.connect_radio()
+    start = time.perf_counter()
+    await connector.get_contacts_and_channels()
+    elapsed = time.perf_counter() - start
+    await connector.disconnect()
+    return elapsed
+
+
+async def measure_receive() -> tuple[float, int]:
+    app = BenchApp()
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    meshcore = make_meshcore(0.0)
+    connector.radio = FakeRadio(meshcore)
+    await connector.connect_radio()
+    await connector.subscribe()
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        await meshcore.receive_channel_message(0, f"node-{i % CONTACTS}: message {i}")
+        await asyncio.sleep(0)  # Messages arrive one at a time, not as a single burst
+    await drain(meshcore, connector.radio_handler)
+    elapsed = time.perf_counter() - start
+    await connector.disconnect()
+    return MESSAGES / elapsed, MESSAGES - app.received
+
+
+def main():
+    # Keep the fake radio's contact table out of the real contacts cache
+    meshchat_ui.config.CONTACTS_CACHE_DIR = tempfile.mkdtemp()
+    print(f"{CONTACTS} contacts, {BLE_MAX_CHANNEL_ATTEMPTS} channel slots, jitter {JITTER_RATIO:.0%} of latency")
+    print(f"{'latency (ms)':>12} {'contacts + channels (ms)':>25}")
+    for latency in LATENCIES:
+        elapsed = asyncio.run(measure_fetch(latency))
+        print(f"{latency * 1000:>12.0f} {elapsed * 1000:>25.1f}")
+    throughput, dropped = asyncio.run(measure_receive())
+    print(f"receive throughput: {throughput:.0f} messages/s, {dropped} of {MESSAGES} dropped by the event queue")
+
+
+if __name__ == "__main__":
+    main()
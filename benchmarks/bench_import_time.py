@@ -0,0 +1,78 @@
+"""
+Import-time benchmark for cold start. Imports the entry point in fresh
+interpreters with `-X importtime`, reports the median cumulative import time
+and the heaviest top-level packages, and exits non-zero when the median is over
+budget or when a module that should only load on connect (bleak, meshcore,
+pyserial) is imported at startup.
+
+    python -m benchmarks.bench_import_time [--module run] [--budget 300]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+BUDGET_MS = 300.0
+DEFERRED_PACKAGES = ("bleak", "meshcore", "serial")
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_times(module: str) -> list[tuple[int, int, int, str]]:
+    """Imports `module` in a fresh interpreter and returns (self us, cumulative us, depth, name) per imported module."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True, cwd=REPO_ROOT,
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            entries.append((int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2, match.group(4)))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time against a budget.")
+    parser.add_argument("--module", default="run", help="Module to import, relative to the repository root.")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="Budget for the median cumulative import time, in ms.")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Fresh interpreters to measure.")
+    args = parser.parse_args()
+
+    totals = []
+    packages: dict[str, list[int]] = defaultdict(list)
+    loaded = set()
+    for _ in range(args.runs):
+        entries = import_times(args.module)
+        totals.append(next(cumulative for _, cumulative, _, name in entries if name == args.module))
+        per_package = defaultdict(int)
+        for self_us, _, _, name in entries:
+            per_package[name.split(".")[0]] += self_us
+            loaded.add(name.split(".")[0])
+        for package, self_us in per_package.items():
+            packages[package].append(self_us)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget:.0f} ms)")
+    print(f"{'package':<24} {'self (ms)':>10}")
+    heaviest = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)[:10]
+    for package, samples in heaviest:
+        print(f"{package:<24} {statistics.median(samples) / 1000:>10.1f}")
+
+    failures = []
+    if median_ms > args.budget:
+        failures.append(f"median import time {median_ms:.1f} ms is over the {args.budget:.0f} ms budget")
+    deferred = sorted(loaded.intersection(DEFERRED_PACKAGES))
+    if deferred:
+        failures.append(f"imported at startup: {', '.join(deferred)}")
+    for failure in failures:
+        print(failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Reconnect benchmark: a RadioConnector under a ConnectionSupervisor loses its
+link to a FakeMeshCore, as after a USB glitch, while a few contacts change.
+The port is missing for the first reconnect attempts. Reports the downtime from
+the disconnect until the app is resynced, and how many contact entries the
+resync transferred out of the radio's table.
+
+    python -m benchmarks.bench_reconnect
+"""
+import asyncio
+import tempfile
+import time
+
+import meshchat_ui.config
+from meshchat_ui.radio.bootstrap import BootstrapCoordinator
+from meshchat_ui.radio.connector import RadioConnector
+from meshchat_ui.radio.contacts import ContactIndex
+from meshchat_ui.radio.fake import FakeMeshCore, FakeRadio
+from meshchat_ui.store import MessageStore
+
+CONTACTS = 1_000
+CHANGED = 10
+LATENCY = 0.02  # seconds per command
+MISSING_ATTEMPTS = (0, 2, 4)  # reconnect attempts made while the port is gone
+
+
+class BenchApp:
+    def __init__(self):
+        self.contacts = []
+        self.contact_index = ContactIndex()
+        self.channels = {}
+        self.message_store = MessageStore(":memory:")
+
+    def add_message(self, message):
+        pass
+
+    def add_message_record(self, record):
+        pass
+
+    def notify(self, message):
+        pass
+
+    def update_contacts(self, contacts):
+        self.contacts = contacts
+        self.contact_index.update(contacts)
+
+    def update_channels(self, channels):
+        self.channels = {channel["name"]: channel["id"] for channel in channels}
+
+
+async def measure(missing_attempts: int) -> tuple[float, int]:
+    # Start each run without a cached contact table, and keep it out of the real caches
+    meshchat_ui.config.CONTACTS_CACHE_DIR = tempfile.mkdtemp()
+    meshcore = FakeMeshCore(
+        channels={0: "Public", 1: "#test"},
+        contacts={f"{i + 1:064x}": {"adv_name": f"node-{i}", "type": 1, "lastmod": i + 1} for i in range(CONTACTS)},
+        latency=LATENCY,
+        seed=0,
+    )
+    app = BenchApp()
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    radio = FakeRadio(meshcore)
+    connector.radio = radio
+    await connector.connect_radio()
+    await BootstrapCoordinator(connector, app).run()
+    await connector.start_supervisor()
+
+    for i in range(CHANGED):
+        meshcore.update_contact(f"{i + 1:064x}", f"node-{i}-renamed")
+    radio.connect_failures = missing_attempts
+    transferred = 0
+    original = meshcore.commands.get_contacts
+
+    async def counting_get_contacts(lastmod=0):
+        nonlocal transferred
+        result = await original(lastmod)
+        transferred += len(result.payload)
+        return result
+
+    meshcore.commands.get_contacts = counting_get_contacts
+    start = time.perf_counter()
+    await meshcore.drop_link("serial_disconnect")
+    while connector.supervisor.reconnect_count == 0:
+        await asyncio.sleep(0.005)
+    downtime = time.perf_counter() - start
+    await connector.disconnect()
+    return downtime, transferred
+
+
+def main():
+    print(f"{CONTACTS} contacts, {CHANGED} changed while disconnected, {LATENCY * 1000:.0f} ms per command")
+    print(f"{'failed attempts':>15} {'downtime (ms)':>14} {'contacts resynced':>18}")
+    for missing in MISSING_ATTEMPTS:
+        downtime, transferred = asyncio.run(measure(missing))
+        print(f"{missing:>15} {downtime * 1000:>14.0f} {transferred:>18}")
+
+
+if __name__ == "__main__":
+    main()
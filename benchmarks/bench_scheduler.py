@@ -0,0 +1,94 @@
+"""
+Command scheduler benchmark: channel messages are sent while a RadioConnector
+resyncs a FakeMeshCore (contacts and a full channel slot scan, concurrently, as
+after a reconnect). Reports the send latency, from the call until the radio
+acknowledged it, with the scheduler's priority classes and with every command
+in one first-come-first-served class, and the queue wait and service time per
+class.
+
+    python -m benchmarks.bench_scheduler
+"""
+import asyncio
+import statistics
+import tempfile
+
+import meshchat_ui.config
+import meshchat_ui.radio.connector
+from meshchat_ui.radio.connector import RadioConnector
+from meshchat_ui.radio.fake import FakeMeshCore, FakeRadio
+from meshchat_ui.radio.scheduler import CommandScheduler, PRIORITY_BACKGROUND
+
+CONTACTS = 1_000
+CHANNEL_SLOTS = 32
+LATENCY = 0.02  # seconds per command
+JITTER = 0.01  # seconds
+TRIALS = 20
+
+
+class BenchApp:
+    def __init__(self):
+        self.channels = {}
+
+    def add_message(self, message):
+        pass
+
+    def notify(self, message, **kwargs):
+        pass
+
+
+class FifoScheduler(CommandScheduler):
+    """Runs every command in the background class, so they start in arrival order."""
+
+    async def run(self, name, command, priority=PRIORITY_BACKGROUND, *args, **kwargs):
+        return await super().run(name, command, PRIORITY_BACKGROUND, *args, **kwargs)
+
+
+async def measure(fifo: bool) -> tuple[list[float], str]:
+    meshcore = FakeMeshCore(
+        channels={0: "Public", 1: "#test"},
+        contacts={f"{i + 1:064x}": {"adv_name": f"node-{i}", "type": 1, "lastmod": i + 1} for i in range(CONTACTS)},
+        latency=LATENCY,
+        jitter=JITTER,
+        max_channels=CHANNEL_SLOTS,
+        seed=0,
+    )
+    connector = RadioConnector(BenchApp())
+    if fifo:
+        connector.scheduler = FifoScheduler(on_complete=connector._on_command_complete)
+    connector.radio = FakeRadio(meshcore)
+    await connector.connect_radio()
+
+    latencies = []
+    loop = asyncio.get_running_loop()
+    for trial in range(TRIALS):
+        connector.channel_slots = None
+        sync = asyncio.gather(connector.get_contacts(full_sync=True), connector.get_channels())
+        # Send part way into the resync
+        await asyncio.sleep(LATENCY * (1 + trial % 4))
+        start = loop.time()
+        assert await connector.send_channel_message(f"message {trial}", 0) == (True, None)
+        latencies.append(loop.time() - start)
+        await sync
+    summary = connector.scheduler.summary()
+    await connector.disconnect()
+    return latencies, summary
+
+
+def main():
+    # Keep the fake radio's contact table out of the real caches
+    meshchat_ui.config.CONTACTS_CACHE_DIR = tempfile.mkdtemp()
+    meshchat_ui.radio.connector.BLE_MAX_CHANNEL_ATTEMPTS = CHANNEL_SLOTS
+
+    print(f"{CHANNEL_SLOTS} channel slots, {LATENCY * 1000:.0f} ms per command (+{JITTER * 1000:.0f} ms jitter), {TRIALS} sends")
+    print(f"{'scheduling':>12} {'send p50 (ms)':>14} {'send max (ms)':>14}")
+    summaries = {}
+    for fifo in (True, False):
+        latencies, summaries[fifo] = asyncio.run(measure(fifo))
+        label = "fifo" if fifo else "priority"
+        print(f"{label:>12} {statistics.median(latencies) * 1000:>14.0f} {max(latencies) * 1000:>14.0f}")
+    print()
+    print(f"priority: {summaries[False].replace('; ', chr(10) + '          ')}")
+
+
+if __name__ == "__main__":
+    main()
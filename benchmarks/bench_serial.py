@@ -0,0 +1,80 @@
+"""
+End-to-end benchmark over the serial path: a SerialRadioEmulator on a pty
+pushes channel messages at fixed rates into a headless MeshChatApp connected
+through SerialRadio and the real meshcore serial framing. Reports delivered
+and dropped messages and the latency from the emulator's write to the
+message record being created.
+
+    python -m benchmarks.bench_serial
+"""
+import asyncio
+import re
+import tempfile
+
+import meshchat_ui.config
+from meshchat_ui.radio.serial_emulator import SerialRadioEmulator
+from meshchat_ui.tui.app import MeshChatApp
+
+RATES = (100, 300, 600)
+DURATION = 3.0  # seconds per rate
+CONTACTS = 200
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+async def measure(rate: float) -> dict:
+    contacts = {f"{i + 1:064x}": {"adv_name": f"node-{i}", "type": 1, "lastmod": i + 1} for i in range(CONTACTS)}
+    emulator = SerialRadioEmulator(channels={0: "Public"}, contacts=contacts)
+    emulator.start()
+    app = MeshChatApp(message_db_path=":memory:")
+    async with app.run_test(size=(120, 40)) as pilot:
+        app.pop_screen()
+        connector = app.radio_connector
+        connector.set_serial_radio(emulator.port, 115200)
+        await connector.connect_radio()
+        app.update_contacts((await connector.get_contacts_and_channels())["contacts"])
+        await connector.subscribe()
+
+        emulator.start_generating(rate)
+        await asyncio.sleep(DURATION)
+        await emulator.stop_generating()
+        await asyncio.sleep(0.5)  # Let the tail of the stream arrive
+        await connector.radio_handler.event_queue.join()
+        app.flush_pending_messages()
+        await pilot.pause()
+
+        records = app.message_store.fetch_latest(emulator.messages_generated + 10)
+        latencies = []
+        for record in records:
+            match = re.fullmatch(r"message (\d+)", record.text or "")
+            if match:
+                latencies.append(record.received_at - emulator.message_times[int(match.group(1))])
+        stats = {
+            "generated": emulator.messages_generated,
+            "delivered": len(latencies),
+            "dropped": connector.radio_handler.event_queue.dropped_count,
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+            "log_updates": app.message_flush_count,
+        }
+        await connector.disconnect()
+    await emulator.stop()
+    return stats
+
+
+def main():
+    # Keep the emulated radio's contact table out of the real contacts cache
+    meshchat_ui.config.CONTACTS_CACHE_DIR = tempfile.mkdtemp()
+
+    print(f"{DURATION:.0f} s per rate, {CONTACTS} contacts, headless app")
+    print(f"{'rate (msg/s)':>12} {'generated':>10} {'delivered':>10} {'dropped':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'log updates':>12}")
+    for rate in RATES:
+        s = asyncio.run(measure(rate))
+        print(f"{rate:>12} {s['generated']:>10} {s['delivered']:>10} {s['dropped']:>8} {s['p50'] * 1000:>9.2f} {s['p99'] * 1000:>9.2f} {s['log_updates']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark for Sidebar contact updates: time to apply a refresh in which only a
+few rows changed, at growing list sizes. "apply" is the widget work done by
+the update itself; "apply + layout" includes the following screen update.
+"filter" is the time to narrow the list as a query is typed, per keystroke.
+
+    python -m benchmarks.bench_sidebar
+"""
+import asyncio
+import time
+
+from meshchat_ui.tui.app import MeshChatApp
+from meshchat_ui.tui.contact_list import ContactList
+from meshchat_ui.tui.sidebar import Sidebar
+
+SIZES = (100, 1_000, 10_000)
+FILTER_QUERY = "node-99"
+CHANGED_ROWS = 10
+REPEATS = 5
+
+
+def make_contacts(count: int, generation: int = 0) -> list[dict]:
+    contacts = [
+        {"name": f"node-{i}", "type": 1 + i % 3, "public_key": f"{i:064x}"}
+        for i in range(count)
+    ]
+    # Rename a handful of rows, drop one and add one per generation
+    for i in range(CHANGED_ROWS - 2):
+        contacts[i]["name"] = f"node-{i}-g{generation}"
+    contacts.pop(CHANGED_ROWS)
+    contacts.append({"name": f"new-{generation}", "type": 1, "public_key": f"{count + generation:064x}"})
+    return contacts
+
+
+async def measure(size: int) -> tuple[float, float, float]:
+    app = MeshChatApp(message_db_path=":memory:")
+    async with app.run_test(size=(120, 40)) as pilot:
+        app.pop_screen()
+        sidebar = app.query_one(Sidebar)
+        sidebar.update_contacts(make_contacts(size))
+        await pilot.pause()
+        apply_timings = []
+        frame_timings = []
+        for generation in range(1, REPEATS + 1):
+            contacts = make_contacts(size, generation)
+            start = time.perf_counter()
+            sidebar.update_contacts(contacts)
+            applied = time.perf_counter()
+            await pilot.pause()
+            apply_timings.append(applied - start)
+            frame_timings.append(time.perf_counter() - start)
+        contact_list = sidebar.query_one(ContactList)
+        filter_timings = []
+        for end in range(1, len(FILTER_QUERY) + 1):
+            start = time.perf_counter()
+            contact_list.filter(FILTER_QUERY[:end])
+            filter_timings.append(time.perf_counter() - start)
+        contact_list.filter("")
+        return median(apply_timings), median(frame_timings), max(filter_timings)
+
+
+def median(values: list[float]) -> float:
+    return sorted(values)[len(values) // 2]
+
+
+def main():
+    print(f"{CHANGED_ROWS} rows changed per update")
+    print(f"{'contacts':>10} {'apply (ms)':>12} {'apply + layout (ms)':>20} {'filter max (ms)':>16}")
+    for size in SIZES:
+        apply_time, frame_time, filter_time = asyncio.run(measure(size))
+        print(f"{size:>10} {apply_time * 1000:>12.2f} {frame_time * 1000:>20.2f} {filter_time * 1000:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Startup benchmark for auto-connect mode: a headless MeshChatApp connects to a
+SerialRadioEmulator on a pty at launch. Reports, from app start, when the UI
+was mounted with contacts on screen, when the radio connected, and when the
+fetched contact and channel lists replaced what was shown, with and without
+cached contacts and channels from a previous session.
+
+    python -m benchmarks.bench_startup
+"""
+import asyncio
+import tempfile
+import time
+
+import meshchat_ui.config
+from meshchat_ui.config import save_channel_list, save_contact_table, save_serial_connection, save_serial_radio_key
+from meshchat_ui.radio.serial_emulator import SerialRadioEmulator
+from meshchat_ui.tui.app import MeshChatApp
+from meshchat_ui.tui.contact_list import ContactList
+
+CONTACTS = 1_000
+CHANNELS = {0: "Public", 1: "#test"}
+
+
+async def measure(warm: bool) -> dict:
+    contacts = {f"{i + 1:064x}": {"adv_name": f"node-{i}", "type": 1, "lastmod": i + 1} for i in range(CONTACTS)}
+    emulator = SerialRadioEmulator(channels=CHANNELS, contacts=contacts)
+    emulator.start()
+    save_serial_connection("emulator", emulator.port, "115200")
+    if warm:
+        save_serial_radio_key(emulator.public_key)
+        save_contact_table(emulator.public_key, CONTACTS, {
+            key: {"name": entry["adv_name"], "type": entry["type"], "public_key": key} for key, entry in contacts.items()
+        })
+        save_channel_list(emulator.public_key, [{"name": name, "id": idx} for idx, name in CHANNELS.items()])
+
+    start = time.perf_counter()
+    app = MeshChatApp(message_db_path=":memory:", auto_connect=True)
+    timings = {}
+    async with app.run_test(size=(120, 40)) as pilot:
+        timings["mounted"] = time.perf_counter() - start
+        contact_list = app.query_one(ContactList)
+        connector = app.radio_connector
+        while time.perf_counter() - start < 10:
+            now = time.perf_counter() - start
+            if "contacts shown" not in timings and contact_list.row_count:
+                timings["contacts shown"] = now
+            if "connected" not in timings and connector.radio_handler:
+                timings["connected"] = now
+            if "lists fetched" not in timings and connector.channel_slots is not None and len(app.channels) == len(CHANNELS):
+                timings["lists fetched"] = now
+            if len(timings) == 4:
+                break
+            await pilot.pause(0.005)
+        await connector.disconnect()
+    await emulator.stop()
+    return timings
+
+
+def main():
+    scratch = tempfile.mkdtemp()
+    meshchat_ui.config.CONFIG_PATH = f"{scratch}/serial.json"
+    meshchat_ui.config.CONTACTS_CACHE_DIR = scratch
+
+    print(f"{CONTACTS} contacts, {len(CHANNELS)} channels, times in ms from app start")
+    print(f"{'start':>6} {'mounted':>8} {'contacts shown':>15} {'connected':>10} {'lists fetched':>14}")
+    for warm in (False, True):
+        t = asyncio.run(measure(warm))
+        cells = [f"{t[key] * 1000:.0f}" if key in t else "-" for key in ("mounted", "contacts shown", "connected", "lists fetched")]
+        print(f"{'warm' if warm else 'cold':>6} {cells[0]:>8} {cells[1]:>15} {cells[2]:>10} {cells[3]:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Performance regression gate. Runs the benchmark suite (or reads a results file
+written by it) and compares each benchmark's median against a committed
+baseline. A benchmark regresses when its median is worse than the baseline
+median by more than both `--mads` scaled median absolute deviations of the
+baseline samples and `--tolerance` of the baseline median, so noisy benchmarks
+need a larger shift to fail than steady ones. The spread comes from the
+baseline alone, so a noisy current run cannot make its own pass easier, and the
+allowance for noise is capped at NOISE_CAP times `--tolerance`. Samples are rescaled by a calibration
+workload timed in each run to cancel out changes in machine speed, and
+suspected regressions are rerun with their samples pooled before failing.
+Exits with status 1 on any regression or when a baseline benchmark is missing
+from the results.
+
+    python -m benchmarks.gate [--results results.json] [--baseline benchmarks/baseline.json]
+    python -m benchmarks.gate --update      # record a new baseline on this machine
+
+Baselines are only comparable on the machine they were recorded on.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+
+import meshchat_ui.config
+import meshchat_ui.logger
+
+from benchmarks.suite import run_suite
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_REPEATS = 7
+DEFAULT_MADS = 3.0
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_CONFIRM_RUNS = 2
+# Scales the MAD to estimate the standard deviation of normally distributed samples
+MAD_SCALE = 1.4826
+# The allowance for a noisy baseline is at most this many times the tolerance
+NOISE_CAP = 3.0
+
+
+def mad(samples: list[float]) -> float:
+    """Median absolute deviation from the median."""
+    median = statistics.median(samples)
+    return statistics.median(abs(sample - median) for sample in samples)
+
+
+def normalize(report: dict, calibration_ms: float | None) -> dict:
+    """
+    Rescales a report's samples to the machine speed measured by `calibration_ms`,
+    so a baseline recorded while the machine was idle compares fairly with a
+    run on a busy machine, and vice versa.
+    """
+    own = report["meta"].get("calibration_ms")
+    if not own or not calibration_ms:
+        return report
+    ratio = calibration_ms / own
+    results = {}
+    for name, result in report["results"].items():
+        scale = ratio if result["better"] == "lower" else 1 / ratio
+        results[name] = dict(result, samples=[sample * scale for sample in result["samples"]])
+    return dict(report, results=results)
+
+
+def compare(name: str, baseline: dict, current: dict, mads: float, tolerance: float) -> dict:
+    """Compares one benchmark's samples against its baseline."""
+    base_median = statistics.median(baseline["samples"])
+    median = statistics.median(current["samples"])
+    noise = min(mads * MAD_SCALE * mad(baseline["samples"]), NOISE_CAP * tolerance * abs(base_median))
+    threshold = max(noise, tolerance * abs(base_median))
+    # Positive change is always "worse", whichever direction is better
+    worse_by = base_median - median if current["better"] == "higher" else median - base_median
+    return {
+        "name": name,
+        "unit": current["unit"],
+        "baseline": base_median,
+        "current": median,
+        "change": (median - base_median) / base_median if base_median else 0.0,
+        "threshold": threshold,
+        "regressed": worse_by > threshold,
+        "improved": -worse_by > threshold,
+    }
+
+
+def gate(baseline: dict, current: dict, mads: float = DEFAULT_MADS, tolerance: float = DEFAULT_TOLERANCE) -> tuple[list[dict], list[str]]:
+    """Returns the comparison for each benchmark in both reports, and the benchmarks missing from the current one."""
+    comparisons = []
+    missing = []
+    for name, base in baseline["results"].items():
+        if name not in current["results"]:
+            missing.append(name)
+            continue
+        comparisons.append(compare(name, base, current["results"][name], mads, tolerance))
+    return comparisons, missing
+
+
+def print_report(comparisons: list[dict], missing: list[str]) -> None:
+    print(f"{'benchmark':<36} {'baseline':>12} {'current':>12} {'change':>8} {'threshold':>10}  status")
+    for c in comparisons:
+        status = "REGRESSED" if c["regressed"] else "improved" if c["improved"] else "ok"
+        print(f"{c['name']:<36} {c['baseline']:>12.2f} {c['current']:>12.2f} {c['change']:>+8.1%} {c['threshold']:>10.2f}  {status}")
+    for name in missing:
+        print(f"{name:<36} missing from current results")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when benchmarks regress against a stored baseline.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results file.")
+    parser.add_argument("--results", help="Compare this suite results file instead of running the suite.")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Samples taken per benchmark when running the suite.")
+    parser.add_argument("--mads", type=float, default=DEFAULT_MADS, help="Scaled MADs a median must move by to count as a regression.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Minimum relative change that counts as a regression.")
+    parser.add_argument("--confirm", type=int, default=DEFAULT_CONFIRM_RUNS, help="Times to rerun regressed benchmarks before failing (not with --results).")
+    parser.add_argument("--update", action="store_true", help="Write the current results as the new baseline.")
+    args = parser.parse_args()
+
+    # Keep benchmark output out of app_error.log and the real caches
+    scratch = tempfile.mkdtemp()
+    meshchat_ui.logger.LOG_FILE_PATH = os.path.join(scratch, "bench.log")
+    meshchat_ui.config.CONTACTS_CACHE_DIR = scratch
+
+    if args.results:
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        current = run_suite(args.repeats)
+
+    if args.update:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Wrote baseline with {len(current['results'])} benchmarks to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        sys.exit(f"No baseline at {args.baseline}; record one with --update")
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    reference = baseline["meta"].get("calibration_ms")
+    current = normalize(current, reference)
+    comparisons, missing = gate(baseline, current, args.mads, args.tolerance)
+    regressions = [c["name"] for c in comparisons if c["regressed"]]
+    # A single noisy run should not fail the gate: rerun suspects and pool their samples
+    confirm_runs = 0 if args.results else args.confirm
+    for _ in range(confirm_runs if regressions else 0):
+        for name in regressions:
+            rerun = normalize(run_suite(args.repeats, only=name), reference)
+            current["results"][name] = dict(current["results"][name], samples=current["results"][name]["samples"] + rerun["results"][name]["samples"])
+        comparisons, missing = gate(baseline, current, args.mads, args.tolerance)
+        regressions = [c["name"] for c in comparisons if c["regressed"]]
+        if not regressions:
+            break
+    print_report(comparisons, missing)
+    if regressions or missing:
+        print(f"{len(regressions)} benchmark(s) regressed, {len(missing)} missing")
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
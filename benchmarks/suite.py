@@ -0,0 +1,299 @@
+"""
+Benchmark suite for the receive pipeline. Each benchmark is repeated and the
+raw samples are written as JSON, so results can be compared between commits.
+
+    python -m benchmarks.suite [--output results.json] [--repeats 5] [--only NAME]
+
+Benchmarks:
+  message_callback   throughput from RadioHandler.message_callback through the
+                     event queue to the app, at 100/1k/10k contacts
+  add_message        cost of adding one message and rendering the message log
+                     as its history grows
+  update_contacts    cost of MeshChatApp.update_contacts plus rendering the
+                     contact list at 100/1k/10k contacts
+  connector_fetch    RadioConnector.get_contacts_and_channels against a fake
+                     radio with no link latency
+  connector_receive  throughput from a fake radio through RadioConnector's
+                     subscriptions to the message store
+  end_to_end         latency from a radio event being dispatched by the fake
+                     radio to its line being rendered by the message log
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import meshchat_ui.config
+import meshchat_ui.logger
+from meshcore import EventType
+from meshcore.events import Event
+from textual.geometry import Region
+
+from benchmarks.bench_contact_index import make_contacts
+from benchmarks.bench_fake_radio import CONTACTS as FAKE_RADIO_CONTACTS, MESSAGES as FAKE_RADIO_MESSAGES, measure_fetch, measure_receive
+
+CONTACT_SIZES = (100, 1_000, 10_000)
+HISTORY_SIZES = (0, 1_000, 5_000)
+CALLBACK_MESSAGES = 2_000
+FRAME_MESSAGES = 20
+END_TO_END_MESSAGES = 20
+APP_SIZE = (120, 40)
+SHORT_REPEATS = 3 # Extra samples for millisecond-scale benchmarks, whose single samples are noisy
+MARKER = re.compile(r"marker-\d+")
+
+
+class BenchApp:
+    """The parts of MeshChatApp that RadioHandler uses, without the UI."""
+
+    def __init__(self, contacts: list[dict]):
+        from meshchat_ui.radio.contacts import ContactIndex
+        from meshchat_ui.store import MessageStore
+
+        self.contacts = contacts
+        self.contact_index = ContactIndex(contacts)
+        self.message_store = MessageStore(":memory:")
+        self.received = 0
+
+    def add_message_record(self, record):
+        self.received += 1
+
+
+def channel_event(contacts: list[dict], i: int) -> Event:
+    sender = contacts[i % len(contacts)]["name"] if contacts else "unknown"
+    return Event(EventType.CHANNEL_MSG_RECV, {
+        "type": "CHAN",
+        "channel_idx": 0,
+        "sender_timestamp": 1700000000 + i,
+        "text": f"{sender}: message {i}",
+    })
+
+
+def result(samples: list[float], unit: str, better: str, **params) -> dict:
+    return {
+        "unit": unit,
+        "better": better,
+        "params": params,
+        "median": statistics.median(samples),
+        "samples": samples,
+    }
+
+
+async def bench_message_callback(size: int) -> float:
+    """Messages per second from message_callback until the app has them."""
+    from meshchat_ui.radio.event_queue import EventQueue
+    from meshchat_ui.radio.handler import RadioHandler
+
+    contacts = make_contacts(size)
+    app = BenchApp(contacts)
+    handler = RadioHandler(None, app)
+    # Large enough that the burst measures processing rather than drops
+    handler.event_queue = EventQueue(handler.process_event, maxsize=CALLBACK_MESSAGES)
+    events = [channel_event(contacts, i) for i in range(CALLBACK_MESSAGES)]
+    handler.event_queue.start()
+    start = time.perf_counter()
+    for event in events:
+        handler.message_callback(event)
+    await handler.event_queue.join()
+    elapsed = time.perf_counter() - start
+    await handler.event_queue.stop()
+    assert app.received == CALLBACK_MESSAGES
+    return CALLBACK_MESSAGES / elapsed
+
+
+def render_frame(widget) -> None:
+    """Renders the widget's visible lines, the work the compositor does for it on the next frame."""
+    widget.render_lines(Region(0, 0, widget.size.width, widget.size.height))
+
+
+async def bench_add_message(history: int) -> float:
+    """Milliseconds to add one message and render the message log, with `history` messages in the log."""
+    from meshchat_ui.records import MessageRecord, KIND_CHANNEL
+    from meshchat_ui.tui.app import MeshChatApp
+    from meshchat_ui.tui.message_display import MessageDisplay
+
+    app = MeshChatApp(message_db_path=":memory:")
+    async with app.run_test(size=APP_SIZE) as pilot:
+        app.pop_screen()
+        for i in range(history):
+            app.add_message_record(MessageRecord(KIND_CHANNEL, text=f"history {i}", sender="node-1", channel_idx=0, known_sender=True))
+        app.flush_pending_messages()
+        await pilot.pause()
+        display = app.query_one(MessageDisplay)
+        timings = []
+        for i in range(FRAME_MESSAGES):
+            start = time.perf_counter()
+            app.add_message_record(MessageRecord(KIND_CHANNEL, text=f"message {i}", sender="node-1", channel_idx=0, known_sender=True))
+            app.flush_pending_messages()
+            render_frame(display)
+            timings.append(time.perf_counter() - start)
+            await pilot.pause()
+    return statistics.median(timings) * 1000
+
+
+async def bench_update_contacts(size: int) -> float:
+    """Milliseconds for update_contacts with a few changed contacts, plus rendering the contact list."""
+    from meshchat_ui.tui.app import MeshChatApp
+    from meshchat_ui.tui.contact_list import ContactList
+
+    contacts = make_contacts(size)
+    app = MeshChatApp(message_db_path=":memory:")
+    async with app.run_test(size=APP_SIZE) as pilot:
+        app.pop_screen()
+        app.update_contacts(contacts)
+        await pilot.pause()
+        changed = [dict(contact) for contact in contacts]
+        for contact in changed[:10]:
+            contact["name"] += "-renamed"
+        start = time.perf_counter()
+        app.update_contacts(changed)
+        render_frame(app.query_one(ContactList))
+        return (time.perf_counter() - start) * 1000
+
+
+async def bench_end_to_end() -> float:
+    """Median milliseconds from a radio event being dispatched to its line being rendered."""
+    from meshchat_ui.radio.fake import FakeMeshCore
+    from meshchat_ui.radio.handler import RadioHandler
+    from meshchat_ui.tui.app import MeshChatApp
+    from meshchat_ui.tui.message_display import MessageDisplay
+
+    contacts = make_contacts(1_000)
+    app = MeshChatApp(message_db_path=":memory:")
+    async with app.run_test(size=APP_SIZE) as pilot:
+        app.pop_screen()
+        app.update_contacts(contacts)
+        meshcore = FakeMeshCore()
+        await meshcore.connect()
+        handler = RadioHandler(meshcore, app)
+        await handler.start_listening()
+        await pilot.pause()
+
+        display = app.query_one(MessageDisplay)
+        render_line = display.render_line
+        rendered: dict[str, float] = {}
+
+        def timed_render_line(y: int):
+            strip = render_line(y)
+            match = MARKER.search(strip.text)
+            if match and match.group() not in rendered:
+                rendered[match.group()] = time.perf_counter()
+            return strip
+
+        display.render_line = timed_render_line
+        latencies = []
+        for i in range(END_TO_END_MESSAGES):
+            marker = f"marker-{i}"
+            start = time.perf_counter()
+            await meshcore.receive_channel_message(0, f"node-{i}: {marker}")
+            deadline = start + 2.0
+            while marker not in rendered and time.perf_counter() < deadline:
+                await asyncio.sleep(0.0005)
+            if marker in rendered:
+                latencies.append(rendered[marker] - start)
+        await handler.stop_listening()
+        await meshcore.disconnect()
+    return statistics.median(latencies) * 1000
+
+
+async def bench_connector_fetch() -> float:
+    """Milliseconds to fetch contacts and channels from a fake radio, which is pure connector overhead."""
+    return await measure_fetch(0.0) * 1000
+
+
+async def bench_connector_receive() -> float:
+    """Messages per second from a fake radio to the message store through RadioConnector."""
+    throughput, dropped = await measure_receive()
+    assert dropped == 0
+    return throughput
+
+
+def calibrate(repeats: int = 7) -> float:
+    """Median milliseconds for a fixed pure-Python workload, a measure of how fast this machine is running right now."""
+    def workload():
+        start = time.perf_counter()
+        total = 0
+        for i in range(200_000):
+            total += i % 7
+        return (time.perf_counter() - start) * 1000
+    return statistics.median(workload() for _ in range(repeats))
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(repeats: int, only: str | None = None) -> dict:
+    benchmarks = {}
+    # Single-sample millisecond benchmarks, which take SHORT_REPEATS times the samples
+    short = set()
+    for size in CONTACT_SIZES:
+        benchmarks[f"message_callback[contacts={size}]"] = (lambda size=size: bench_message_callback(size), "msg/s", "higher", {"contacts": size})
+    for history in HISTORY_SIZES:
+        benchmarks[f"add_message[history={history}]"] = (lambda history=history: bench_add_message(history), "ms", "lower", {"history": history})
+        short.add(f"add_message[history={history}]")
+    for size in CONTACT_SIZES:
+        benchmarks[f"update_contacts[contacts={size}]"] = (lambda size=size: bench_update_contacts(size), "ms", "lower", {"contacts": size})
+        short.add(f"update_contacts[contacts={size}]")
+    benchmarks[f"connector_fetch[contacts={FAKE_RADIO_CONTACTS}]"] = (bench_connector_fetch, "ms", "lower", {"contacts": FAKE_RADIO_CONTACTS})
+    short.add(f"connector_fetch[contacts={FAKE_RADIO_CONTACTS}]")
+    benchmarks["connector_receive"] = (bench_connector_receive, "msg/s", "higher", {"messages": FAKE_RADIO_MESSAGES})
+    benchmarks["end_to_end"] = (bench_end_to_end, "ms", "lower", {"contacts": 1_000})
+
+    calibration = [calibrate()]
+    results = {}
+    for name, (bench, unit, better, params) in benchmarks.items():
+        if only and not name.startswith(only):
+            continue
+        samples = [asyncio.run(bench()) for _ in range(repeats * (SHORT_REPEATS if name in short else 1))]
+        results[name] = result(samples, unit, better, **params)
+        calibration.append(calibrate())
+        print(f"{name:<36} {results[name]['median']:>12.2f} {unit}", file=sys.stderr)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": repeats,
+            "calibration_ms": statistics.median(calibration),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the receive pipeline benchmark suite.")
+    parser.add_argument("--output", "-o", help="Write the JSON results to this file instead of stdout.")
+    parser.add_argument("--repeats", type=int, default=5, help="Samples taken per benchmark.")
+    parser.add_argument("--only", help="Only run benchmarks whose name starts with this.")
+    args = parser.parse_args()
+
+    # Keep benchmark output out of app_error.log and the real caches
+    scratch = tempfile.mkdtemp()
+    meshchat_ui.logger.LOG_FILE_PATH = os.path.join(scratch, "bench.log")
+    meshchat_ui.config.CONTACTS_CACHE_DIR = scratch
+
+    report = run_suite(args.repeats, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
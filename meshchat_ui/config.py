@@ -6,9 +6,63 @@ BLE_CONNECT_TIMEOUT = 10.0  # seconds
 BLE_MAX_RETRIES = 3
 BLE_RETRY_DELAY = 5  # seconds
 BLE_MAX_CHANNEL_ATTEMPTS = 8 # Max number of channels to attempt to fetch
+CHANNEL_FETCH_CONCURRENCY = 4 # Channel slot requests kept in flight, 1 fetches slots one at a time
+CHANNEL_FETCH_TIMEOUT = 3.0  # seconds, per channel slot
+
+# Startup Configuration
+AUTO_CONNECT = False # Connect to the last serial radio at startup instead of showing the connection screen
+
+# Post-connect Bootstrap Configuration
+BOOTSTRAP_INFO_TIMEOUT = 5.0  # seconds
+BOOTSTRAP_CONTACTS_TIMEOUT = 30.0  # seconds, large contact tables are slow over BLE
+BOOTSTRAP_CHANNELS_TIMEOUT = 30.0  # seconds, for the whole channel slot scan
+
+# Radio Command Configuration
+RADIO_COMMAND_MAX_IN_FLIGHT = 4 # Commands that match their own replies (channel slot reads) kept in flight together
+RADIO_COMMAND_TIMEOUT = 10.0  # seconds a command may run, after waiting its turn; a backstop to meshcore's own 5 s
+RADIO_CONTACTS_TIMEOUT = 30.0  # seconds, for fetching the contact table
+RADIO_COMMAND_STATS_WINDOW = 200 # Recent commands per priority class kept for queue wait and service time stats
+
+# Connection Supervisor Configuration
+SUPERVISOR_HEARTBEAT_INTERVAL = 15.0  # seconds without radio traffic before a heartbeat is sent
+SUPERVISOR_HEARTBEAT_MAX_INTERVAL = 120.0  # seconds, the interval doubles up to this while the link is healthy
+SUPERVISOR_HEARTBEAT_RETRY_INTERVAL = 1.0  # seconds between heartbeats once one has failed
+SUPERVISOR_HEARTBEAT_TIMEOUT = 4.0  # seconds, under meshcore's own 5 s command timeout
+SUPERVISOR_MAX_FAILURES = 3 # Failed commands or heartbeats in a row that mean the link is lost
+RECONNECT_BASE_DELAY = 0.5  # seconds, doubled after each failed reconnect attempt
+RECONNECT_MAX_DELAY = 30.0  # seconds
+
+# Link Health Configuration
+LINK_LATENCY_WINDOW = 100 # Command round trips kept for the latency histogram
+LINK_LATENCY_RECENT = 3 # Round trips whose median is compared against the usual latency
+LINK_LATENCY_WARNING = 0.5  # seconds, round trips below this never count as degraded
+LINK_LATENCY_WARNING_FACTOR = 4.0 # Times the usual round trip at which the link counts as degraded
+
+# Message Display Configuration
+MESSAGE_HISTORY_LIMIT = 5000 # Max number of messages kept in the message log
+MESSAGE_PAGE_SIZE = 200 # Number of stored messages loaded per scroll-back page
+MESSAGE_RENDER_CACHE_SIZE = 256 # Max number of messages kept rendered for the rows in view
+MESSAGE_UPDATE_INTERVAL = 1 / 30  # seconds, incoming messages are written to the log at most once per interval
+
+# Radio Event Queue Configuration
+RADIO_EVENT_QUEUE_SIZE = 1000 # Max number of radio events waiting for the app
+RADIO_EVENT_OVERFLOW_POLICY = "drop_oldest" # "drop_oldest" or "spill" to disk when the queue is full
+
+# Debug JSON Log Configuration
+RADIO_JSON_LOG_FLUSH_BYTES = 64 * 1024 # Buffered bytes that trigger a write to radio_messages.json
+RADIO_JSON_LOG_FLUSH_INTERVAL = 1.0  # seconds, max time a logged payload stays buffered
+RADIO_JSON_LOG_SEGMENT_BYTES = 64 * 1024 * 1024 # Size at which a new log segment is started
+RADIO_JSON_LOG_ROTATE_DAILY = True # Also start a new log segment when the local date changes
+
+# Message Store Configuration
+MESSAGE_STORE_BATCH_SIZE = 50 # Pending messages that trigger a write
+MESSAGE_STORE_FLUSH_INTERVAL = 1.0  # seconds
 
 # --- Persistence ---
 CONFIG_PATH = os.path.expanduser("~/.meshchat_serial.json")
+MESSAGE_DB_PATH = os.path.expanduser("~/.meshchat_messages.db")
+RADIO_EVENT_SPILL_PATH = os.path.expanduser("~/.meshchat_event_spill.jsonl")
+CONTACTS_CACHE_DIR = os.path.expanduser("~/.meshchat_contacts")
 
 def save_serial_connection(device_name: str, port: str, baud_rate: str):
     """Saves the last successful serial connection details."""
@@ -24,6 +78,18 @@ def save_serial_connection(device_name: str, port: str, baud_rate: str):
         # Silently fail if we can't write the config file
         pass
 
+def save_serial_radio_key(radio_key: str):
+    """Records the public key of the radio on the saved serial connection, so its cached state can be shown at startup."""
+    details = load_serial_connection()
+    if details is None or details.get("radio_key") == radio_key:
+        return
+    details["radio_key"] = radio_key
+    try:
+        with open(CONFIG_PATH, "w") as f:
+            json.dump(details, f)
+    except IOError:
+        pass
+
 def load_serial_connection() -> dict | None:
     """Loads the last serial connection details if they exist."""
     if not os.path.exists(CONFIG_PATH):
@@ -33,3 +99,48 @@ def load_serial_connection() -> dict | None:
             return json.load(f)
     except (IOError, json.JSONDecodeError):
         return None
+
+def save_contact_table(radio_key: str, lastmod: int, contacts: dict[str, dict]):
+    """Saves a radio's contact table and its last-modified marker."""
+    details = {
+        "lastmod": lastmod,
+        "contacts": contacts,
+    }
+    try:
+        os.makedirs(CONTACTS_CACHE_DIR, exist_ok=True)
+        with open(os.path.join(CONTACTS_CACHE_DIR, f"{radio_key}.json"), "w") as f:
+            json.dump(details, f)
+    except IOError:
+        # Silently fail, the next connect does a full fetch
+        pass
+
+def load_contact_table(radio_key: str) -> dict | None:
+    """Loads a radio's saved contact table if it exists."""
+    path = os.path.join(CONTACTS_CACHE_DIR, f"{radio_key}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return None
+
+def save_channel_list(radio_key: str, channels: list[dict]):
+    """Saves a radio's channel list, as shown in the sidebar."""
+    try:
+        os.makedirs(CONTACTS_CACHE_DIR, exist_ok=True)
+        with open(os.path.join(CONTACTS_CACHE_DIR, f"{radio_key}.channels.json"), "w") as f:
+            json.dump(channels, f)
+    except IOError:
+        pass
+
+def load_channel_list(radio_key: str) -> list[dict] | None:
+    """Loads a radio's saved channel list if it exists."""
+    path = os.path.join(CONTACTS_CACHE_DIR, f"{radio_key}.channels.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return None
@@ -1,32 +1,63 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 
-def get_logger(name, debug_mode: bool = False):
-    logger = logging.getLogger(name)
-    
-    if debug_mode:
-        logger.setLevel(logging.DEBUG)
-    else:
-        logger.setLevel(logging.INFO)
+LOG_FILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app_error.log")
+ROOT_LOGGER_NAME = "meshchat_ui"
 
-    # Clear existing handlers to prevent duplicate output
-    if logger.hasHandlers():
-        logger.handlers.clear()
+_listener: logging.handlers.QueueListener | None = None
 
-    # Create a file handler
-    log_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app_error.log")
-    handler = logging.FileHandler(log_file_path)
-    
-    if debug_mode:
-        handler.setLevel(logging.DEBUG)
-    else:
-        handler.setLevel(logging.INFO)
 
-    # Create a logging format
+def configure_logging() -> None:
+    """
+    Sets up logging for the package once: records go through a queue to a
+    single FileHandler on app_error.log, written by a background thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.FileHandler(LOG_FILE_PATH)
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     handler.setFormatter(formatter)
 
-    # Add the handlers to the logger
-    logger.addHandler(handler)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Writes out queued records and stops the logging thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root_logger.removeHandler(handler)
+    _listener = None
+
+
+def get_logger(name, debug_mode: bool = False):
+    configure_logging()
+    if name != ROOT_LOGGER_NAME and not name.startswith(f"{ROOT_LOGGER_NAME}."):
+        name = f"{ROOT_LOGGER_NAME}.{name}"
+    logger = logging.getLogger(name)
+
+    # Records below the logger's level are dropped before they are formatted
+    if debug_mode:
+        logger.setLevel(logging.DEBUG)
+    else:
+        logger.setLevel(logging.INFO)
 
     return logger
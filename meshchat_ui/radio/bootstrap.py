@@ -0,0 +1,87 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+from meshchat_ui.config import BOOTSTRAP_INFO_TIMEOUT, BOOTSTRAP_CONTACTS_TIMEOUT, BOOTSTRAP_CHANNELS_TIMEOUT
+from meshchat_ui.logger import get_logger
+
+if TYPE_CHECKING:
+    from meshchat_ui.radio.connector import RadioConnector
+    from meshchat_ui.tui.app import MeshChatApp
+
+
+class BootstrapCoordinator:
+    """
+    Brings the app up to date with a newly connected radio. Subscribes to
+    messages first, so messages arriving during the bootstrap are shown straight
+    away, then fetches the radio info, contacts and channels concurrently, each
+    with its own timeout. Each list is shown as soon as it arrives, and the time
+    taken by each phase is recorded in `timings`. Contacts are fetched
+    incrementally unless `full_sync` is set, which also drops contacts deleted
+    on the radio since the last full sync.
+    """
+
+    def __init__(self, connector: RadioConnector, app: MeshChatApp, full_sync: bool = False, debug_mode: bool = False):
+        self.connector = connector
+        self.app = app
+        self.full_sync = full_sync
+        self.logger = get_logger(__name__, debug_mode=debug_mode)
+        self.started_at: float | None = None
+        # Phase name -> seconds taken
+        self.timings: dict[str, float] = {}
+        # Phase name -> why it failed
+        self.errors: dict[str, str] = {}
+        self.info: dict | None = None
+
+    @property
+    def time_to_first_message(self) -> float | None:
+        """Seconds from the start of the bootstrap until the first message reached the app."""
+        handler = self.connector.radio_handler
+        if self.started_at is None or handler is None or handler.first_message_at is None:
+            return None
+        return handler.first_message_at - self.started_at
+
+    async def run(self) -> BootstrapCoordinator:
+        self.started_at = time.perf_counter()
+        await self._step("subscribe", self.connector.subscribe())
+        await asyncio.gather(
+            self._step("info", self._fetch_info(), BOOTSTRAP_INFO_TIMEOUT),
+            self._step("contacts", self._fetch_contacts(), BOOTSTRAP_CONTACTS_TIMEOUT),
+            self._step("channels", self._fetch_channels(), BOOTSTRAP_CHANNELS_TIMEOUT),
+        )
+        self.timings["total"] = time.perf_counter() - self.started_at
+        self.logger.info("Bootstrap finished: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.timings.items()))
+        return self
+
+    async def _step(self, name: str, step, timeout: float | None = None) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(step, timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Bootstrap step {name} timed out after {timeout} s")
+            self.errors[name] = f"timed out after {timeout:g} s"
+        except Exception as e:
+            self.logger.error(f"Bootstrap step {name} failed: {e}", exc_info=True)
+            self.errors[name] = str(e)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    async def _fetch_info(self) -> None:
+        self.info = await self.connector.get_radio_info()
+        if not self.info:
+            raise RuntimeError("no radio info")
+
+    async def _fetch_contacts(self) -> None:
+        handler = self.connector.radio_handler
+        if handler and handler.is_listening:
+            # The reply is delivered to the subscribed handler, which shows it
+            if not await self.connector.request_contacts(self.full_sync):
+                raise RuntimeError("get_contacts failed")
+        else:
+            self.app.update_contacts(await self.connector.get_contacts(self.full_sync))
+
+    async def _fetch_channels(self) -> None:
+        channels = await self.connector.get_channels()
+        if {channel["name"]: channel["id"] for channel in channels} != self.app.channels:
+            self.app.update_channels(channels)
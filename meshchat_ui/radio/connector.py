@@ -1,16 +1,21 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 import asyncio
-import serial
 from abc import ABC, abstractmethod
-from meshcore import MeshCore, EventType
-from bleak.exc import BleakDBusError
-from meshchat_ui.radio.handler import RadioHandler
+from meshchat_ui.radio.contacts import contact_from_entry
+from meshchat_ui.radio.scheduler import CommandScheduler, PRIORITY_INTERACTIVE, PRIORITY_ACK, PRIORITY_BACKGROUND
+from meshchat_ui.radio.supervisor import ConnectionSupervisor
 from meshchat_ui.logger import get_logger
-from meshchat_ui.config import BLE_CONNECT_TIMEOUT, BLE_MAX_RETRIES, BLE_RETRY_DELAY, BLE_MAX_CHANNEL_ATTEMPTS
+from meshchat_ui.config import save_contact_table, load_contact_table, save_channel_list, save_serial_radio_key
+from meshchat_ui.config import BLE_CONNECT_TIMEOUT, BLE_MAX_RETRIES, BLE_RETRY_DELAY, BLE_MAX_CHANNEL_ATTEMPTS, CHANNEL_FETCH_CONCURRENCY, CHANNEL_FETCH_TIMEOUT
+from meshchat_ui.config import RADIO_CONTACTS_TIMEOUT
 import hashlib # Added for channel key generation
 
+# meshcore and bleak are imported when a radio connects rather than here, so
+# starting the app does not pay for loading the BLE stack.
 if TYPE_CHECKING:
+    from meshcore import MeshCore
+    from meshchat_ui.radio.handler import RadioHandler
     from meshchat_ui.tui.app import MeshChatApp
 
 class BaseRadio(ABC):
@@ -33,6 +38,9 @@ class BluetoothRadio(BaseRadio):
         self.logger = get_logger(__name__, debug_mode=debug_mode)
 
     async def connect(self) -> tuple[bool, str | None]:
+        from meshcore import MeshCore
+        from bleak.exc import BleakDBusError
+
         self.logger.debug(f"Attempting to connect via BLE to {self.ble_address}...")
         if self.meshcore:
             self.logger.debug("Already connected, disconnecting first...")
@@ -78,9 +86,13 @@ class SerialRadio(BaseRadio):
         self.logger = get_logger(__name__, debug_mode=debug_mode)
 
     async def connect(self) -> tuple[bool, str | None]:
+        from meshcore import MeshCore
+        from meshchat_ui.radio.serial_cx import ModemlessSerialConnection
+
         self.logger.debug(f"Attempting to connect via Serial to {self.serial_port}@{self.baud_rate}...")
         try:
-            self.meshcore = await MeshCore.create_serial(self.serial_port, self.baud_rate)
+            self.meshcore = MeshCore(ModemlessSerialConnection(self.serial_port, self.baud_rate, cx_dly=0.1))
+            await self.meshcore.connect()
             self.logger.debug("Serial connection successful.")
             return True, None
         except Exception as e:
@@ -98,14 +110,26 @@ class SerialRadio(BaseRadio):
         return self.meshcore
 
 class RadioConnector:
-    """Handles the connection to the MeshCore radio."""
+    """Handles the connection to the MeshCore radio. Every command goes through `scheduler`."""
 
     def __init__(self, app: MeshChatApp, debug_mode: bool = False):
         self.radio: BaseRadio | None = None
         self.radio_handler: RadioHandler | None = None
+        self.supervisor: ConnectionSupervisor | None = None
         self.app = app
         self.debug_mode = debug_mode
         self.logger = get_logger(__name__, debug_mode=self.debug_mode)
+        self.scheduler = CommandScheduler(on_complete=self._on_command_complete, debug_mode=self.debug_mode)
+        # Channel slot index -> channel name ("" for an empty slot, None if the slot could not be read)
+        self.channel_slots: dict[int, str | None] | None = None
+        # Contact table of the connected radio, keyed by public key, and its last-modified marker
+        self.contact_table: dict[str, dict] = {}
+        self.contacts_lastmod = 0
+        # Last-modified marker sent with the latest contacts request; 0 asks for the whole table
+        self.contacts_requested_since: int | None = None
+        self.radio_key: str | None = None
+        self._contact_table_dirty = False
+        self._contact_save_task: asyncio.Task | None = None
 
     @staticmethod
     def _generate_channel_key(channel_name: str) -> bytes:
@@ -123,15 +147,57 @@ class RadioConnector:
         self.radio = SerialRadio(serial_port, baud_rate, debug_mode=self.debug_mode)
 
     async def connect_radio(self) -> tuple[bool, str | None]:
+        from meshchat_ui.radio.handler import RadioHandler
+
         if self.radio:
             success, message = await self.radio.connect()
             if success:
+                self.channel_slots = None
+                await self.flush_contact_table()
+                self._load_contact_table(await self.radio.get_meshcore())
+                if isinstance(self.radio, SerialRadio) and self.radio_key:
+                    save_serial_radio_key(self.radio_key)
                 self.radio_handler = RadioHandler(await self.radio.get_meshcore(), self.app, debug_mode=self.debug_mode)
             return success, message
         return False, "No radio type selected."
 
+    async def start_supervisor(self) -> None:
+        """Starts watching the link, reconnecting and resyncing when it is lost."""
+        if self.supervisor is None:
+            self.supervisor = ConnectionSupervisor(self, self.app, debug_mode=self.debug_mode)
+        await self.supervisor.start()
+
+    def _on_command_complete(self, name: str, priority: int, outcome, service_time: float) -> None:
+        """
+        Tells the supervisor whether a command got through. An exception or a
+        missing reply counts as a failure; meshcore reports a command that got
+        no reply as ERROR with reason "no_event_received". An ERROR the radio
+        sent back, such as an unknown contact, shows the link is up, but its
+        time is not a round trip worth measuring. Background syncs are left
+        out, since slow contact transfers and unreadable channel slots say
+        little about the link.
+        """
+        from meshcore import EventType
+
+        if self.supervisor is None or priority == PRIORITY_BACKGROUND:
+            return
+        if isinstance(outcome, Exception):
+            self.supervisor.command_failed(f"{name} failed: {outcome!r}")
+        elif outcome is None or (outcome.type == EventType.ERROR and outcome.payload.get("reason") in ("no_event_received", "timeout")):
+            self.supervisor.command_failed(f"{name} got no reply")
+        elif outcome.type == EventType.ERROR:
+            self.logger.debug(f"Radio rejected {name}: {outcome.payload}")
+            self.supervisor.command_succeeded()
+        else:
+            self.supervisor.command_succeeded(service_time)
+
     async def disconnect(self) -> None:
         """Disconnects from the radio."""
+        if self.supervisor:
+            await self.supervisor.stop()
+            self.supervisor = None
+        self.scheduler.cancel_pending()
+        await self.flush_contact_table()
         if self.radio and self.radio.meshcore:
             self.logger.debug("Attempting to disconnect from MeshCore...")
             try:
@@ -143,52 +209,190 @@ class RadioConnector:
             finally:
                 self.radio = None
                 self.radio_handler = None
+                self.channel_slots = None
 
     async def get_meshcore(self) -> MeshCore | None:
         if self.radio:
             return await self.radio.get_meshcore()
         return None
 
-    async def get_contacts_and_channels(self) -> dict[str, list[str]]:
-        contacts = []
-        channels = []
+    def _load_contact_table(self, meshcore: MeshCore | None) -> None:
+        """Loads the saved contact table for the connected radio, keyed by its public key."""
+        self.contact_table = {}
+        self.contacts_lastmod = 0
+        self_info = getattr(meshcore, "self_info", None) or {}
+        self.radio_key = self_info.get("public_key")
+        if not self.radio_key:
+            return
+        saved = load_contact_table(self.radio_key)
+        if saved:
+            self.contact_table = saved.get("contacts", {})
+            self.contacts_lastmod = saved.get("lastmod", 0)
+            self.logger.debug(f"Loaded {len(self.contact_table)} saved contacts for {self.radio_key[:12]}, lastmod {self.contacts_lastmod}")
+
+    def merge_contact_entries(self, entries: dict, lastmod: int | None = None, complete: bool = False) -> list[dict]:
+        """
+        Merges contact entries from a CONTACTS payload into the contact table and
+        saves it. A `complete` payload, the reply to a request for the whole
+        table, replaces the table, so contacts deleted on the radio are dropped.
+        Returns the full contact list.
+        """
+        previous_lastmod = self.contacts_lastmod
+        previous_count = len(self.contact_table)
+        if complete:
+            self.contact_table = {}
+        for key, contact_entry in entries.items():
+            self.contact_table[key] = contact_from_entry(key, contact_entry)
+        if lastmod is not None:
+            self.contacts_lastmod = lastmod if complete else max(self.contacts_lastmod, lastmod)
+        if self.radio_key and (entries or self.contacts_lastmod != previous_lastmod or len(self.contact_table) != previous_count):
+            self._schedule_contact_save()
+        return list(self.contact_table.values())
+
+    def _schedule_contact_save(self) -> None:
+        """
+        Saves the contact table in a worker thread, so a large table is not
+        written out on the event loop. Changes made while a save is running are
+        written by a single save after it.
+        """
+        self._contact_table_dirty = True
+        if self._contact_save_task is None or self._contact_save_task.done():
+            self._contact_save_task = asyncio.get_running_loop().create_task(self._save_contact_table())
+
+    async def _save_contact_table(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._contact_table_dirty:
+            self._contact_table_dirty = False
+            await loop.run_in_executor(None, save_contact_table, self.radio_key, self.contacts_lastmod, dict(self.contact_table))
+
+    async def flush_contact_table(self) -> None:
+        """Waits for any pending save of the contact table."""
+        if self._contact_save_task is not None:
+            await self._contact_save_task
+            self._contact_save_task = None
+
+    async def get_contacts_and_channels(self, full_sync: bool = False) -> dict[str, list[str]]:
+        """
+        Fetches contacts and channels. Contacts are synced incrementally: only
+        contacts changed since the saved last-modified marker are requested,
+        unless `full_sync` is set, which also drops contacts deleted on the radio.
+        """
+        if await self.get_meshcore() is None:
+            return {"contacts": [], "channels": []}
+        return {"contacts": await self.get_contacts(full_sync), "channels": await self.get_channels()}
+
+    async def get_contacts(self, full_sync: bool = False) -> list[dict]:
+        """
+        Fetches contacts changed since the saved last-modified marker, or the
+        whole table when `full_sync` is set, and returns the full contact list.
+        The saved table is kept until the radio has answered.
+        """
+        from meshcore import EventType
 
         meshcore = await self.get_meshcore()
         if meshcore is None:
-            return {"contacts": contacts, "channels": channels}
+            return []
 
+        contacts = list(self.contact_table.values())
+        since = 0 if full_sync else self.contacts_lastmod
+        self.contacts_requested_since = since
         try:
-            result = await meshcore.commands.get_contacts()
-            self.logger.debug(f"get_contacts returned: {result}")
+            result = await self.scheduler.run(
+                "get_contacts", lambda: meshcore.commands.get_contacts(lastmod=since), PRIORITY_BACKGROUND, RADIO_CONTACTS_TIMEOUT
+            )
+            self.logger.debug(f"get_contacts(lastmod={since}) returned {len(result.payload) if result else 0} entries")
             if result and result.type != EventType.ERROR:
-                payload = result.payload
-                for key, contact_entry in payload.items():
-                    name = (
-                        contact_entry.get("adv_name")
-                        or contact_entry.get("name")
-                        or f"contact_{key}"
-                    )
-                    contact_type = contact_entry.get("type")
-                    contacts.append({
-                        "name": name,
-                        "type": contact_type,
-                        "public_key": key
-                    })
+                contacts = self.merge_contact_entries(result.payload, result.attributes.get("lastmod"), complete=since == 0)
         except Exception as e:
             self.logger.error("Error fetching contacts:", exc_info=True)
+        return contacts
 
-        for idx in range(BLE_MAX_CHANNEL_ATTEMPTS):
-            try:
-                chan_result = await meshcore.commands.get_channel(idx)
-                if chan_result and chan_result.type != EventType.ERROR:
-                    channel_info = chan_result.payload
-                    channel_name = channel_info.get("channel_name")
-                    if channel_name:
-                        channels.append({"name": channel_name, "id": idx})
-            except Exception:
-                continue
+    async def request_contacts(self, full_sync: bool = False) -> bool:
+        """
+        Requests contacts changed since the saved last-modified marker, or the
+        whole table when `full_sync` is set. The reply is a CONTACTS event,
+        which a listening RadioHandler merges and shows, so this only reports
+        whether the request succeeded.
+        """
+        from meshcore import EventType
 
-        return {"contacts": contacts, "channels": channels}
+        meshcore = await self.get_meshcore()
+        if meshcore is None:
+            return False
+        since = 0 if full_sync else self.contacts_lastmod
+        self.contacts_requested_since = since
+        result = await self.scheduler.run(
+            "get_contacts", lambda: meshcore.commands.get_contacts(lastmod=since), PRIORITY_BACKGROUND, RADIO_CONTACTS_TIMEOUT
+        )
+        return bool(result) and result.type != EventType.ERROR
+
+    async def get_channels(self) -> list[dict]:
+        """Returns the named channels in the radio's channel slots, fetching the slot table on first use."""
+        meshcore = await self.get_meshcore()
+        if meshcore is None:
+            return []
+
+        channels = []
+        channel_slots = await self.get_channel_slots(meshcore)
+        for idx, channel_name in sorted(channel_slots.items()):
+            if channel_name:
+                channels.append({"name": channel_name, "id": idx})
+        if self.radio_key:
+            save_channel_list(self.radio_key, channels)
+        return channels
+
+    async def get_channel_slots(self, meshcore: MeshCore, refresh: bool = False) -> dict[int, str | None]:
+        """
+        Returns the cached channel slot table, fetching it from the radio on first use
+        or when `refresh` is set.
+        """
+        if self.channel_slots is not None and not refresh:
+            return self.channel_slots
+
+        semaphore = asyncio.Semaphore(CHANNEL_FETCH_CONCURRENCY)
+        names = await asyncio.gather(
+            *(self._fetch_channel_slot(meshcore, idx, semaphore) for idx in range(BLE_MAX_CHANNEL_ATTEMPTS))
+        )
+        self.channel_slots = dict(enumerate(names))
+        self.logger.debug(f"Fetched channel slots: {self.channel_slots}")
+        return self.channel_slots
+
+    async def _fetch_channel_slot(self, meshcore: MeshCore, idx: int, semaphore: asyncio.Semaphore) -> str | None:
+        """
+        Reads one channel slot. With more than one request in flight, replies are
+        matched to the slot by waiting for a CHANNEL_INFO event with this channel_idx.
+        """
+        from meshcore import EventType
+
+        async def request():
+            nonlocal waiter
+            if CHANNEL_FETCH_CONCURRENCY > 1:
+                waiter = asyncio.create_task(
+                    meshcore.wait_for_event(EventType.CHANNEL_INFO, {"channel_idx": idx}, timeout=CHANNEL_FETCH_TIMEOUT)
+                )
+                await asyncio.sleep(0)  # Let the waiter subscribe before the request goes out
+            return await meshcore.commands.get_channel(idx)
+
+        async with semaphore:
+            waiter = None
+            try:
+                chan_result = await self.scheduler.run("get_channel", request, PRIORITY_BACKGROUND, CHANNEL_FETCH_TIMEOUT, shared=True)
+                if chan_result and chan_result.type != EventType.ERROR and chan_result.payload.get("channel_idx", idx) == idx:
+                    return chan_result.payload.get("channel_name") or ""
+                if waiter is None:
+                    return None
+                chan_result = await waiter
+                waiter = None
+                return (chan_result.payload.get("channel_name") or "") if chan_result else None
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Timed out getting channel {idx}")
+                return None
+            except Exception as e:
+                self.logger.warning(f"Error getting channel {idx}: {e}", exc_info=True)
+                return None
+            finally:
+                if waiter is not None:
+                    waiter.cancel()
 
     async def join_public_channel(self, channel_name: str) -> tuple[bool, str | None, list | None]:
         """
@@ -208,35 +412,20 @@ class RadioConnector:
 
         self.logger.debug(f"Attempting to join channel {channel_name} with key {channel_key.hex()}")
 
-        # 1. Check existing channels and find an empty slot
-        for idx in range(BLE_MAX_CHANNEL_ATTEMPTS):
-            try:
-                chan_result = await meshcore.commands.get_channel(idx)
-                if chan_result and chan_result.type != EventType.ERROR:
-                    channel_info = chan_result.payload
-                    current_channel_name = channel_info.get("channel_name")
-                    current_channel_id = channel_info.get("channel_id") # Note: assuming channel_id might be different from idx
-
-                    self.logger.debug(f"Channel {idx}: {current_channel_name} (ID: {current_channel_id})")
-
-                    if current_channel_name == channel_name:
-                        already_joined = True
-                        channel_id_to_use = idx # Use existing slot
-                        break
-                    elif not current_channel_name and not empty_slot_found: # Assuming empty channel has no name
-                        empty_slot_found = True
-                        channel_id_to_use = idx
-                    else:
-                        used_channels.append({"id": idx, "name": current_channel_name or f"Unnamed {idx}"})
-                elif not empty_slot_found: # If error or no result, treat as potentially empty
-                    empty_slot_found = True
-                    channel_id_to_use = idx
-
-            except Exception as e:
-                self.logger.warning(f"Error getting channel {idx}: {e}", exc_info=True)
-                if not empty_slot_found:
-                    empty_slot_found = True
-                    channel_id_to_use = idx
+        # 1. Check existing channels and find an empty slot, using the cached slot table
+        channel_slots = await self.get_channel_slots(meshcore)
+        for idx, current_channel_name in sorted(channel_slots.items()):
+            self.logger.debug(f"Channel {idx}: {current_channel_name}")
+
+            if current_channel_name == channel_name:
+                already_joined = True
+                channel_id_to_use = idx # Use existing slot
+                break
+            elif not current_channel_name and not empty_slot_found: # Empty or unreadable slot
+                empty_slot_found = True
+                channel_id_to_use = idx
+            elif current_channel_name:
+                used_channels.append({"id": idx, "name": current_channel_name})
         
         # 2. Assign channel to a slot
         if already_joined:
@@ -267,12 +456,16 @@ class RadioConnector:
 
     async def _set_channel_config(self, meshcore: MeshCore, channel_idx: int, channel_name: str, channel_key: bytes) -> tuple[bool, str | None]:
         """Helper to set channel configuration."""
+        from meshcore import EventType
+
         try:
-            set_result = await meshcore.commands.set_channel(channel_idx, channel_name, channel_key)
+            set_result = await self.scheduler.run(
+                "set_channel", lambda: meshcore.commands.set_channel(channel_idx, channel_name, channel_key), PRIORITY_ACK
+            )
             if set_result and set_result.type != EventType.ERROR:
                 self.logger.info(f"Successfully set channel {channel_name} in slot {channel_idx}")
-                # Refresh channels list in app after successful join/overwrite
-                # This should probably be handled by the app's get_contacts_and_channels worker
+                if self.channel_slots is not None:
+                    self.channel_slots[channel_idx] = channel_name
                 return True, None
             else:
                 error_msg = set_result.payload.get("error") if set_result else "Unknown error from set_channel"
@@ -308,7 +501,7 @@ class RadioConnector:
         if meshcore is None:
             return False
         try:
-            await meshcore.commands.send_advert(flood=True)
+            await self.scheduler.run("send_advert", lambda: meshcore.commands.send_advert(flood=True), PRIORITY_INTERACTIVE)
             return True
         except Exception as e:
             self.logger.error(f"Error sending advert: {e}", exc_info=True)
@@ -321,7 +514,7 @@ class RadioConnector:
             return False, "Radio not connected. Cannot send message."
         try:
             self.logger.debug(f"Sending message to {destination_id}")
-            await meshcore.commands.send_msg(destination_id, message)
+            await self.scheduler.run("send_msg", lambda: meshcore.commands.send_msg(destination_id, message), PRIORITY_INTERACTIVE)
             return True, None
         except Exception as e:
             self.logger.error(f"Error sending message to {destination_id}: {e}", exc_info=True)
@@ -334,7 +527,7 @@ class RadioConnector:
             return False, "Radio not connected. Cannot send channel message."
         try:
             self.logger.debug(f"Sending channel message to {channel_id}")
-            await meshcore.commands.send_chan_msg(chan=channel_id, msg=message)
+            await self.scheduler.run("send_chan_msg", lambda: meshcore.commands.send_chan_msg(chan=channel_id, msg=message), PRIORITY_INTERACTIVE)
             return True, None
         except Exception as e:
             self.logger.error(f"Error sending channel message to {channel_id}: {e}", exc_info=True)
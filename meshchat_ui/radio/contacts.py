@@ -0,0 +1,94 @@
+from bisect import bisect_left, insort
+
+
+def contact_from_entry(key: str, contact_entry: dict) -> dict:
+    """Converts a meshcore contact entry into the app's contact dict."""
+    name = (
+        contact_entry.get("adv_name")
+        or contact_entry.get("name")
+        or f"contact_{key}"
+    )
+    return {
+        "name": name,
+        "type": contact_entry.get("type"),
+        "public_key": key,
+    }
+
+
+class ContactIndex:
+    """
+    Indexes contacts for sender resolution.
+    Full public keys and names are looked up in dicts; public key prefixes are
+    resolved by bisecting a sorted list of keys. Each name maps to every
+    contact with that name, in the order they were added, and a name lookup
+    returns the first of them.
+    """
+
+    def __init__(self, contacts: list[dict] | None = None):
+        self.by_key: dict[str, dict] = {}
+        self.by_name: dict[str, list[dict]] = {}
+        self._sorted_keys: list[str] = []
+        if contacts:
+            self.update(contacts)
+
+    def __len__(self) -> int:
+        return len(self.by_key)
+
+    def update(self, contacts: list[dict]) -> None:
+        """Rebuilds the index from a list of contacts."""
+        self.by_key = {}
+        self.by_name = {}
+        for contact in contacts:
+            self.by_key[contact["public_key"]] = contact
+            self.by_name.setdefault(contact["name"], []).append(contact)
+        self._sorted_keys = sorted(self.by_key)
+
+    def add(self, contact: dict) -> None:
+        """Adds or replaces a single contact."""
+        public_key = contact["public_key"]
+        previous = self.by_key.get(public_key)
+        if previous is None:
+            insort(self._sorted_keys, public_key)
+        elif previous["name"] == contact["name"]:
+            # Same name: keep its place among contacts sharing the name
+            named = self.by_name[contact["name"]]
+            named[named.index(previous)] = contact
+            self.by_key[public_key] = contact
+            return
+        else:
+            self._remove_name(previous)
+        self.by_key[public_key] = contact
+        self.by_name.setdefault(contact["name"], []).append(contact)
+
+    def remove(self, public_key: str) -> None:
+        contact = self.by_key.pop(public_key, None)
+        if contact is None:
+            return
+        del self._sorted_keys[bisect_left(self._sorted_keys, public_key)]
+        self._remove_name(contact)
+
+    def _remove_name(self, contact: dict) -> None:
+        named = self.by_name.get(contact["name"], [])
+        named[:] = [other for other in named if other is not contact]
+        if not named:
+            self.by_name.pop(contact["name"], None)
+
+    def get(self, public_key: str) -> dict | None:
+        return self.by_key.get(public_key)
+
+    def get_by_name(self, name: str) -> dict | None:
+        named = self.by_name.get(name)
+        return named[0] if named else None
+
+    def match_prefix(self, prefix: str, limit: int = 2) -> list[dict]:
+        """
+        Returns up to `limit` contacts whose public key starts with `prefix`.
+        More than one result means the prefix is ambiguous.
+        """
+        keys = self._sorted_keys
+        matches = []
+        idx = bisect_left(keys, prefix)
+        while idx < len(keys) and len(matches) < limit and keys[idx].startswith(prefix):
+            matches.append(self.by_key[keys[idx]])
+            idx += 1
+        return matches
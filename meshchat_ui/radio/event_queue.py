@@ -0,0 +1,161 @@
+from __future__ import annotations
+import asyncio
+import json
+import os
+from typing import Callable
+
+from meshcore import EventType
+from meshcore.events import Event
+
+from meshchat_ui.config import RADIO_EVENT_QUEUE_SIZE, RADIO_EVENT_OVERFLOW_POLICY, RADIO_EVENT_SPILL_PATH
+from meshchat_ui.logger import get_logger
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_SPILL = "spill"
+
+
+class EventQueue:
+    """
+    A bounded queue between meshcore event callbacks and the app.
+    Callbacks only enqueue; a consumer task hands events to `consumer` one at a
+    time, yielding to the event loop between them so a slow UI cannot hold up
+    radio event processing. When the queue is full the oldest event is dropped,
+    or with the "spill" policy new events are appended to a file on disk and
+    read back in order once the queue drains. A spill file left by an earlier
+    session is removed on creation, so its stale events are never replayed.
+    """
+
+    def __init__(self, consumer: Callable[[Event], None], maxsize: int = RADIO_EVENT_QUEUE_SIZE, overflow_policy: str = RADIO_EVENT_OVERFLOW_POLICY, spill_path: str = RADIO_EVENT_SPILL_PATH, debug_mode: bool = False):
+        if overflow_policy not in (OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.consumer = consumer
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.spill_path = spill_path
+        self.logger = get_logger(__name__, debug_mode=debug_mode)
+        self._queue: asyncio.Queue[Event] = asyncio.Queue(maxsize)
+        self._task: asyncio.Task | None = None
+        self._overflowing = False
+        self._spill_pending = 0
+        self._spill_read_pos = 0
+        self.high_water_mark = 0
+        self.dropped_count = 0
+        self.spilled_count = 0
+        if overflow_policy == OVERFLOW_SPILL:
+            self._remove_spill_file()
+
+    @property
+    def depth(self) -> int:
+        """Number of events waiting, including any spilled to disk."""
+        return self._queue.qsize() + self._spill_pending
+
+    def put(self, event: Event) -> None:
+        """Enqueues an event without blocking, applying the overflow policy when full."""
+        if self._spill_pending or self._queue.full():
+            if not self._overflowing:
+                self._overflowing = True
+                self.logger.warning(f"Radio event queue full ({self.maxsize}), applying {self.overflow_policy} policy")
+            if self.overflow_policy == OVERFLOW_SPILL:
+                self._spill(event)
+            else:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.dropped_count += 1
+                self._queue.put_nowait(event)
+        else:
+            self._queue.put_nowait(event)
+        self.high_water_mark = max(self.high_water_mark, self.depth)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._consume())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def join(self) -> None:
+        """Waits until every queued event, including spilled ones, has been consumed."""
+        while self.depth:
+            await self._queue.join()
+            await asyncio.sleep(0)
+
+    async def _consume(self) -> None:
+        while True:
+            if self._queue.empty():
+                self._overflowing = False
+                if self._spill_pending:
+                    self._unspill()
+            event = await self._queue.get()
+            try:
+                self.consumer(event)
+            except Exception:
+                self.logger.error(f"Error processing {event.type} event", exc_info=True)
+            finally:
+                self._queue.task_done()
+            await asyncio.sleep(0)
+
+    def _spill(self, event: Event) -> None:
+        try:
+            with open(self.spill_path, "a") as f:
+                f.write(json.dumps(
+                    {"type": event.type.value, "payload": _encode(event.payload), "attributes": _encode(event.attributes)},
+                    default=str,
+                ))
+                f.write("\n")
+        except IOError as e:
+            self.dropped_count += 1
+            self.logger.error(f"Error spilling radio event to {self.spill_path}: {e}")
+            return
+        self._spill_pending += 1
+        self.spilled_count += 1
+
+    def _unspill(self) -> None:
+        """Moves up to `maxsize` spilled events back into the queue."""
+        try:
+            with open(self.spill_path, "r") as f:
+                f.seek(self._spill_read_pos)
+                while self._spill_pending and not self._queue.full():
+                    line = f.readline()
+                    if not line:
+                        break
+                    entry = json.loads(line, object_hook=_decode_bytes)
+                    self._queue.put_nowait(Event(EventType(entry["type"]), entry["payload"], entry.get("attributes")))
+                    self._spill_pending -= 1
+                self._spill_read_pos = f.tell()
+        except (IOError, ValueError) as e:
+            self.logger.error(f"Error reading spilled radio events from {self.spill_path}: {e}")
+            self.dropped_count += self._spill_pending
+            self._spill_pending = 0
+        if not self._spill_pending:
+            self._spill_read_pos = 0
+            self._remove_spill_file()
+
+    def _remove_spill_file(self) -> None:
+        try:
+            os.remove(self.spill_path)
+        except OSError:
+            pass
+
+
+def _encode(value):
+    """Makes an event payload JSON-safe, tagging bytes so they come back as bytes."""
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": bytes(value).hex()}
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode_bytes(entry: dict):
+    if entry.keys() == {"__bytes__"}:
+        return bytes.fromhex(entry["__bytes__"])
+    return entry
@@ -0,0 +1,227 @@
+from __future__ import annotations
+import asyncio
+import random
+import time
+from collections import Counter
+
+from meshcore import EventType
+from meshcore.events import Event, EventDispatcher
+
+from meshchat_ui.config import BLE_MAX_CHANNEL_ATTEMPTS, CHANNEL_FETCH_TIMEOUT
+from meshchat_ui.radio.connector import BaseRadio
+from meshchat_ui.logger import get_logger
+
+
+class FakeCommands:
+    """The MeshCore command set, answered by a FakeMeshCore."""
+
+    def __init__(self, meshcore: FakeMeshCore):
+        self.meshcore = meshcore
+
+    async def get_contacts(self, lastmod: int = 0) -> Event:
+        meshcore = self.meshcore
+        changed = {key: dict(entry) for key, entry in meshcore.contacts.items() if entry.get("lastmod", 0) > lastmod}
+        newest = max((entry.get("lastmod", 0) for entry in meshcore.contacts.values()), default=lastmod)
+        return await meshcore.command("get_contacts", Event(EventType.CONTACTS, changed, {"lastmod": newest}))
+
+    async def get_channel(self, channel_idx: int) -> Event:
+        meshcore = self.meshcore
+        if channel_idx not in meshcore.channel_slots:
+            return await meshcore.command("get_channel", Event(EventType.ERROR, {"error": f"No channel slot {channel_idx}"}))
+        payload = {
+            "channel_idx": channel_idx,
+            "channel_name": meshcore.channel_slots[channel_idx],
+            "channel_secret": meshcore.channel_keys.get(channel_idx, bytes(16)),
+        }
+        return await meshcore.command("get_channel", Event(EventType.CHANNEL_INFO, payload, {"channel_idx": channel_idx}))
+
+    async def set_channel(self, channel_idx: int, channel_name: str, channel_secret: bytes) -> Event:
+        meshcore = self.meshcore
+        if channel_idx not in meshcore.channel_slots:
+            return await meshcore.command("set_channel", Event(EventType.ERROR, {"error": f"No channel slot {channel_idx}"}))
+        return await meshcore.command(
+            "set_channel", Event(EventType.OK, {}),
+            on_success=lambda: meshcore.set_channel_slot(channel_idx, channel_name, channel_secret),
+        )
+
+    async def send_msg(self, dst, msg: str) -> Event:
+        meshcore = self.meshcore
+        return await meshcore.command(
+            "send_msg", Event(EventType.MSG_SENT, {"type": 0, "expected_ack": b"\x00" * 4, "suggested_timeout": 1000}),
+            on_success=lambda: meshcore.sent_messages.append({"destination": dst, "text": msg}),
+        )
+
+    async def send_chan_msg(self, chan: int, msg: str) -> Event:
+        meshcore = self.meshcore
+        return await meshcore.command(
+            "send_chan_msg", Event(EventType.MSG_SENT, {"type": 0, "expected_ack": b"\x00" * 4, "suggested_timeout": 1000}),
+            on_success=lambda: meshcore.sent_messages.append({"channel_idx": chan, "text": msg}),
+        )
+
+    async def send_advert(self, flood: bool = False) -> Event:
+        return await self.meshcore.command("send_advert", Event(EventType.OK, {}))
+
+    async def send_device_query(self) -> Event:
+        return await self.meshcore.command("send_device_query", Event(EventType.DEVICE_INFO, {"fw ver": 0, "model": "fake"}))
+
+
+class FakeMeshCore:
+    """
+    An in-process stand-in for MeshCore, for tests and benchmarks without a radio.
+    It keeps a channel slot table and a contact table, and answers commands the
+    way the radio link does: each reply is dispatched as an event after
+    `latency` plus up to `jitter` seconds, and the command returns the first
+    event of the reply's type to arrive, so concurrent commands with jitter can
+    see each other's replies. A command fails with an ERROR event at
+    `failure_rate`, and its reply is dropped at `drop_rate` or while the link is
+    down (see `drop_link`), making the command time out after `command_timeout`
+    seconds.
+    Incoming traffic is simulated with `receive_channel_message`,
+    `receive_direct_message` and `dispatch`.
+    """
+
+    def __init__(self, channels: dict[int, str] | None = None, contacts: dict[str, dict] | None = None, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, drop_rate: float = 0.0, command_timeout: float = CHANNEL_FETCH_TIMEOUT, max_channels: int = BLE_MAX_CHANNEL_ATTEMPTS, seed: int | None = None, debug_mode: bool = False):
+        self.channel_slots: dict[int, str] = {idx: "" for idx in range(max_channels)}
+        self.channel_slots.update(channels or {})
+        self.channel_keys: dict[int, bytes] = {}
+        # Public key -> contact entry as the radio reports it (adv_name, type, lastmod)
+        self.contacts: dict[str, dict] = {key: dict(entry) for key, entry in (contacts or {}).items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.command_timeout = command_timeout
+        self.rng = random.Random(seed)
+        self.logger = get_logger(__name__, debug_mode=debug_mode)
+        self.self_info = {"public_key": "fa" * 32, "name": "fake radio"}
+        self.dispatcher = EventDispatcher()
+        self.commands = FakeCommands(self)
+        self.command_counts: Counter[str] = Counter()
+        self.sent_messages: list[dict] = []
+        self.is_connected = False
+        self.auto_message_fetching = False
+
+    async def connect(self) -> None:
+        await self.dispatcher.start()
+        self.is_connected = True
+
+    async def disconnect(self) -> None:
+        self.is_connected = False
+        await self.dispatcher.stop()
+
+    async def drop_link(self, reason: str = "simulated_disconnect") -> None:
+        """Simulates losing the link: a DISCONNECTED event, then commands go unanswered until reconnected."""
+        await self.dispatch(Event(EventType.DISCONNECTED, {"reason": reason}))
+        self.is_connected = False
+
+    def subscribe(self, event_type, callback, attribute_filters=None):
+        return self.dispatcher.subscribe(event_type, callback, attribute_filters)
+
+    def unsubscribe(self, subscription):
+        subscription.unsubscribe()
+
+    async def wait_for_event(self, event_type, attribute_filters=None, timeout=None):
+        return await self.dispatcher.wait_for_event(event_type, attribute_filters, timeout)
+
+    async def start_auto_message_fetching(self):
+        self.auto_message_fetching = True
+
+    async def stop_auto_message_fetching(self):
+        self.auto_message_fetching = False
+
+    async def dispatch(self, event: Event) -> None:
+        """Delivers an event to subscribers as if the radio had sent it."""
+        await self.dispatcher.dispatch(event)
+
+    async def receive_channel_message(self, channel_idx: int, text: str, sender_timestamp: int | None = None) -> None:
+        await self.dispatch(Event(EventType.CHANNEL_MSG_RECV, {
+            "type": "CHAN",
+            "channel_idx": channel_idx,
+            "path_len": 0,
+            "txt_type": 0,
+            "sender_timestamp": sender_timestamp or int(time.time()),
+            "text": text,
+        }, {"channel_idx": channel_idx}))
+
+    async def receive_direct_message(self, pubkey_prefix: str, text: str, sender_timestamp: int | None = None) -> None:
+        await self.dispatch(Event(EventType.CONTACT_MSG_RECV, {
+            "type": "PRIV",
+            "pubkey_prefix": pubkey_prefix,
+            "path_len": 0,
+            "txt_type": 0,
+            "sender_timestamp": sender_timestamp or int(time.time()),
+            "text": text,
+        }, {"pubkey_prefix": pubkey_prefix}))
+
+    def update_contact(self, public_key: str, name: str, contact_type: int = 1) -> None:
+        """Adds or renames a contact, bumping its last-modified marker."""
+        lastmod = max((entry.get("lastmod", 0) for entry in self.contacts.values()), default=0) + 1
+        self.contacts[public_key] = {"public_key": public_key, "adv_name": name, "type": contact_type, "lastmod": lastmod}
+
+    def set_channel_slot(self, channel_idx: int, channel_name: str, channel_secret: bytes) -> None:
+        self.channel_slots[channel_idx] = channel_name
+        self.channel_keys[channel_idx] = channel_secret
+
+    async def command(self, name: str, reply: Event, on_success=None) -> Event:
+        """
+        Runs a simulated command: dispatches `reply` after the simulated latency
+        and returns the first reply-typed or ERROR event, like the radio link.
+        `on_success` applies the command's effect when it does not fail.
+        """
+        self.command_counts[name] += 1
+        if self.rng.random() < self.failure_rate:
+            self.logger.debug(f"Simulating failure of {name}")
+            # The radio rejects the command with an error code, like meshcore's ERR reply
+            reply = Event(EventType.ERROR, {"error_code": 1, "error": f"Simulated {name} failure"})
+        elif on_success is not None:
+            on_success()
+        reply_types = {reply.type, EventType.ERROR}
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def on_event(event):
+            if event.type in reply_types and not future.done():
+                future.set_result(event)
+
+        subscription = self.dispatcher.subscribe(None, on_event)
+        try:
+            if self.is_connected and self.rng.random() >= self.drop_rate:
+                delay = self.latency + self.rng.uniform(0, self.jitter)
+                loop.call_later(delay, lambda: asyncio.ensure_future(self.dispatcher.dispatch(reply)))
+            else:
+                self.logger.debug(f"Simulating a dropped reply to {name}")
+            return await asyncio.wait_for(future, timeout=self.command_timeout)
+        except asyncio.TimeoutError:
+            # What meshcore returns when a command gets no reply
+            return Event(EventType.ERROR, {"reason": "no_event_received"})
+        finally:
+            subscription.unsubscribe()
+
+
+class FakeRadio(BaseRadio):
+    """A BaseRadio backed by a FakeMeshCore. The first `connect_failures` connection attempts fail."""
+
+    def __init__(self, meshcore: FakeMeshCore | None = None, connect_latency: float = 0.0, connect_failures: int = 0, debug_mode: bool = False):
+        self.fake_meshcore = meshcore or FakeMeshCore(debug_mode=debug_mode)
+        self.connect_latency = connect_latency
+        self.connect_failures = connect_failures
+        self.meshcore: FakeMeshCore | None = None
+        self.logger = get_logger(__name__, debug_mode=debug_mode)
+
+    async def connect(self) -> tuple[bool, str | None]:
+        await asyncio.sleep(self.connect_latency)
+        if self.connect_failures > 0:
+            self.connect_failures -= 1
+            return False, "Simulated connection failure"
+        await self.fake_meshcore.connect()
+        self.meshcore = self.fake_meshcore
+        return True, None
+
+    async def disconnect(self) -> None:
+        if self.meshcore:
+            await self.meshcore.disconnect()
+            self.meshcore = None
+
+    async def get_meshcore(self) -> FakeMeshCore | None:
+        return self.meshcore
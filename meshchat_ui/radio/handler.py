@@ -2,9 +2,13 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from meshcore import MeshCore, EventType
 from meshchat_ui.logger import get_logger
+from meshchat_ui.records import MessageRecord, KIND_DM, KIND_CHANNEL
+from meshchat_ui.radio.event_queue import EventQueue
+from meshchat_ui.radio.json_log import JsonLogWriter
+import logging
 import re
-import json
 import os
+import time
 
 if TYPE_CHECKING:
     from meshchat_ui.tui.app import MeshChatApp
@@ -17,37 +21,51 @@ class RadioHandler:
         self.app = app
         self.subscriptions = []
         self._is_listening = False
+        # perf_counter() time the first message was handed to the app, for startup timing
+        self.first_message_at: float | None = None
         self.debug_mode = debug_mode
         self.json_log_path = os.path.join(os.getcwd(), "radio_messages.json") # Log file in current working directory
         self.logger = get_logger(__name__, debug_mode=self.debug_mode)
-
-    def _log_json_message(self, event_payload):
-        """Logs the event payload to a JSON file."""
-        if not self.debug_mode:
-            return
-        
-        # Ensure the payload is serializable
-        serializable_payload = {}
-        for key, value in event_payload.items():
-            try:
-                json.dumps(value) # Try to serialize to catch non-serializable types
-                serializable_payload[key] = value
-            except TypeError:
-                serializable_payload[key] = str(value) # Convert non-serializable to string
-
-        try:
-            with open(self.json_log_path, "a") as f:
-                json.dump(serializable_payload, f)
-                f.write("\n") # Add a newline for each entry
-            self.logger.debug(f"Logged radio message to {self.json_log_path}")
-        except IOError as e:
-            self.logger.error(f"Error writing to JSON log file {self.json_log_path}: {e}")
+        self.event_queue = EventQueue(self.process_event, debug_mode=self.debug_mode)
+        self.json_log = JsonLogWriter(self.json_log_path, debug_mode=self.debug_mode) if self.debug_mode else None
+
+    @property
+    def is_listening(self) -> bool:
+        return self._is_listening
+
+    def _log_event(self, event):
+        """Records an event in the debug JSON log, in the format read back by `meshchat_ui.radio.replay`."""
+        if self.json_log is not None:
+            self.json_log.write({
+                "received_at": time.time(),
+                "type": event.type.value,
+                "attributes": event.attributes,
+                "payload": event.payload, # The raw payload
+            })
 
     def message_callback(self, event):
+        """Callback for message events. Logs the raw payload and queues the event for the app."""
+        self._log_event(event)
+        self.event_queue.put(event)
+
+    def contacts_callback(self, event):
+        """Callback for contacts events. Logs the raw payload and queues the event for the app."""
+        self._log_event(event)
+        self.event_queue.put(event)
+
+    def process_event(self, event):
+        """Handles an event taken off the event queue."""
+        if event.type == EventType.CONTACTS:
+            self.process_contacts_event(event)
+        else:
+            self.process_message_event(event)
+
+    def process_message_event(self, event):
         try:
-            self._log_json_message(event.payload) # Log the raw payload
-            
-            self.logger.debug(f"Message event payload: {event.payload}")
+            # Checked once per message; debug output below is only built when enabled
+            debug = self.logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                self.logger.debug("Message event payload: %s", event.payload)
             message_text = event.payload.get("text", "")
             # Preserve original message text for potential sender name extraction
             original_message_text = message_text
@@ -59,34 +77,34 @@ class RadioHandler:
             channel_id = event.payload.get("channel_idx")
             timestamp = event.payload.get("sender_timestamp")
 
-            from datetime import datetime
-            local_time = datetime.fromtimestamp(timestamp).strftime("%d;%m %H:%M") if timestamp else "No timestamp"
-
-            self.logger.debug(f"full_sender_pubkey: {full_sender_pubkey}")
-            self.logger.debug(f"sender_name_from_payload: {sender_name_from_payload}")
-            self.logger.debug(f"sender_pubkey_prefix: {sender_pubkey_prefix}")
-            self.logger.debug(f"App contacts: {self.app.contacts}")
+            if debug:
+                self.logger.debug(
+                    "full_sender_pubkey: %s, sender_name_from_payload: %s, sender_pubkey_prefix: %s, known contacts: %d",
+                    full_sender_pubkey, sender_name_from_payload, sender_pubkey_prefix, len(self.app.contact_index),
+                )
 
             # 1. Try to find the sender in our contacts list
             determined_sender_name = None
             is_known_contact = False
 
+            contact_index = self.app.contact_index
             if full_sender_pubkey:
-                for contact in self.app.contacts:
-                    if contact["public_key"] == full_sender_pubkey:
-                        determined_sender_name = contact["name"]
-                        is_known_contact = True
-                        break
+                contact = contact_index.get(full_sender_pubkey)
+                if contact:
+                    determined_sender_name = contact["name"]
+                    is_known_contact = True
             
             # If not found by full public key, try by pubkey_prefix (if available)
             if not is_known_contact and sender_pubkey_prefix:
-                 for contact in self.app.contacts:
-                    if contact["public_key"].startswith(sender_pubkey_prefix):
-                        determined_sender_name = contact["name"]
-                        is_known_contact = True # Set flag here
-                        break
+                matches = contact_index.match_prefix(sender_pubkey_prefix)
+                if len(matches) == 1:
+                    determined_sender_name = matches[0]["name"]
+                    is_known_contact = True # Set flag here
+                elif matches and debug:
+                    self.logger.debug("Ambiguous pubkey_prefix %s, matches: %s", sender_pubkey_prefix, [c["name"] for c in matches])
 
-            self.logger.debug(f"Determined sender name (from contact list): {determined_sender_name}, Is known contact: {is_known_contact}")
+            if debug:
+                self.logger.debug("Determined sender name (from contact list): %s, Is known contact: %s", determined_sender_name, is_known_contact)
 
             # 2. If still no name from contacts, try to extract from message text for channel messages
             #    This is only for Channel messages where sender_pubkey_prefix/full_sender_pubkey is None
@@ -95,19 +113,19 @@ class RadioHandler:
                 if match:
                     extracted_name_from_text = match.group(1).strip()
                     # Check if the extracted name is in contacts by name (less reliable but possible)
-                    for contact in self.app.contacts:
-                        if contact["name"] == extracted_name_from_text:
-                            determined_sender_name = contact["name"]
-                            is_known_contact = True # Set flag here
-                            # Remove the name part from message_text to avoid redundancy in output
-                            message_text = original_message_text[len(match.group(0)):].strip()
-                            break
+                    contact = contact_index.get_by_name(extracted_name_from_text)
+                    if contact:
+                        determined_sender_name = contact["name"]
+                        is_known_contact = True # Set flag here
+                        # Remove the name part from message_text to avoid redundancy in output
+                        message_text = original_message_text[len(match.group(0)):].strip()
                     # If it's not a known contact, but we extracted a name, use it for display
                     if determined_sender_name is None:
                          determined_sender_name = extracted_name_from_text
                          message_text = original_message_text[len(match.group(0)):].strip()
 
-            self.logger.debug(f"Determined sender name (after text extraction): {determined_sender_name}")
+            if debug:
+                self.logger.debug("Determined sender name (after text extraction): %s", determined_sender_name)
 
             # 3. Fallback to sender_name_from_payload if still no name (might contain full name)
             if determined_sender_name is None and sender_name_from_payload:
@@ -121,36 +139,39 @@ class RadioHandler:
             if determined_sender_name is None:
                 determined_sender_name = "Unknown"
 
-            self.logger.debug(f"Final determined sender name: {determined_sender_name}")
-
-            # Construct the output string based on message type and sender info
-            output_string = ""
-
-            if event.type == EventType.CONTACT_MSG_RECV: # Direct Message
-                channel_display_part = "[DM]"
-                output_string = f"{local_time} {channel_display_part} {determined_sender_name}: {message_text}"
-
-            else: # Channel Message (EventType.CHANNEL_MSG_RECV)
-                channels_by_id = {v: k for k, v in self.app.channels.items()}
-                channel_name = channels_by_id.get(channel_id, f"Channel {channel_id}")
-                channel_display_part = f"[{channel_name}]"
-
-                if is_known_contact: # Sender is a known contact
-                    output_string = f"{local_time} {channel_display_part} {determined_sender_name}: {message_text}"
-                else: # Sender is not a known contact
-                    output_string = f"{local_time} {channel_display_part} Unknown Sender: {determined_sender_name}: {message_text}"
-
-            self.app.add_message(output_string)
+            if debug:
+                self.logger.debug("Final determined sender name: %s", determined_sender_name)
+
+            record = MessageRecord(
+                KIND_DM if event.type == EventType.CONTACT_MSG_RECV else KIND_CHANNEL,
+                text=message_text,
+                sender=determined_sender_name,
+                pubkey=full_sender_pubkey or sender_pubkey_prefix,
+                channel_idx=channel_id,
+                sender_timestamp=timestamp,
+                known_sender=is_known_contact,
+                raw=event.payload,
+            )
+            self.app.message_store.add(record)
+            self.app.add_message_record(record)
+            if self.first_message_at is None:
+                self.first_message_at = time.perf_counter()
 
         except Exception as e:
-            self.logger.error("Error in message_callback", exc_info=True)
+            self.logger.error("Error processing message event", exc_info=True)
 
-    def contacts_callback(self, event):
-        """Callback for handling contacts events."""
+    def process_contacts_event(self, event):
         try:
-            self.app.update_contacts(event.payload)
+            connector = self.app.radio_connector
+            complete = connector.contacts_requested_since == 0
+            contacts = connector.merge_contact_entries(event.payload, event.attributes.get("lastmod"), complete)
+            # Nothing changed since the last sync and the app already shows this table, as after a reconnect
+            shown = self.app.contacts
+            if not event.payload and len(shown) == len(contacts) and all(c["public_key"] in connector.contact_table for c in shown):
+                return
+            self.app.update_contacts(contacts)
         except Exception as e:
-            self.logger.error("Error in contacts_callback", exc_info=True)
+            self.logger.error("Error processing contacts event", exc_info=True)
 
     async def start_listening(self):
         """Subscribes to message events and starts auto message fetching."""
@@ -158,6 +179,7 @@ class RadioHandler:
             return
 
         self._is_listening = True
+        self.event_queue.start()
         private_subscription = self.meshcore.subscribe(
             EventType.CONTACT_MSG_RECV, self.message_callback
         )
@@ -184,3 +206,10 @@ class RadioHandler:
             self.meshcore.unsubscribe(subscription)
         self.subscriptions = []
         await self.meshcore.stop_auto_message_fetching()
+        await self.event_queue.stop()
+        self.close_json_log()
+
+    def close_json_log(self) -> None:
+        """Flushes the debug JSON log to disk."""
+        if self.json_log is not None:
+            self.json_log.close()
@@ -0,0 +1,253 @@
+from __future__ import annotations
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from typing import Iterator
+
+from meshchat_ui.config import RADIO_JSON_LOG_FLUSH_BYTES, RADIO_JSON_LOG_FLUSH_INTERVAL, RADIO_JSON_LOG_SEGMENT_BYTES, RADIO_JSON_LOG_ROTATE_DAILY
+from meshchat_ui.logger import get_logger
+
+_CLOSE = object()
+
+
+def index_path_for(path: str) -> str:
+    """Returns the index file kept next to the segments of the log at `path`."""
+    stem, _ = os.path.splitext(path)
+    return f"{stem}.index.json"
+
+
+def load_index(path: str) -> list[dict]:
+    """Loads the segment index of the log at `path`, oldest segment first."""
+    try:
+        with open(index_path_for(path), "r") as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return []
+
+
+def find_segments(path: str, start: float | None = None, end: float | None = None) -> list[str]:
+    """Returns the segment files of the log at `path` holding entries logged between `start` and `end`."""
+    directory = os.path.dirname(path)
+    return [
+        os.path.join(directory, segment["file"])
+        for segment in load_index(path)
+        if (start is None or segment["end"] >= start) and (end is None or segment["start"] <= end)
+    ]
+
+
+def read_segment(segment_path: str) -> Iterator[dict]:
+    """Yields the payloads stored in a segment, compressed or not."""
+    opener = gzip.open if segment_path.endswith(".gz") else open
+    with opener(segment_path, "rt") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+class JsonLogWriter:
+    """
+    Appends payloads to a segmented JSON lines log from a background thread.
+    `write` only hands the payload to the thread, which serializes it once
+    (non-serializable values fall back to `str`, and a payload that still cannot
+    be serialized is logged and dropped) and keeps the file open,
+    flushing when the buffer reaches `flush_bytes` or `flush_interval` seconds
+    after the first buffered line. `close` flushes whatever is left.
+    A new segment is started when the current one would grow past
+    `segment_bytes` or, with `rotate_daily`, when the local date changes.
+    Closed segments are gzipped in their own thread, and an index file next to
+    them records the time range of each segment.
+    """
+
+    def __init__(self, path: str, flush_bytes: int = RADIO_JSON_LOG_FLUSH_BYTES, flush_interval: float = RADIO_JSON_LOG_FLUSH_INTERVAL, segment_bytes: int = RADIO_JSON_LOG_SEGMENT_BYTES, rotate_daily: bool = RADIO_JSON_LOG_ROTATE_DAILY, debug_mode: bool = False):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.rotate_daily = rotate_daily
+        self.logger = get_logger(__name__, debug_mode=debug_mode)
+        self._directory = os.path.dirname(path)
+        self._stem, self._suffix = os.path.splitext(os.path.basename(path))
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._index: list[dict] = []
+        self._segment: dict | None = None
+        self._file = None
+        self._compressors: list[threading.Thread] = []
+        self.written_count = 0
+        self.flush_count = 0
+        self.dropped_count = 0
+
+    def write(self, payload) -> None:
+        """Queues a payload to be written. Never blocks on disk."""
+        if self._thread is None:
+            self.start()
+        self._queue.put((time.time(), payload))
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="radio-json-log", daemon=True)
+                self._thread.start()
+
+    def close(self) -> None:
+        """Writes any buffered payloads and stops the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_CLOSE)
+            thread.join()
+        for compressor in self._compressors:
+            compressor.join()
+        self._compressors = []
+
+    def _run(self) -> None:
+        self._open_index()
+        buffer: list[tuple[float, str]] = []
+        buffered_bytes = 0
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _CLOSE:
+                    break
+                if item is not None:
+                    logged_at, payload = item
+                    try:
+                        line = json.dumps(payload, default=str) + "\n"
+                    except (TypeError, ValueError, RecursionError) as e:
+                        # e.g. bytes or tuple dict keys, or a circular reference
+                        self.dropped_count += 1
+                        self.logger.error(f"Dropping a payload that cannot be written to {self.path}: {e}")
+                        continue
+                    buffer.append((logged_at, line))
+                    buffered_bytes += len(line)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                if buffer and (buffered_bytes >= self.flush_bytes or time.monotonic() >= deadline):
+                    self._flush(buffer)
+                    buffer = []
+                    buffered_bytes = 0
+                    deadline = None
+        finally:
+            if buffer:
+                self._flush(buffer)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _flush(self, buffer: list[tuple[float, str]]) -> None:
+        chunk: list[str] = []
+        with self._index_lock:
+            try:
+                for logged_at, line in buffer:
+                    if self._segment is None or self._should_rotate(logged_at, len(line)):
+                        self._write_chunk(chunk)
+                        chunk = []
+                        self._rotate(logged_at)
+                    chunk.append(line)
+                    self._segment["end"] = logged_at
+                    self._segment["count"] += 1
+                    self._segment["bytes"] += len(line)
+                self._write_chunk(chunk)
+            except IOError as e:
+                self.logger.error(f"Error writing to JSON log file {self.path}: {e}")
+                return
+            finally:
+                self._save_index()
+        self.written_count += len(buffer)
+        self.flush_count += 1
+
+    def _write_chunk(self, lines: list[str]) -> None:
+        if lines:
+            self._file.write("".join(lines))
+            self._file.flush()
+
+    def _should_rotate(self, logged_at: float, line_bytes: int) -> bool:
+        segment = self._segment
+        if segment["bytes"] and segment["bytes"] + line_bytes > self.segment_bytes:
+            return True
+        return self.rotate_daily and time.localtime(logged_at)[:3] != time.localtime(segment["start"])[:3]
+
+    def _rotate(self, logged_at: float) -> None:
+        """Closes the current segment, queues it for compression and opens a new one."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._segment is not None:
+            self._segment["closed"] = True
+            self._compress_later(self._segment)
+            self._segment = None
+
+        name = f"{self._stem}-{time.strftime('%Y%m%dT%H%M%S', time.localtime(logged_at))}"
+        file_name = f"{name}{self._suffix}"
+        suffix = 1
+        while os.path.exists(os.path.join(self._directory, file_name)) or os.path.exists(os.path.join(self._directory, file_name + ".gz")):
+            file_name = f"{name}-{suffix}{self._suffix}"
+            suffix += 1
+        self._file = open(os.path.join(self._directory, file_name), "a")
+        self._segment = {"file": file_name, "start": logged_at, "end": logged_at, "count": 0, "bytes": 0, "closed": False}
+        self._index.append(self._segment)
+
+    def _open_index(self) -> None:
+        """Loads the index, resuming the open segment and compressing any closed segment left uncompressed."""
+        with self._index_lock:
+            self._index = [
+                segment for segment in load_index(self.path)
+                if os.path.exists(os.path.join(self._directory, segment["file"]))
+            ]
+            for segment in self._index[:-1]:
+                segment["closed"] = True
+            if self._index and not self._index[-1]["closed"]:
+                self._segment = self._index[-1]
+                try:
+                    self._file = open(os.path.join(self._directory, self._segment["file"]), "a")
+                except IOError as e:
+                    self.logger.error(f"Error opening JSON log file {self._segment['file']}: {e}")
+                    self._segment["closed"] = True
+                    self._segment = None
+            for segment in self._index:
+                if segment["closed"] and not segment["file"].endswith(".gz"):
+                    self._compress_later(segment)
+
+    def _compress_later(self, segment: dict) -> None:
+        compressor = threading.Thread(target=self._compress, args=(segment,), name="radio-json-log-compress", daemon=True)
+        self._compressors = [thread for thread in self._compressors if thread.is_alive()]
+        self._compressors.append(compressor)
+        compressor.start()
+
+    def _compress(self, segment: dict) -> None:
+        source = os.path.join(self._directory, segment["file"])
+        target = f"{source}.gz"
+        try:
+            with open(source, "rb") as f_in, gzip.open(target, "wb") as f_out:
+                while chunk := f_in.read(1 << 20):
+                    f_out.write(chunk)
+        except IOError as e:
+            self.logger.error(f"Error compressing JSON log segment {source}: {e}")
+            return
+        with self._index_lock:
+            segment["file"] = os.path.basename(target)
+            self._save_index()
+        try:
+            os.remove(source)
+        except OSError:
+            pass
+        self.logger.debug(f"Compressed JSON log segment {target}")
+
+    def _save_index(self) -> None:
+        """Writes the index through a temporary file so readers never see a partial one."""
+        index_path = index_path_for(self.path)
+        try:
+            with open(f"{index_path}.tmp", "w") as f:
+                json.dump(self._index, f)
+            os.replace(f"{index_path}.tmp", index_path)
+        except IOError as e:
+            self.logger.error(f"Error writing JSON log index {index_path}: {e}")
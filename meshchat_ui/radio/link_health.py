@@ -0,0 +1,73 @@
+from collections import deque
+
+from meshchat_ui.config import LINK_LATENCY_WINDOW, LINK_LATENCY_RECENT, LINK_LATENCY_WARNING, LINK_LATENCY_WARNING_FACTOR
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"))
+
+
+def percentile(samples, p: float) -> float | None:
+    """Nearest-rank percentile `p` (0-100) of `samples`, or None when there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class LinkHealth:
+    """
+    Rolling window of command round-trip times to the radio. The link counts as
+    degraded when the median of the last LINK_LATENCY_RECENT round trips is over
+    both LINK_LATENCY_WARNING and LINK_LATENCY_WARNING_FACTOR times the usual
+    round trip, taken as the lower quartile of the window.
+    """
+
+    def __init__(self, window: int = LINK_LATENCY_WINDOW):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.degraded = False
+
+    def record(self, rtt: float) -> bool:
+        """Adds a round trip in seconds. Returns True when this changed whether the link is degraded."""
+        self.samples.append(rtt)
+        if len(self.samples) < 2 * LINK_LATENCY_RECENT:
+            return False
+        degraded = self.recent() > self.threshold()
+        changed = degraded != self.degraded
+        self.degraded = degraded
+        return changed
+
+    def percentile(self, p: float) -> float | None:
+        return percentile(self.samples, p)
+
+    def recent(self) -> float | None:
+        """Median of the last LINK_LATENCY_RECENT round trips."""
+        if not self.samples:
+            return None
+        last = sorted(list(self.samples)[-LINK_LATENCY_RECENT:])
+        return last[len(last) // 2]
+
+    def threshold(self) -> float:
+        """Recent median above which the link counts as degraded."""
+        return max(LINK_LATENCY_WARNING, LINK_LATENCY_WARNING_FACTOR * (self.percentile(25) or 0.0))
+
+    def histogram(self) -> list[tuple[float, int]]:
+        """(bucket upper bound in seconds, round trips in the bucket) for the window."""
+        counts = [0] * len(LATENCY_BUCKETS)
+        for rtt in self.samples:
+            counts[next(i for i, bound in enumerate(LATENCY_BUCKETS) if rtt <= bound)] += 1
+        return list(zip(LATENCY_BUCKETS, counts))
+
+    def summary(self) -> str:
+        if not self.samples:
+            return "No round trips measured yet."
+        buckets = ", ".join(f"{_bucket_label(bound)}: {count}" for bound, count in self.histogram() if count)
+        return (
+            f"Round trip over the last {len(self.samples)} commands: median {self.percentile(50) * 1000:.0f} ms, "
+            f"p95 {self.percentile(95) * 1000:.0f} ms ({buckets})"
+        )
+
+
+def _bucket_label(bound: float) -> str:
+    if bound == float("inf"):
+        return f">{LATENCY_BUCKETS[-2] * 1000:.0f} ms"
+    return f"<={bound * 1000:.0f} ms"
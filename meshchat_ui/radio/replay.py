@@ -0,0 +1,132 @@
+"""
+Replays a recorded radio_messages.json log through RadioHandler without a radio.
+
+    python -m meshchat_ui.radio.replay radio_messages.json [--speed 10 | --fast]
+
+The events are dispatched by a FakeMeshCore to the handler's subscribed
+callbacks, so they take the same path as live traffic: event queue, message
+store and the app's message log, running headless.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING
+
+from meshcore import EventType
+from meshcore.events import Event
+
+from meshchat_ui.radio.fake import FakeMeshCore
+from meshchat_ui.radio.json_log import find_segments, index_path_for, read_segment
+
+if TYPE_CHECKING:
+    from meshchat_ui.radio.handler import RadioHandler
+
+# Message payloads logged before events were recorded with their type
+_LEGACY_MESSAGE_TYPES = {
+    "CHAN": EventType.CHANNEL_MSG_RECV,
+    "PRIV": EventType.CONTACT_MSG_RECV,
+}
+
+
+def load_recording(path: str) -> list[tuple[float | None, Event]]:
+    """
+    Loads the events of a recording as (received at, event) pairs.
+    `path` is either the log path given to JsonLogWriter, whose segments are
+    found through its index, or a single segment file.
+    Entries logged as bare payloads have no receive time.
+    """
+    if os.path.exists(index_path_for(path)):
+        segments = find_segments(path)
+    else:
+        segments = [path]
+
+    events = []
+    for segment in segments:
+        for entry in read_segment(segment):
+            if "type" in entry and "payload" in entry:
+                event = Event(EventType(entry["type"]), entry["payload"], entry.get("attributes") or {})
+                events.append((entry.get("received_at"), event))
+            else:
+                event_type = _LEGACY_MESSAGE_TYPES.get(entry.get("type"))
+                if event_type is None:
+                    event_type = EventType.CHANNEL_MSG_RECV if "channel_idx" in entry else EventType.CONTACT_MSG_RECV
+                events.append((None, Event(event_type, entry)))
+    return events
+
+
+async def replay(meshcore: FakeMeshCore, events: list[tuple[float | None, Event]], speed: float | None = 1.0) -> dict:
+    """
+    Dispatches recorded events. With a `speed` the gaps between receive times
+    are kept, divided by `speed`; with None the events are sent as fast as
+    possible. Returns the number of events and the time taken to send them.
+    """
+    start = time.perf_counter()
+    first_received = None
+    for received_at, event in events:
+        if speed and received_at is not None:
+            if first_received is None:
+                first_received = received_at
+            delay = start + (received_at - first_received) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await meshcore.dispatch(event)
+    return {"events": len(events), "elapsed": time.perf_counter() - start}
+
+
+async def drain(meshcore: FakeMeshCore, handler: RadioHandler) -> None:
+    """Waits until every dispatched event has been handled by the app."""
+    await meshcore.dispatcher.queue.join()
+    await asyncio.sleep(0)  # Let the subscription callbacks run
+    await handler.event_queue.join()
+
+
+async def replay_into_app(path: str, speed: float | None, message_db_path: str = ":memory:") -> dict:
+    """
+    Replays a recording into a headless MeshChatApp and returns receive path
+    statistics; "drained" is the time until every event was handled.
+    """
+    from meshchat_ui.radio.handler import RadioHandler
+    from meshchat_ui.tui.app import MeshChatApp
+
+    events = load_recording(path)
+    app = MeshChatApp(message_db_path=message_db_path)
+    async with app.run_test(size=(120, 40)) as pilot:
+        app.pop_screen()  # Skip the connection screen
+        meshcore = FakeMeshCore()
+        await meshcore.connect()
+        handler = RadioHandler(meshcore, app)
+        await handler.start_listening()
+        start = time.perf_counter()
+        stats = await replay(meshcore, events, speed)
+        await drain(meshcore, handler)
+        stats["drained"] = time.perf_counter() - start
+        app.flush_pending_messages()
+        await pilot.pause()
+        await handler.stop_listening()
+        await meshcore.disconnect()
+        stats.update({
+            "queue_high_water_mark": handler.event_queue.high_water_mark,
+            "queue_dropped": handler.event_queue.dropped_count,
+            "log_updates": app.message_flush_count,
+            "messages_coalesced": app.messages_coalesced,
+        })
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded radio_messages.json log without a radio.")
+    parser.add_argument("path", help="Log path (radio_messages.json) or a single segment file.")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--speed", type=float, default=1.0, help="Pacing multiplier, 1 replays in real time.")
+    pacing.add_argument("--fast", action="store_true", help="Send events as fast as possible.")
+    args = parser.parse_args()
+
+    stats = asyncio.run(replay_into_app(args.path, None if args.fast else args.speed))
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
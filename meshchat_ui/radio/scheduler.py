@@ -0,0 +1,171 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from meshchat_ui.config import RADIO_COMMAND_MAX_IN_FLIGHT, RADIO_COMMAND_TIMEOUT, RADIO_COMMAND_STATS_WINDOW
+from meshchat_ui.radio.link_health import percentile
+from meshchat_ui.logger import get_logger
+
+# Priority classes, most urgent first
+PRIORITY_INTERACTIVE = 0  # Messages and adverts sent by the user
+PRIORITY_ACK = 1  # Writes and heartbeats waiting on an acknowledgement from the radio
+PRIORITY_BACKGROUND = 2  # Contact and channel syncs
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_ACK: "ack", PRIORITY_BACKGROUND: "background"}
+
+
+class CommandCancelled(Exception):
+    """Raised to a caller whose queued command was cancelled before it ran."""
+
+
+class CommandStats:
+    """Queue wait and service time of the recent commands in one priority class."""
+
+    def __init__(self, window: int = RADIO_COMMAND_STATS_WINDOW):
+        self.count = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.queue_wait: deque[float] = deque(maxlen=window)
+        self.service_time: deque[float] = deque(maxlen=window)
+
+    def summary(self) -> str:
+        if not self.count:
+            return "no commands"
+        return (
+            f"{self.count} commands ({self.failed} failed, {self.timed_out} timed out, {self.cancelled} cancelled), "
+            f"wait p50 {percentile(self.queue_wait, 50) * 1000:.0f} ms / p95 {percentile(self.queue_wait, 95) * 1000:.0f} ms, "
+            f"service p50 {percentile(self.service_time, 50) * 1000:.0f} ms / p95 {percentile(self.service_time, 95) * 1000:.0f} ms"
+        )
+
+
+class _Ticket:
+    def __init__(self, priority: int, seq: int, shared: bool, ready: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.shared = shared
+        self.ready = ready
+
+    def __lt__(self, other: _Ticket) -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class CommandScheduler:
+    """
+    The single way commands reach the radio. meshcore matches a reply to a
+    command by its event type, so two commands in flight that expect the same
+    reply can take each other's. Commands therefore run one at a time, except
+    `shared` ones, whose callers match replies themselves, which run alongside
+    each other up to `max_in_flight`. Queued commands start in priority order,
+    then first come first served, and the head of the queue is never skipped,
+    so a background scan cannot starve a waiting send. Each command has a
+    timeout on its service time, and a command is cancelled along with the
+    task awaiting it. `on_complete(name, priority, outcome, service_time)` is
+    called for each command that ran, with its result or the exception it raised.
+    """
+
+    def __init__(self, max_in_flight: int = RADIO_COMMAND_MAX_IN_FLIGHT, on_complete: Callable[[str, int, Any, float], None] | None = None, debug_mode: bool = False):
+        self.max_in_flight = max_in_flight
+        self.on_complete = on_complete
+        self.logger = get_logger(__name__, debug_mode=debug_mode)
+        self.stats: dict[int, CommandStats] = {priority: CommandStats() for priority in PRIORITY_NAMES}
+        self._queue: list[_Ticket] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._exclusive_running = False
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for ticket in self._queue if not ticket.ready.done())
+
+    async def run(self, name: str, command: Callable[[], Awaitable[Any]], priority: int = PRIORITY_BACKGROUND, timeout: float | None = RADIO_COMMAND_TIMEOUT, shared: bool = False) -> Any:
+        """
+        Queues `command` and returns its result once it has run. Raises
+        asyncio.TimeoutError when it runs for longer than `timeout` seconds, and
+        CommandCancelled when it is dropped from the queue by `cancel_pending`.
+        """
+        stats = self.stats[priority]
+        ticket = _Ticket(priority, next(self._seq), shared, asyncio.get_running_loop().create_future())
+        queued_at = time.perf_counter()
+        heapq.heappush(self._queue, ticket)
+        self._dispatch()
+        try:
+            await ticket.ready
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            if ticket.ready.done() and not ticket.ready.cancelled():
+                self._release(ticket)  # Cancelled just after being given a slot
+            raise
+        except CommandCancelled:
+            stats.cancelled += 1
+            raise
+
+        started = time.perf_counter()
+        stats.count += 1
+        stats.queue_wait.append(started - queued_at)
+        outcome = None
+        report = True
+        try:
+            outcome = await asyncio.wait_for(command(), timeout)
+            return outcome
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            report = False
+            raise
+        except asyncio.TimeoutError as e:
+            stats.timed_out += 1
+            outcome = e
+            self.logger.warning(f"Radio command {name} timed out after {timeout:g} s")
+            raise
+        except Exception as e:
+            stats.failed += 1
+            outcome = e
+            raise
+        finally:
+            service_time = time.perf_counter() - started
+            stats.service_time.append(service_time)
+            self._release(ticket)
+            if report and self.on_complete is not None:
+                self.on_complete(name, priority, outcome, service_time)
+
+    def cancel_pending(self, reason: str = "radio disconnected") -> int:
+        """Fails every queued command that has not started with CommandCancelled. Returns how many were dropped."""
+        dropped = 0
+        for ticket in self._queue:
+            if not ticket.ready.done():
+                ticket.ready.set_exception(CommandCancelled(reason))
+                dropped += 1
+        self._queue = []
+        return dropped
+
+    def summary(self) -> str:
+        return "; ".join(f"{PRIORITY_NAMES[priority]}: {stats.summary()}" for priority, stats in self.stats.items())
+
+    def _dispatch(self) -> None:
+        while self._queue:
+            ticket = self._queue[0]
+            if ticket.ready.done():  # Cancelled while queued
+                heapq.heappop(self._queue)
+                continue
+            if ticket.shared:
+                if self._exclusive_running or self._in_flight >= self.max_in_flight:
+                    return
+            elif self._in_flight:
+                return
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            self._exclusive_running = not ticket.shared
+            ticket.ready.set_result(None)
+
+    def _release(self, ticket: _Ticket) -> None:
+        self._in_flight -= 1
+        if not ticket.shared:
+            self._exclusive_running = False
+        self._dispatch()
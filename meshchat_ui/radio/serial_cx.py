@@ -0,0 +1,16 @@
+from meshcore.serial_cx import SerialConnection
+
+
+class ModemlessSerialConnection(SerialConnection):
+    """
+    meshcore's SerialConnection for ports without modem control lines, such as
+    pseudo-terminals, where clearing RTS on connect fails.
+    """
+
+    class MCSerialClientProtocol(SerialConnection.MCSerialClientProtocol):
+        def connection_made(self, transport):
+            try:
+                super().connection_made(transport)
+            except OSError:
+                self.cx.transport = transport
+                self.cx._connected_event.set()
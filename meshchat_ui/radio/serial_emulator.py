@@ -0,0 +1,310 @@
+"""
+A MeshCore companion radio emulated on a pseudo-terminal, for end-to-end load
+tests of the serial path without hardware (Linux and macOS).
+
+    python -m meshchat_ui.radio.serial_emulator --rate 200
+
+prints the pty path to enter as the serial port on the connection screen.
+It answers the app start, device query, contacts, channel and send commands,
+and generates channel messages at `--rate` per second, either pushed to the
+host as message frames or, with `--waiting`, queued behind MESSAGES_WAITING
+notifications for the host to fetch one at a time. `--latency` makes the
+radio spend that long on each command, to mimic a slower radio or link.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import time
+import tty
+from collections import Counter, deque
+
+from meshcore.packets import PacketType
+
+from meshchat_ui.config import BLE_MAX_CHANNEL_ATTEMPTS
+from meshchat_ui.logger import get_logger
+
+# Commands sent by the host, see meshcore.commands
+CMD_APP_START = 0x01
+CMD_SEND_TXT_MSG = 0x02
+CMD_SEND_CHANNEL_TXT_MSG = 0x03
+CMD_GET_CONTACTS = 0x04
+CMD_GET_DEVICE_TIME = 0x05
+CMD_SEND_SELF_ADVERT = 0x07
+CMD_SYNC_NEXT_MESSAGE = 0x0A
+CMD_GET_BATTERY = 0x14
+CMD_DEVICE_QUERY = 0x16
+CMD_GET_CHANNEL = 0x1F
+CMD_SET_CHANNEL = 0x20
+
+ERR_UNSUPPORTED_CMD = 1
+ERR_NOT_FOUND = 2
+
+FRAME_TO_RADIO = 0x3C  # "<"
+FRAME_FROM_RADIO = 0x3E  # ">"
+
+
+def _fixed(text: str, size: int) -> bytes:
+    return text.encode("utf-8")[:size].ljust(size, b"\x00")
+
+
+class SerialRadioEmulator:
+    """Serves the MeshCore companion serial protocol on the master side of a pty."""
+
+    def __init__(self, channels: dict[int, str] | None = None, contacts: dict[str, dict] | None = None, name: str = "emulated radio", public_key: str = "e0" * 32, message_rate: float = 0.0, push_messages: bool = True, message_channel: int = 0, max_channels: int = BLE_MAX_CHANNEL_ATTEMPTS, command_latency: float = 0.0, debug_mode: bool = False):
+        self.channel_slots: dict[int, str] = {idx: "" for idx in range(max_channels)}
+        self.channel_slots.update(channels or {})
+        self.channel_keys: dict[int, bytes] = {}
+        # Public key -> contact entry (adv_name, type, lastmod)
+        self.contacts: dict[str, dict] = {key: dict(entry) for key, entry in (contacts or {}).items()}
+        self.name = name
+        self.public_key = public_key
+        self.message_rate = message_rate
+        self.push_messages = push_messages
+        self.message_channel = message_channel
+        # Seconds the radio spends on each command; commands are handled one at a time, like on the device
+        self.command_latency = command_latency
+        self._busy_until = 0.0
+        self.logger = get_logger(__name__, debug_mode=debug_mode)
+        self.port: str | None = None
+        self._master_fd: int | None = None
+        self._slave_fd: int | None = None
+        self._in = bytearray()
+        self._out = bytearray()
+        self._pending_messages: deque[bytes] = deque()
+        self._generator: asyncio.Task | None = None
+        self.command_counts: Counter[int] = Counter()
+        self.sent_messages: list[dict] = []
+        # Sequence number -> time.time() at which the generated message was sent or queued
+        self.message_times: dict[int, float] = {}
+        self.messages_generated = 0
+
+    def start(self) -> str:
+        """Opens the pty and starts serving. Returns the path for the host to open."""
+        loop = asyncio.get_running_loop()
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd)
+        os.set_blocking(self._master_fd, False)
+        self.port = os.ttyname(self._slave_fd)
+        loop.add_reader(self._master_fd, self._on_readable)
+        if self.message_rate > 0:
+            self.start_generating(self.message_rate)
+        self.logger.info(f"Serial radio emulator listening on {self.port}")
+        return self.port
+
+    async def stop(self) -> None:
+        await self.stop_generating()
+        if self._master_fd is not None:
+            loop = asyncio.get_running_loop()
+            loop.remove_reader(self._master_fd)
+            loop.remove_writer(self._master_fd)
+            os.close(self._master_fd)
+            os.close(self._slave_fd)
+            self._master_fd = self._slave_fd = None
+
+    def queue_channel_message(self, channel_idx: int, text: str, sender_timestamp: int | None = None) -> None:
+        """Delivers a channel message to the host, pushed or behind MESSAGES_WAITING."""
+        frame = (
+            bytes([PacketType.CHANNEL_MSG_RECV.value, channel_idx, 0, 0])
+            + int(sender_timestamp or time.time()).to_bytes(4, "little")
+            + text.encode("utf-8")
+        )
+        if self.push_messages:
+            self._send_frame(frame)
+        else:
+            if not self._pending_messages:
+                self._send_frame(bytes([PacketType.MESSAGES_WAITING.value]))
+            self._pending_messages.append(frame)
+
+    def start_generating(self, rate: float) -> None:
+        """Starts generating channel messages at `rate` per second."""
+        self.message_rate = rate
+        if self._generator is None:
+            self._generator = asyncio.create_task(self._generate_messages())
+
+    async def stop_generating(self) -> None:
+        if self._generator is not None:
+            self._generator.cancel()
+            try:
+                await self._generator
+            except asyncio.CancelledError:
+                pass
+            self._generator = None
+
+    async def _generate_messages(self) -> None:
+        """Generates channel messages from the contacts at `message_rate` per second."""
+        senders = [entry.get("adv_name", key[:12]) for key, entry in self.contacts.items()] or ["emulator"]
+        interval = 1 / self.message_rate
+        next_at = time.monotonic()
+        while True:
+            sequence = self.messages_generated
+            self.message_times[sequence] = time.time()
+            self.queue_channel_message(self.message_channel, f"{senders[sequence % len(senders)]}: message {sequence}")
+            self.messages_generated += 1
+            next_at += interval
+            delay = next_at - time.monotonic()
+            await asyncio.sleep(max(0.0, delay))
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._master_fd, 4096)
+        except OSError:  # Nothing to read, or the host closed the port
+            return
+        self._in += data
+        while len(self._in) >= 3:
+            if self._in[0] != FRAME_TO_RADIO:
+                del self._in[0]  # Resynchronize on the next frame start
+                continue
+            size = int.from_bytes(self._in[1:3], "little")
+            if len(self._in) < 3 + size:
+                break
+            frame = bytes(self._in[3:3 + size])
+            del self._in[:3 + size]
+            if frame and self.command_latency:
+                loop = asyncio.get_running_loop()
+                self._busy_until = max(self._busy_until, loop.time()) + self.command_latency
+                loop.call_at(self._busy_until, self._handle_command, frame)
+            elif frame:
+                self._handle_command(frame)
+
+    def _send_frame(self, frame: bytes) -> None:
+        self._out += bytes([FRAME_FROM_RADIO]) + len(frame).to_bytes(2, "little") + frame
+        self._write_out()
+
+    def _write_out(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            written = os.write(self._master_fd, self._out)
+        except BlockingIOError:
+            written = 0
+        del self._out[:written]
+        if self._out:
+            loop.add_writer(self._master_fd, self._write_out)
+        else:
+            loop.remove_writer(self._master_fd)
+
+    def _handle_command(self, frame: bytes) -> None:
+        if self._master_fd is None:  # Stopped while the command was being delayed
+            return
+        command = frame[0]
+        self.command_counts[command] += 1
+        self.logger.debug(f"Emulator received command {command:#04x}: {frame.hex()}")
+
+        if command == CMD_APP_START:
+            self._send_frame(self._self_info_frame())
+        elif command == CMD_DEVICE_QUERY:
+            self._send_frame(
+                bytes([PacketType.DEVICE_INFO.value, 3, 175, len(self.channel_slots)])
+                + (123456).to_bytes(4, "little")
+                + _fixed("emulator", 12) + _fixed("MeshChat serial emulator", 40) + _fixed("v1.0.0", 20)
+            )
+        elif command == CMD_GET_CONTACTS:
+            lastmod = int.from_bytes(frame[1:5], "little") if len(frame) >= 5 else 0
+            changed = [(key, entry) for key, entry in self.contacts.items() if entry.get("lastmod", 0) > lastmod]
+            newest = max((entry.get("lastmod", 0) for entry in self.contacts.values()), default=lastmod)
+            self._send_frame(bytes([PacketType.CONTACT_START.value]) + len(changed).to_bytes(4, "little"))
+            for key, entry in changed:
+                self._send_frame(self._contact_frame(key, entry))
+            self._send_frame(bytes([PacketType.CONTACT_END.value]) + newest.to_bytes(4, "little"))
+        elif command == CMD_GET_CHANNEL:
+            idx = frame[1]
+            if idx not in self.channel_slots:
+                self._send_error(ERR_NOT_FOUND)
+                return
+            self._send_frame(
+                bytes([PacketType.CHANNEL_INFO.value, idx])
+                + _fixed(self.channel_slots[idx], 32)
+                + self.channel_keys.get(idx, bytes(16))
+            )
+        elif command == CMD_SET_CHANNEL:
+            idx = frame[1]
+            if idx not in self.channel_slots:
+                self._send_error(ERR_NOT_FOUND)
+                return
+            self.channel_slots[idx] = frame[2:34].split(b"\x00", 1)[0].decode("utf-8", "ignore")
+            self.channel_keys[idx] = frame[34:50]
+            self._send_frame(bytes([PacketType.OK.value]))
+        elif command == CMD_SEND_TXT_MSG:
+            self.sent_messages.append({"destination": frame[7:13].hex(), "text": frame[13:].decode("utf-8", "ignore")})
+            self._send_frame(
+                bytes([PacketType.MSG_SENT.value, 0]) + os.urandom(4) + (1000).to_bytes(4, "little")
+            )
+        elif command == CMD_SEND_CHANNEL_TXT_MSG:
+            self.sent_messages.append({"channel_idx": frame[2], "text": frame[7:].decode("utf-8", "ignore")})
+            self._send_frame(bytes([PacketType.OK.value]))
+        elif command == CMD_SEND_SELF_ADVERT:
+            self._send_frame(bytes([PacketType.OK.value]))
+        elif command == CMD_SYNC_NEXT_MESSAGE:
+            if self._pending_messages:
+                self._send_frame(self._pending_messages.popleft())
+            else:
+                self._send_frame(bytes([PacketType.NO_MORE_MSGS.value]))
+        elif command == CMD_GET_DEVICE_TIME:
+            self._send_frame(bytes([PacketType.CURRENT_TIME.value]) + int(time.time()).to_bytes(4, "little"))
+        elif command == CMD_GET_BATTERY:
+            self._send_frame(bytes([PacketType.BATTERY.value]) + (4200).to_bytes(2, "little"))
+        else:
+            self._send_error(ERR_UNSUPPORTED_CMD)
+
+    def _send_error(self, code: int) -> None:
+        self._send_frame(bytes([PacketType.ERROR.value, code]))
+
+    def _self_info_frame(self) -> bytes:
+        return (
+            bytes([PacketType.SELF_INFO.value, 1, 22, 22])
+            + bytes.fromhex(self.public_key)
+            + bytes(8)  # Latitude, longitude
+            + bytes(4)  # Multi acks, location policy, telemetry modes, manual add
+            + (869525).to_bytes(4, "little") + (250000).to_bytes(4, "little")
+            + bytes([11, 5])
+            + self.name.encode("utf-8")
+        )
+
+    @staticmethod
+    def _contact_frame(key: str, entry: dict) -> bytes:
+        return (
+            bytes([PacketType.CONTACT.value])
+            + bytes.fromhex(key)
+            + bytes([entry.get("type", 1), 0, 0xFF])  # Type, flags, no out path
+            + bytes(64)
+            + _fixed(entry.get("adv_name", ""), 32)
+            + int(entry.get("last_advert", 0)).to_bytes(4, "little")
+            + bytes(8)  # Latitude, longitude
+            + int(entry.get("lastmod", 0)).to_bytes(4, "little")
+        )
+
+
+async def _serve(args) -> None:
+    contacts = {
+        f"{i + 1:064x}": {"adv_name": f"node-{i}", "type": 1, "lastmod": i + 1}
+        for i in range(args.contacts)
+    }
+    emulator = SerialRadioEmulator(
+        channels={0: "Public"},
+        contacts=contacts,
+        message_rate=args.rate,
+        push_messages=not args.waiting,
+        command_latency=args.latency / 1000,
+    )
+    print(f"Serial radio emulator on {emulator.start()}, press Ctrl+C to stop", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await emulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulate a MeshCore companion radio on a pseudo-terminal.")
+    parser.add_argument("--rate", type=float, default=0.0, help="Channel messages generated per second.")
+    parser.add_argument("--contacts", type=int, default=100, help="Number of contacts on the emulated radio.")
+    parser.add_argument("--waiting", action="store_true", help="Queue messages behind MESSAGES_WAITING instead of pushing them.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds the radio takes to answer each command.")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
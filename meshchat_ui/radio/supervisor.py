@@ -0,0 +1,232 @@
+from __future__ import annotations
+import asyncio
+import random
+import time
+from typing import TYPE_CHECKING
+
+from meshchat_ui.config import (
+    SUPERVISOR_HEARTBEAT_INTERVAL, SUPERVISOR_HEARTBEAT_MAX_INTERVAL, SUPERVISOR_HEARTBEAT_RETRY_INTERVAL, SUPERVISOR_HEARTBEAT_TIMEOUT,
+    SUPERVISOR_MAX_FAILURES, RECONNECT_BASE_DELAY, RECONNECT_MAX_DELAY,
+)
+from meshchat_ui.radio.bootstrap import BootstrapCoordinator
+from meshchat_ui.radio.link_health import LinkHealth
+from meshchat_ui.radio.scheduler import PRIORITY_ACK
+from meshchat_ui.logger import get_logger
+
+if TYPE_CHECKING:
+    from meshcore import MeshCore
+    from meshchat_ui.radio.connector import RadioConnector
+    from meshchat_ui.tui.app import MeshChatApp
+
+
+class ConnectionSupervisor:
+    """
+    Watches the radio link and reconnects when it is lost. The link counts as
+    lost when meshcore reports a disconnect, or when SUPERVISOR_MAX_FAILURES
+    commands or heartbeats fail in a row. A heartbeat is only sent after a
+    quiet spell with no traffic from the radio, and the quiet spell doubles
+    after each healthy heartbeat. Round trips of heartbeats and sends go into
+    `link_health`, and the app is warned when they slow down. Reconnects with
+    jittered exponential backoff, then re-subscribes and resyncs through a
+    BootstrapCoordinator, which only fetches contacts changed since the last
+    sync and leaves the UI alone where nothing changed.
+    """
+
+    def __init__(self, connector: RadioConnector, app: MeshChatApp, debug_mode: bool = False, seed: int | None = None):
+        self.connector = connector
+        self.app = app
+        self.debug_mode = debug_mode
+        self.logger = get_logger(__name__, debug_mode=debug_mode)
+        self.rng = random.Random(seed)
+        self.consecutive_failures = 0
+        self.last_activity = time.monotonic()
+        self.link_health = LinkHealth()
+        # Seconds without radio traffic before the next heartbeat
+        self.heartbeat_interval = SUPERVISOR_HEARTBEAT_INTERVAL
+        self.reconnect_count = 0
+        # Seconds from detecting the last link loss until the app was resynced
+        self.last_downtime: float | None = None
+        self._lost_reason: str | None = None
+        self._link_lost = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._subscription = None
+        self._meshcore: MeshCore | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.is_running:
+            return
+        self._attach(await self.connector.get_meshcore())
+        self.last_activity = time.monotonic()
+        self._task = asyncio.create_task(self._supervise())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._detach()
+
+    def command_succeeded(self, rtt: float | None = None) -> None:
+        """Records a command that got through, with its round trip in seconds when known."""
+        self.consecutive_failures = 0
+        self.last_activity = time.monotonic()
+        if rtt is not None:
+            self._record_latency(rtt)
+
+    def command_failed(self, reason: str) -> None:
+        self.consecutive_failures += 1
+        self.heartbeat_interval = SUPERVISOR_HEARTBEAT_INTERVAL
+        self.logger.debug(f"Radio command failed ({self.consecutive_failures} in a row): {reason}")
+        if self.consecutive_failures >= SUPERVISOR_MAX_FAILURES:
+            self.link_lost(f"{self.consecutive_failures} commands failed in a row, last: {reason}")
+
+    def link_lost(self, reason: str) -> None:
+        if not self._link_lost.is_set():
+            self._lost_reason = reason
+            self._link_lost.set()
+
+    def _record_latency(self, rtt: float) -> None:
+        health = self.link_health
+        if not health.record(rtt):
+            return
+        if health.degraded:
+            # Check on a slow link more often, so a dying one is found sooner
+            self.heartbeat_interval = SUPERVISOR_HEARTBEAT_INTERVAL
+            self.logger.warning(f"Radio link degraded: {health.summary()}")
+            self.app.notify(
+                f"Radio link is slow: round trips take {health.recent() * 1000:.0f} ms, "
+                f"usually {health.percentile(25) * 1000:.0f} ms.",
+                severity="warning",
+            )
+        else:
+            self.logger.info(f"Radio link recovered: {health.summary()}")
+            self.app.notify(f"Radio link latency back to normal ({health.recent() * 1000:.0f} ms).")
+
+    def _attach(self, meshcore: MeshCore | None) -> None:
+        self._detach()
+        if meshcore is not None:
+            self._meshcore = meshcore
+            self._subscription = meshcore.subscribe(None, self._on_event)
+
+    def _detach(self) -> None:
+        if self._subscription is not None:
+            self._meshcore.unsubscribe(self._subscription)
+        self._subscription = None
+        self._meshcore = None
+
+    def _on_event(self, event) -> None:
+        """Any event from the radio shows the link is up; a disconnect shows it is not."""
+        from meshcore import EventType
+
+        self.last_activity = time.monotonic()
+        if event.type == EventType.DISCONNECTED:
+            reason = event.payload.get("reason", "unknown") if isinstance(event.payload, dict) else "unknown"
+            if reason != "manual_disconnect":
+                self.link_lost(f"radio disconnected: {reason}")
+
+    async def _supervise(self) -> None:
+        while True:
+            if self.consecutive_failures:
+                wait = SUPERVISOR_HEARTBEAT_RETRY_INTERVAL
+            else:
+                quiet = time.monotonic() - self.last_activity
+                wait = max(SUPERVISOR_HEARTBEAT_RETRY_INTERVAL, self.heartbeat_interval - quiet)
+            try:
+                await asyncio.wait_for(self._link_lost.wait(), wait)
+            except asyncio.TimeoutError:
+                if self.consecutive_failures or time.monotonic() - self.last_activity >= self.heartbeat_interval:
+                    await self._heartbeat()
+                continue
+            try:
+                await self._recover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Recovering the radio link failed: {e}", exc_info=True)
+                self._link_lost.set()
+
+    async def _heartbeat(self) -> None:
+        """
+        Sends a cheap command to check that the radio still answers, and how
+        quickly. The connector reports the outcome through command_succeeded or
+        command_failed, as for any other command that is not a background sync.
+        """
+        from meshcore import EventType
+
+        meshcore = await self.connector.get_meshcore()
+        if meshcore is None:
+            self.link_lost("radio not connected")
+            return
+        try:
+            result = await self.connector.scheduler.run(
+                "heartbeat", meshcore.commands.send_device_query, PRIORITY_ACK, SUPERVISOR_HEARTBEAT_TIMEOUT
+            )
+        except Exception as e:
+            self.logger.debug(f"Heartbeat failed: {e!r}")
+            return
+        if result is None or result.type == EventType.ERROR:
+            return
+        if not self.link_health.degraded:
+            self.heartbeat_interval = min(SUPERVISOR_HEARTBEAT_MAX_INTERVAL, self.heartbeat_interval * 2)
+
+    def _backoff(self, attempt: int) -> float:
+        """Delay before reconnect attempt `attempt`, between half and all of the exponential backoff."""
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** attempt)
+        return delay * self.rng.uniform(0.5, 1.0)
+
+    async def _recover(self) -> None:
+        started = time.monotonic()
+        reason = self._lost_reason
+        self.logger.warning(f"Radio link lost: {reason}")
+        self.app.notify(f"Radio link lost ({reason}), reconnecting...")
+        self._detach()
+        await self._teardown()
+
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+            success, message = await self.connector.connect_radio()
+            if success:
+                break
+            self.logger.warning(f"Reconnect attempt {attempt} failed: {message}")
+
+        self._attach(await self.connector.get_meshcore())
+        self.consecutive_failures = 0
+        self.last_activity = time.monotonic()
+        self.link_health = LinkHealth()
+        self.heartbeat_interval = SUPERVISOR_HEARTBEAT_INTERVAL
+        self._link_lost.clear()
+        bootstrap = await BootstrapCoordinator(self.connector, self.app, debug_mode=self.debug_mode).run()
+        self.last_downtime = time.monotonic() - started
+        self.reconnect_count += 1
+        self.logger.info(f"Reconnected after {attempt} attempt(s), {self.last_downtime:.1f} s after the link was lost")
+        if bootstrap.errors:
+            self.app.notify(f"Reconnected to radio, but resync failed: {', '.join(bootstrap.errors)}")
+        else:
+            self.app.notify(f"Reconnected to radio after {self.last_downtime:.1f} s.")
+
+    async def _teardown(self) -> None:
+        """Releases the lost connection. Errors are expected, the link is already gone."""
+        connector = self.connector
+        connector.scheduler.cancel_pending("radio link lost")
+        try:
+            if connector.radio_handler:
+                await connector.radio_handler.stop_listening()
+        except Exception as e:
+            self.logger.debug(f"Error stopping the radio handler: {e}")
+        try:
+            if connector.radio:
+                await connector.radio.disconnect()
+        except Exception as e:
+            self.logger.debug(f"Error closing the lost connection: {e}")
+        finally:
+            if connector.radio:
+                connector.radio.meshcore = None
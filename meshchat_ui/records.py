@@ -0,0 +1,130 @@
+import json
+import time
+from datetime import datetime
+from functools import lru_cache
+
+# Received messages
+KIND_DM = "dm"
+KIND_CHANNEL = "channel"
+# Messages sent from this client
+KIND_SENT_DM = "sent_dm"
+KIND_SENT_CHANNEL = "sent_channel"
+# Local lines that are not persisted
+KIND_NOTICE = "notice"
+KIND_SENT_NOTICE = "sent"
+
+
+@lru_cache(maxsize=1024)
+def _format_minute(minute: int) -> str:
+    return datetime.fromtimestamp(minute * 60).strftime("%d;%m %H:%M")
+
+
+def format_local_time(timestamp: int | None) -> str:
+    """Formats a sender timestamp, caching the string per minute."""
+    if not timestamp:
+        return "No timestamp"
+    return _format_minute(int(timestamp) // 60)
+
+
+class MessageRecord:
+    """
+    A parsed message.
+    Carries the structured fields only; the display line is built on demand by
+    `format` so nothing is formatted for messages that are never shown.
+    """
+
+    __slots__ = (
+        "id",
+        "received_at",
+        "kind",
+        "sender",
+        "pubkey",
+        "channel_idx",
+        "sender_timestamp",
+        "destination",
+        "text",
+        "known_sender",
+        "raw",
+    )
+
+    def __init__(
+        self,
+        kind: str,
+        text: str = "",
+        sender: str | None = None,
+        pubkey: str | None = None,
+        channel_idx: int | None = None,
+        sender_timestamp: int | None = None,
+        destination: str | None = None,
+        known_sender: bool = False,
+        raw: dict | str | None = None,
+        id: int | None = None,
+        received_at: float | None = None,
+    ):
+        self.id = id
+        self.received_at = received_at if received_at is not None else time.time()
+        self.kind = kind
+        self.sender = sender
+        self.pubkey = pubkey
+        self.channel_idx = channel_idx
+        self.sender_timestamp = sender_timestamp
+        self.destination = destination
+        self.text = text
+        self.known_sender = bool(known_sender)
+        self.raw = raw
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(id={self.id}, kind={self.kind!r}, sender={self.sender!r}, text={self.text!r})"
+
+    @property
+    def is_sent(self) -> bool:
+        return self.kind in (KIND_SENT_DM, KIND_SENT_CHANNEL, KIND_SENT_NOTICE)
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "MessageRecord":
+        """Builds a record from a row in `__slots__` order."""
+        record = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, row):
+            setattr(record, name, value)
+        record.known_sender = bool(record.known_sender)
+        return record
+
+    def to_row(self) -> tuple:
+        """Returns the record as a row in `__slots__` order, serializing the raw payload."""
+        raw = self.raw
+        if raw is not None and not isinstance(raw, str):
+            raw = json.dumps(raw, default=str)
+        return (
+            self.id,
+            self.received_at,
+            self.kind,
+            self.sender,
+            self.pubkey,
+            self.channel_idx,
+            self.sender_timestamp,
+            self.destination,
+            self.text,
+            self.known_sender,
+            raw,
+        )
+
+    def format(self, channel_names: dict[int, str]) -> str:
+        """Builds the display line for the record."""
+        kind = self.kind
+        if kind == KIND_SENT_CHANNEL:
+            return f"Sending to {self.destination}: {self.text}"
+        if kind == KIND_SENT_DM:
+            return f"Sending DM to {self.destination}: {self.text}"
+        if kind not in (KIND_DM, KIND_CHANNEL):
+            return self.text
+
+        local_time = format_local_time(self.sender_timestamp)
+        if kind == KIND_DM:
+            return f"{local_time} [DM] {self.sender}: {self.text}"
+
+        channel_name = channel_names.get(self.channel_idx)
+        if channel_name is None:
+            channel_name = f"Channel {self.channel_idx}"
+        if self.known_sender:
+            return f"{local_time} [{channel_name}] {self.sender}: {self.text}"
+        return f"{local_time} [{channel_name}] Unknown Sender: {self.sender}: {self.text}"
@@ -0,0 +1,97 @@
+import sqlite3
+
+from meshchat_ui.config import MESSAGE_DB_PATH, MESSAGE_STORE_BATCH_SIZE
+from meshchat_ui.logger import get_logger
+from meshchat_ui.records import MessageRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    received_at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    sender TEXT,
+    pubkey TEXT,
+    channel_idx INTEGER,
+    sender_timestamp INTEGER,
+    destination TEXT,
+    text TEXT NOT NULL,
+    known_sender INTEGER NOT NULL DEFAULT 0,
+    raw TEXT
+)
+"""
+
+COLUMNS = MessageRecord.__slots__
+
+SELECT = f"SELECT {', '.join(COLUMNS)}"
+
+
+class MessageStore:
+    """
+    Persists messages to SQLite.
+    Writes are buffered and committed in batches; ids are assigned on add so
+    records can be paged before their batch has been flushed.
+    """
+
+    def __init__(self, db_path: str = MESSAGE_DB_PATH, batch_size: int = MESSAGE_STORE_BATCH_SIZE, debug_mode: bool = False):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.logger = get_logger(__name__, debug_mode=debug_mode)
+        self._pending: list[MessageRecord] = []
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+        last_id = self._conn.execute("SELECT MAX(id) FROM messages").fetchone()[0]
+        self._next_id = (last_id or 0) + 1
+
+    def add(self, record: MessageRecord) -> MessageRecord:
+        """Queues a record for writing, assigning its id. Returns the record."""
+        record.id = self._next_id
+        self._next_id += 1
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return record
+
+    def flush(self) -> None:
+        """Writes all pending records in a single transaction."""
+        if not self._pending or self._conn is None:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO messages ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    [record.to_row() for record in pending],
+                )
+        except sqlite3.Error as e:
+            self.logger.error(f"Error writing {len(pending)} messages to {self.db_path}: {e}", exc_info=True)
+
+    def fetch_latest(self, limit: int) -> list[MessageRecord]:
+        """Returns the newest `limit` records, oldest first."""
+        return self._fetch(f"{SELECT} FROM messages ORDER BY id DESC LIMIT ?", (limit,), reverse=True)
+
+    def fetch_before(self, message_id: int, limit: int) -> list[MessageRecord]:
+        """Returns up to `limit` records older than `message_id`, oldest first."""
+        return self._fetch(f"{SELECT} FROM messages WHERE id < ? ORDER BY id DESC LIMIT ?", (message_id, limit), reverse=True)
+
+    def fetch_after(self, message_id: int, limit: int) -> list[MessageRecord]:
+        """Returns up to `limit` records newer than `message_id`, oldest first."""
+        return self._fetch(f"{SELECT} FROM messages WHERE id > ? ORDER BY id ASC LIMIT ?", (message_id, limit))
+
+    def _fetch(self, query: str, params: tuple, reverse: bool = False) -> list[MessageRecord]:
+        if self._conn is None:
+            return []
+        self.flush()
+        rows = self._conn.execute(query, params).fetchall()
+        if reverse:
+            rows.reverse()
+        return [MessageRecord.from_row(row) for row in rows]
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self.flush()
+        self._conn.close()
+        self._conn = None
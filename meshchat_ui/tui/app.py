@@ -1,28 +1,25 @@
-from rich.text import Text
 from textual.app import App, ComposeResult
-from textual.containers import Vertical, VerticalScroll
-from textual.widgets import Input, Static, ListView, ListItem
+from textual.containers import Vertical
+from textual.widgets import Input
+from textual.timer import Timer
 from textual.worker import Worker, WorkerState
 
+from meshchat_ui.radio.bootstrap import BootstrapCoordinator
 from meshchat_ui.radio.connector import RadioConnector
+from meshchat_ui.radio.contacts import ContactIndex
 from meshchat_ui.logger import get_logger
+from meshchat_ui.store import MessageStore
+from meshchat_ui.records import MessageRecord, KIND_SENT_CHANNEL, KIND_SENT_DM, KIND_NOTICE, KIND_SENT_NOTICE
+from meshchat_ui.config import MESSAGE_DB_PATH, MESSAGE_STORE_FLUSH_INTERVAL, MESSAGE_UPDATE_INTERVAL, AUTO_CONNECT
+from meshchat_ui.config import load_serial_connection, load_contact_table, load_channel_list
 from meshchat_ui.tui.sidebar import Sidebar
+from meshchat_ui.tui.contact_list import ContactList
+from meshchat_ui.tui.message_display import MessageDisplay
 from meshchat_ui.tui.connection_screen import ConnectionScreen
 from meshchat_ui.tui.channel_overwrite_screen import ChannelOverwriteScreen # New import
 import re # New import
 
 
-class Message(Static):
-    def __init__(self, message_content: str, is_sent: bool = False, **kwargs):
-        super().__init__(Text(message_content), **kwargs)
-        self.is_sent = is_sent
-        self.add_class("message-sent" if is_sent else "message-received")
-
-
-class MessageDisplay(VerticalScroll):
-    pass
-
-
 class MeshChatApp(App):
     """A Textual app to chat over a mesh radio."""
 
@@ -42,11 +39,15 @@ class MeshChatApp(App):
         text-align: center;
     }
 
-    Sidebar ListView {
+    Sidebar ListView, Sidebar ContactList {
         border: round white;
         margin: 1;
     }
 
+    Sidebar #contact-filter {
+        margin: 0 1;
+    }
+
     #main-content {
         width: 85%;
         height: 100%;
@@ -55,47 +56,82 @@ class MeshChatApp(App):
     Input {
         border: round white;
     }
-
-    .message-received {
-        color: white;
-        margin: 1 2;
-        padding: 0 1;
-    }
-
-    .message-sent {
-        color: grey;
-        margin: 1 2;
-        padding: 0 1;
-    }
     """
 
-    def __init__(self, debug_mode: bool = False):
+    def __init__(self, debug_mode: bool = False, message_db_path: str = MESSAGE_DB_PATH, auto_connect: bool = AUTO_CONNECT):
         super().__init__()
         self.debug_mode = debug_mode
+        self.auto_connect = auto_connect
+        # Saved serial connection being connected to at startup, None once that attempt has finished
+        self.auto_connection: dict | None = None
         self.logger = get_logger(__name__, debug_mode=self.debug_mode)
+        self.message_store = MessageStore(message_db_path, debug_mode=self.debug_mode)
         self.radio_connector = RadioConnector(self, debug_mode=self.debug_mode)
         self.connection_worker: Worker | None = None
         self.get_lists_worker: Worker | None = None
         self.disconnect_worker: Worker | None = None
-        self.get_info_worker: Worker | None = None
+        self.bootstrap_worker: Worker | None = None
+        self.bootstrap: BootstrapCoordinator | None = None
         self.channels: dict[str, int] = {}
         self.contacts: list[dict] = []
+        self.contact_index = ContactIndex()
+        self._pending_records: list[MessageRecord] = []
+        self._message_update_timer: Timer | None = None
+        self.message_flush_count = 0
+        self.messages_coalesced = 0
 
     def compose(self) -> ComposeResult:
         """Create child widgets for the app."""
         yield Sidebar()
         with Vertical(id="main-content"):
-            yield MessageDisplay()
+            yield MessageDisplay(store=self.message_store)
             yield Input(placeholder="Type <channel> <message> or <client> <message>")
 
+    def on_load(self) -> None:
+        """In auto-connect mode, starts connecting to the last serial radio while the UI is still mounting."""
+        if not self.auto_connect:
+            return
+        self.auto_connection = load_serial_connection()
+        if not self.auto_connection:
+            return
+        self.radio_connector.set_serial_radio(self.auto_connection["port"], self.auto_connection["baud_rate"])
+        self.connection_worker = self.run_worker(
+            self.radio_connector.connect_radio(), exclusive=True
+        )
+
     def on_mount(self) -> None:
         """Called when the app is mounted."""
+        self.set_interval(MESSAGE_STORE_FLUSH_INTERVAL, self.message_store.flush)
+        if self.auto_connection:
+            self.notify(f"Connecting to radio via Serial at {self.auto_connection['port']}...")
+            self.warm_start(self.auto_connection.get("radio_key"))
+        else:
+            self.push_connection_screen()
+
+    def push_connection_screen(self) -> None:
         def connection_callback(connection_details: dict | None):
             if connection_details:
                 self.action_start_connection(connection_details)
-        
+
         self.push_screen(ConnectionScreen(), connection_callback)
 
+    def warm_start(self, radio_key: str | None) -> None:
+        """Shows the contacts and channels cached for a radio until fresh lists are fetched from it."""
+        if not radio_key:
+            return
+        saved = load_contact_table(radio_key)
+        if saved:
+            self.update_contacts(list(saved.get("contacts", {}).values()))
+        channels = load_channel_list(radio_key)
+        if channels:
+            self.update_channels(channels)
+
+    def on_unmount(self) -> None:
+        """Flush any pending messages and debug logs to disk before exiting."""
+        self.message_store.close()
+        if self.radio_connector.radio_handler:
+            self.radio_connector.radio_handler.close_json_log()
+
     def action_start_connection(self, connection_details: dict):
         """Start the connection process based on details from the connection screen."""
         conn_type = connection_details.get("type")
@@ -117,28 +153,50 @@ class MeshChatApp(App):
         )
 
     def add_message(self, message: str, is_sent: bool = False):
-        message_display = self.query_one(MessageDisplay)
-        message_display.mount(Message(message, is_sent=is_sent))
-        message_display.scroll_end(animate=False)
+        self.add_message_record(MessageRecord(KIND_SENT_NOTICE if is_sent else KIND_NOTICE, text=message))
+
+    def add_message_record(self, record: MessageRecord):
+        """Queues a record for the message log. Queued records are written together once per update interval."""
+        self._pending_records.append(record)
+        if self._message_update_timer is None:
+            self._message_update_timer = self.set_timer(MESSAGE_UPDATE_INTERVAL, self.flush_pending_messages)
+
+    def flush_pending_messages(self):
+        """Writes all queued records to the message log with a single scroll."""
+        self._message_update_timer = None
+        records, self._pending_records = self._pending_records, []
+        if not records:
+            return
+        self.message_flush_count += 1
+        self.messages_coalesced += len(records) - 1
+        self.query_one(MessageDisplay).write_records(records)
 
-    def update_contacts(self, contacts):
-        contact_list = self.query_one("#contacts", ListView)
-        contact_list.clear()
+    def update_contacts(self, contacts: list[dict]):
+        valid_contacts = []
         for contact in contacts:
             if not isinstance(contact, dict):
                 self.logger.debug(f"Skipping invalid contact entry: {contact}")
                 continue
-            contact_type = contact.get("type")
-            contact_name = contact.get("name", "Unknown")
-            if contact_type == 1:  # Client
-                display_name = f" {contact_name}"
-            elif contact_type == 2:  # Repeater
-                display_name = f" {contact_name}"
-            elif contact_type == 3: # Room Server
-                display_name = f" {contact_name}"
-            else:
-                display_name = contact_name
-            contact_list.append(ListItem(Static(display_name)))
+            valid_contacts.append(contact)
+        self.contacts = valid_contacts
+        self.contact_index.update(valid_contacts)
+        self.query_one(Sidebar).update_contacts(valid_contacts)
+
+    def update_channels(self, channels: list[dict]):
+        self.channels = {
+            channel["name"]: channel["id"] for channel in channels
+        }
+        self.query_one(MessageDisplay).set_channel_names(
+            {channel_id: name for name, channel_id in self.channels.items()}
+        )
+        self.query_one(Sidebar).update_channels(channels)
+
+    def on_contact_list_selected(self, event: ContactList.Selected) -> None:
+        """Starts a direct message to the selected contact."""
+        message_input = self.query_one("#main-content Input", Input)
+        message_input.value = f"{event.contact['name']} "
+        message_input.cursor_position = len(message_input.value)
+        message_input.focus()
 
     async def process_join_command(self, channel_name: str) -> None:
         self.notify(f"Attempting to join public channel {channel_name}...")
@@ -184,9 +242,24 @@ class MeshChatApp(App):
         if destination == "disconnect":
             self.notify("Disconnecting from radio...")
             self.disconnect_worker = self.run_worker(self.radio_connector.disconnect)
+        elif destination == "refresh":
+            if not self.radio_connector.radio:
+                self.notify("Error: Not connected to a radio.")
+                return
+            self.notify("Fetching all contacts and channels...")
+            self.get_lists_worker = self.run_worker(
+                self.radio_connector.get_contacts_and_channels(full_sync=True), name="get_lists"
+            )
         elif destination == "advert":
             self.notify("Sending flood advert...")
             self.run_worker(self.radio_connector.send_advert)
+        elif destination == "link":
+            supervisor = self.radio_connector.supervisor
+            if not supervisor:
+                self.notify("Error: Not connected to a radio.")
+                return
+            self.notify(supervisor.link_health.summary())
+            self.notify(f"Radio commands: {self.radio_connector.scheduler.summary()}")
         
         elif destination == "join":
             channel_name = message_text
@@ -202,9 +275,13 @@ class MeshChatApp(App):
         # Check if destination is a channel
         elif destination in self.channels:
             channel_id = self.channels[destination]
-            self.add_message(
-                f"Sending to {destination}: {message_text}", is_sent=True
-            )
+            record = self.message_store.add(MessageRecord(
+                KIND_SENT_CHANNEL,
+                text=message_text,
+                destination=destination,
+                channel_idx=channel_id,
+            ))
+            self.add_message_record(record)
             send_success, send_message_error = await self.radio_connector.send_channel_message(
                 message_text, channel_id
             )
@@ -217,9 +294,13 @@ class MeshChatApp(App):
             recipient = next((c for c in self.contacts if c['name'] == destination and c['type'] == 1), None)
             if recipient:
                 destination_id = recipient['public_key']
-                self.add_message(
-                    f"Sending DM to {destination}: {message_text}", is_sent=True
-                )
+                record = self.message_store.add(MessageRecord(
+                    KIND_SENT_DM,
+                    text=message_text,
+                    destination=destination,
+                    pubkey=destination_id,
+                ))
+                self.add_message_record(record)
                 send_success, send_message_error = await self.radio_connector.send_message(
                     message_text, destination_id
                 )
@@ -238,61 +319,42 @@ class MeshChatApp(App):
                 connected, error_message = event.worker.result
                 if connected:
                     self.notify("Successfully connected to radio.")
-                    self.notify("Fetching radio info...")
-                    self.get_info_worker = self.run_worker(
-                        self.radio_connector.get_radio_info, name="get_info"
+                    self.notify("Subscribing and fetching radio info, contacts and channels...")
+                    # The first sync after connecting fetches the whole contact table to drop deleted contacts
+                    self.bootstrap = BootstrapCoordinator(self.radio_connector, self, full_sync=True, debug_mode=self.debug_mode)
+                    self.bootstrap_worker = self.run_worker(
+                        self.bootstrap.run(), name="bootstrap"
                     )
+                    self.run_worker(self.radio_connector.start_supervisor(), name="supervisor")
                 else:
                     self.notify(f"Failed to connect to radio: {error_message}")
                     self.logger.error(f"Failed to connect to radio: {error_message}")
             elif event.state == WorkerState.ERROR:
                 self.notify(f"Connection worker failed: {event.worker.result}")
                 self.logger.error(f"Connection worker failed: {event.worker.result}")
+            if event.state in (WorkerState.SUCCESS, WorkerState.ERROR) and self.auto_connection:
+                # Fall back to choosing a radio when auto-connect fails
+                self.auto_connection = None
+                if event.state == WorkerState.ERROR or not event.worker.result[0]:
+                    self.push_connection_screen()
 
-        elif event.worker.name == "get_info":
+        elif event.worker is self.bootstrap_worker:
             if event.state == WorkerState.SUCCESS:
-                info = event.worker.result
-                if info:
-                    self.notify("Successfully fetched radio info.")
-                else:
-                    self.notify("Failed to fetch radio info.")
-                    self.logger.error("Failed to fetch radio info.")
-                self.notify("Fetching contacts and channels...")
-                self.get_lists_worker = self.run_worker(
-                    self.radio_connector.get_contacts_and_channels, name="get_lists"
-                )
+                bootstrap = event.worker.result
+                for step, error in bootstrap.errors.items():
+                    self.notify(f"Radio setup step '{step}' failed: {error}")
+                    self.logger.error(f"Radio setup step '{step}' failed: {error}")
+                if not bootstrap.errors:
+                    self.notify(f"Radio ready in {bootstrap.timings['total'] * 1000:.0f} ms.")
             elif event.state == WorkerState.ERROR:
-                self.notify("Failed to fetch radio info.")
-                self.logger.error("Failed to fetch radio info.")
+                self.notify("Failed to set up the radio after connecting.")
+                self.logger.error(f"Bootstrap worker failed: {event.worker.error}")
 
         elif event.worker.name == "get_lists":
             if event.state == WorkerState.SUCCESS:
                 data = event.worker.result
-                self.contacts = data["contacts"]
-                self.channels = {
-                    channel["name"]: channel["id"] for channel in data["channels"]
-                }
-                
-                channel_names = list(self.channels.keys())
-                # Only suggest clients for direct messages
-                contact_names = [c["name"] for c in self.contacts if c['type'] == 1]
-
-                channel_list = self.query_one("#channels", ListView)
-                channel_list.clear()
-                for channel in data["channels"]:
-                    channel_list.append(ListItem(Static(channel["name"])))
-
-                self.update_contacts(self.contacts)
-
-                self.notify("Subscribing to new messages...")
-                self.run_worker(self.radio_connector.subscribe, name="subscribe")
+                self.update_channels(data["channels"])
+                self.update_contacts(data["contacts"])
             elif event.state == WorkerState.ERROR:
                 self.notify("Failed to fetch contacts and channels.")
                 self.logger.error("Failed to fetch contacts and channels.")
-
-        elif event.worker.name == "subscribe":
-            if event.state == WorkerState.SUCCESS:
-                self.notify("Subscribed to new messages.")
-            elif event.state == WorkerState.ERROR:
-                self.notify("Failed to subscribe to new messages.")
-                self.logger.error("Failed to subscribe to new messages.")
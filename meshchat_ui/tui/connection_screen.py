@@ -4,7 +4,6 @@ from textual.containers import Vertical
 from textual.widgets import Button, Input, Label, Checkbox, Static, Tabs, Tab, ListView, ListItem
 
 from meshchat_ui.config import save_serial_connection, load_serial_connection
-from bleak import BleakScanner
 import asyncio
 
 
@@ -115,6 +114,9 @@ class ConnectionScreen(ModalScreen[dict]):
             
     async def scan_ble_devices(self):
         """Scan for BLE devices and populate the list."""
+        # Imported here so serial users never load the BLE stack
+        from bleak import BleakScanner
+
         ble_list = self.query_one("#bt-device-list", ListView)
         ble_list.clear()
         self.query_one("#connection-status", Static).update("Scanning for BLE devices...")
@@ -0,0 +1,185 @@
+from __future__ import annotations
+from bisect import bisect_left
+
+from rich.text import Text
+from textual.binding import Binding
+from textual.events import Click
+from textual.geometry import Region, Size
+from textual.message import Message
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+
+class NameFilter:
+    """
+    Filters keys by name: prefix matches first, then substring matches, then
+    fuzzy (subsequence) matches.
+    Prefix matches come from bisecting the sorted names. When a query extends
+    the previous one, only the previous matches are re-checked.
+    """
+
+    def __init__(self):
+        self._entries: list[tuple[str, str]] = []  # (folded name, key), sorted
+        self._last_query = ""
+        self._last_candidates: list[tuple[str, str]] = []
+
+    def update(self, names: dict[str, str]) -> None:
+        """Rebuilds the index from a key to name map."""
+        self._entries = sorted((name.casefold(), key) for key, name in names.items())
+        self._last_query = ""
+        self._last_candidates = self._entries
+
+    def filter(self, query: str) -> list[str]:
+        """Returns the keys whose name matches `query`, best matches first."""
+        query = query.casefold()
+        if not query:
+            self._last_query = ""
+            self._last_candidates = self._entries
+            return [key for _, key in self._entries]
+
+        if self._last_query and query.startswith(self._last_query):
+            candidates = self._last_candidates
+        else:
+            candidates = self._entries
+
+        start = bisect_left(self._entries, (query,))
+        prefix_keys = []
+        for name, key in self._entries[start:]:
+            if not name.startswith(query):
+                break
+            prefix_keys.append(key)
+
+        substring_keys = []
+        fuzzy_keys = []
+        matched = []
+        for entry in candidates:
+            name = entry[0]
+            if query in name:
+                if not name.startswith(query):
+                    substring_keys.append(entry[1])
+                matched.append(entry)
+            elif len(query) > 1:
+                chars = iter(name)
+                if all(char in chars for char in query):
+                    fuzzy_keys.append(entry[1])
+                    matched.append(entry)
+
+        self._last_query = query
+        self._last_candidates = matched
+        return prefix_keys + substring_keys + fuzzy_keys
+
+
+class ContactList(ScrollView, can_focus=True):
+    """
+    A virtual list of contacts.
+    Only the rows inside the viewport are rendered, so scrolling and updates do
+    not depend on how many contacts the radio has heard.
+    """
+
+    BINDINGS = [
+        Binding("up", "cursor_up", "Previous contact", show=False),
+        Binding("down", "cursor_down", "Next contact", show=False),
+        Binding("enter", "select", "Select contact", show=False),
+    ]
+
+    COMPONENT_CLASSES = {
+        "contact-list--cursor",
+    }
+
+    DEFAULT_CSS = """
+    ContactList {
+        height: 1fr;
+        overflow-x: hidden;
+    }
+
+    ContactList > .contact-list--cursor {
+        background: $accent 40%;
+    }
+
+    ContactList:focus > .contact-list--cursor {
+        background: $accent;
+    }
+    """
+
+    class Selected(Message):
+        """Posted when a contact is selected."""
+
+        def __init__(self, contact: dict) -> None:
+            super().__init__()
+            self.contact = contact
+
+    def __init__(self, name: str | None = None, id: str | None = None, classes: str | None = None):
+        super().__init__(name=name, id=id, classes=classes)
+        self._contacts: dict[str, dict] = {}
+        self._labels: dict[str, str] = {}
+        self._filter = NameFilter()
+        self._query = ""
+        self._visible_keys: list[str] = []
+        self.cursor = 0
+
+    @property
+    def row_count(self) -> int:
+        return len(self._visible_keys)
+
+    @property
+    def visible_contacts(self) -> list[dict]:
+        return [self._contacts[key] for key in self._visible_keys]
+
+    def set_contacts(self, contacts: list[dict], labels: dict[str, str]) -> None:
+        """Replaces the contacts. `labels` maps public keys to display labels."""
+        self._contacts = {contact["public_key"]: contact for contact in contacts}
+        self._labels = labels
+        self._filter.update({key: contact.get("name", "") for key, contact in self._contacts.items()})
+        self._refilter()
+
+    def filter(self, query: str) -> None:
+        """Shows only the contacts whose name matches `query`."""
+        self._query = query
+        self._refilter()
+
+    def _refilter(self) -> None:
+        self._visible_keys = self._filter.filter(self._query)
+        self.cursor = min(self.cursor, max(0, len(self._visible_keys) - 1))
+        self.virtual_size = Size(self.size.width, len(self._visible_keys))
+        self.refresh()
+
+    def action_cursor_up(self) -> None:
+        self._move_cursor(self.cursor - 1)
+
+    def action_cursor_down(self) -> None:
+        self._move_cursor(self.cursor + 1)
+
+    def action_select(self) -> None:
+        if self._visible_keys:
+            self.post_message(self.Selected(self._contacts[self._visible_keys[self.cursor]]))
+
+    def on_click(self, event: Click) -> None:
+        offset = event.get_content_offset(self)
+        if offset is not None and self.scroll_offset.y + offset.y < len(self._visible_keys):
+            self._move_cursor(self.scroll_offset.y + offset.y)
+            self.action_select()
+
+    def _move_cursor(self, row: int) -> None:
+        if not self._visible_keys:
+            return
+        self.cursor = max(0, min(row, len(self._visible_keys) - 1))
+        self.scroll_to_region(self._row_region(self.cursor), animate=False, immediate=True)
+        self.refresh()
+
+    def _row_region(self, row: int) -> Region:
+        return Region(0, row, self.size.width, 1)
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        row = scroll_y + y
+        width = self.size.width
+        rich_style = self.rich_style
+        if row >= len(self._visible_keys):
+            return Strip.blank(width, rich_style)
+        label = self._labels.get(self._visible_keys[row], "")
+        style = rich_style
+        if row == self.cursor:
+            style = rich_style + self.get_component_rich_style("contact-list--cursor")
+        text = Text(label, style=style, no_wrap=True, overflow="ellipsis", end="")
+        text.truncate(width, overflow="ellipsis", pad=True)
+        return Strip(text.render(self.app.console), width)
@@ -0,0 +1,263 @@
+from __future__ import annotations
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from itertools import accumulate
+from typing import TYPE_CHECKING
+
+from rich.cells import cell_len
+from rich.text import Text
+from textual.events import Resize
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+
+from meshchat_ui.config import MESSAGE_HISTORY_LIMIT, MESSAGE_PAGE_SIZE, MESSAGE_RENDER_CACHE_SIZE
+from meshchat_ui.records import MessageRecord, KIND_NOTICE, KIND_SENT_NOTICE
+
+if TYPE_CHECKING:
+    from meshchat_ui.store import MessageStore
+
+
+class MessageDisplay(ScrollView):
+    """
+    A virtual message log.
+    Messages are kept in a bounded store as records with the number of lines
+    each wraps to. A record is only wrapped and rendered into strips when one
+    of its lines is drawn, and the strips of the last MESSAGE_RENDER_CACHE_SIZE
+    records drawn are kept, so neither frame cost nor memory grows with history.
+    When backed by a MessageStore, older and newer pages are loaded on demand as
+    the user scrolls past either end.
+    """
+
+    COMPONENT_CLASSES = {
+        "message-display--received",
+        "message-display--sent",
+    }
+
+    DEFAULT_CSS = """
+    MessageDisplay {
+        height: 1fr;
+        padding: 0 2;
+        overflow-x: hidden;
+        overflow-y: scroll;
+    }
+
+    MessageDisplay > .message-display--received {
+        color: white;
+    }
+
+    MessageDisplay > .message-display--sent {
+        color: grey;
+    }
+    """
+
+    def __init__(self, store: MessageStore | None = None, max_messages: int = MESSAGE_HISTORY_LIMIT, page_size: int = MESSAGE_PAGE_SIZE, name: str | None = None, id: str | None = None, classes: str | None = None):
+        super().__init__(name=name, id=id, classes=classes)
+        self.store = store
+        self.max_messages = max_messages
+        self.page_size = page_size
+        self.channel_names: dict[int, str] = {}
+        self._records: deque[MessageRecord] = deque()
+        self._line_counts: deque[int] = deque()
+        self._line_total = 0
+        # First line of each record, rebuilt on the next render after the log changes
+        self._line_starts: list[int] | None = None
+        self._strips: OrderedDict[MessageRecord, list[Strip]] = OrderedDict()
+        self._wrap_width = 0
+        self._has_older = store is not None
+        self._has_newer = False
+
+    @property
+    def message_count(self) -> int:
+        return len(self._records)
+
+    @property
+    def line_count(self) -> int:
+        return self._line_total
+
+    def on_mount(self) -> None:
+        if self.store is not None:
+            records = self.store.fetch_latest(self.page_size)
+            self._has_older = len(records) == self.page_size
+            self._append(records)
+            self.scroll_end(animate=False, x_axis=False)
+
+    def write(self, message: str, is_sent: bool = False) -> None:
+        """Appends a plain text line that is not part of the message store."""
+        self.write_record(MessageRecord(KIND_SENT_NOTICE if is_sent else KIND_NOTICE, text=message))
+
+    def write_record(self, record: MessageRecord) -> None:
+        """Appends a message record, dropping the oldest once the log is full."""
+        self.write_records([record])
+
+    def write_records(self, records: list[MessageRecord]) -> None:
+        """Appends a batch of records with a single scroll and refresh."""
+        if self._has_newer:
+            # Scrolled back past the live tail; stored records are picked up from the store.
+            records = [record for record in records if record.id is None]
+            if not records:
+                return
+        at_end = self.is_vertical_scroll_end
+        self._append(records)
+        self._prune_oldest()
+        if at_end:
+            self.scroll_end(animate=False, immediate=True, x_axis=False)
+        else:
+            self.refresh()
+
+    def set_channel_names(self, channel_names: dict[int, str]) -> None:
+        """Updates the channel id to name map and re-renders the log."""
+        self.channel_names = channel_names
+        if self._records and self._wrap_width:
+            self._rewrap()
+            self.refresh()
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._line_counts.clear()
+        self._line_total = 0
+        self._strips.clear()
+        self._update_virtual_size()
+        self.refresh()
+
+    def _append(self, records: list[MessageRecord]) -> None:
+        for record in records:
+            line_count = self._count_lines(record)
+            self._records.append(record)
+            self._line_counts.append(line_count)
+            self._line_total += line_count
+        self._update_virtual_size()
+
+    def _prepend(self, records: list[MessageRecord]) -> int:
+        """Prepends records (oldest first). Returns the number of lines added."""
+        added_lines = 0
+        for record in reversed(records):
+            line_count = self._count_lines(record)
+            self._records.appendleft(record)
+            self._line_counts.appendleft(line_count)
+            added_lines += line_count
+        self._line_total += added_lines
+        self._update_virtual_size()
+        return added_lines
+
+    def _prune_oldest(self) -> int:
+        """Drops the oldest records once over the limit. Returns the number of lines removed."""
+        removed_lines = 0
+        while len(self._records) > self.max_messages:
+            self._strips.pop(self._records.popleft(), None)
+            removed_lines += self._line_counts.popleft()
+            self._has_older = self.store is not None
+        if removed_lines:
+            self._line_total -= removed_lines
+            self._update_virtual_size()
+        return removed_lines
+
+    def _prune_newest(self) -> None:
+        """Drops the newest records once over the limit."""
+        removed_lines = 0
+        while len(self._records) > self.max_messages:
+            self._strips.pop(self._records.pop(), None)
+            removed_lines += self._line_counts.pop()
+            self._has_newer = True
+        if removed_lines:
+            self._line_total -= removed_lines
+            self._update_virtual_size()
+
+    def _load_older(self) -> None:
+        oldest_id = next((r.id for r in self._records if r.id is not None), None)
+        if self.store is None or oldest_id is None:
+            self._has_older = False
+            return
+        records = self.store.fetch_before(oldest_id, self.page_size)
+        self._has_older = len(records) == self.page_size
+        if records:
+            added_lines = self._prepend(records)
+            self._prune_newest()
+            self.scroll_to(y=self.scroll_y + added_lines, animate=False, immediate=True)
+
+    def _load_newer(self) -> None:
+        newest_id = next((r.id for r in reversed(self._records) if r.id is not None), None)
+        if self.store is None or newest_id is None:
+            self._has_newer = False
+            return
+        records = self.store.fetch_after(newest_id, self.page_size)
+        self._has_newer = len(records) == self.page_size
+        if records:
+            self._append(records)
+            removed_lines = self._prune_oldest()
+            self.scroll_to(y=max(0, self.scroll_y - removed_lines), animate=False, immediate=True)
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        if new_value <= 0 and self._has_older and self.max_scroll_y > 0:
+            self.call_later(self._load_older)
+        elif self._has_newer and new_value >= self.max_scroll_y:
+            self.call_later(self._load_newer)
+
+    def _count_lines(self, record: MessageRecord) -> int:
+        """Number of lines a record wraps to at the current width. A record that fits on one line is not wrapped."""
+        text = record.format(self.channel_names)
+        width = self._wrap_width or self.size.width or 80
+        if "\n" not in text and cell_len(text) <= width:
+            return 1
+        return len(Text(text, end="").wrap(self.app.console, width)) or 1
+
+    def _wrap(self, record: MessageRecord) -> list[Strip]:
+        """Formats and wraps a record to the current width, rendering it into strips."""
+        strips = self._strips.get(record)
+        if strips is not None:
+            self._strips.move_to_end(record)
+            return strips
+        style = self.get_component_rich_style(
+            "message-display--sent" if record.is_sent else "message-display--received"
+        )
+        width = self._wrap_width or self.size.width or 80
+        console = self.app.console
+        text = Text(record.format(self.channel_names), style=style, end="")
+        strips = [
+            Strip(line.render(console), line.cell_len)
+            for line in text.wrap(console, width)
+        ] or [Strip.blank(0)]
+        self._strips[record] = strips
+        if len(self._strips) > MESSAGE_RENDER_CACHE_SIZE:
+            self._strips.popitem(last=False)
+        return strips
+
+    def _rewrap(self) -> None:
+        """Recounts the lines of the whole log, e.g. after the width changed."""
+        self._strips.clear()
+        self._line_counts = deque(self._count_lines(record) for record in self._records)
+        self._line_total = sum(self._line_counts)
+        self._update_virtual_size()
+
+    def _update_virtual_size(self) -> None:
+        self._line_starts = None
+        self.virtual_size = Size(self._wrap_width, self._line_total)
+
+    def on_resize(self, event: Resize) -> None:
+        width = self.size.width
+        if width and width != self._wrap_width:
+            at_end = self.is_vertical_scroll_end
+            self._wrap_width = width
+            self._rewrap()
+            if at_end:
+                self.scroll_end(animate=False, immediate=True, x_axis=False)
+
+    def notify_style_update(self) -> None:
+        super().notify_style_update()
+        # The style does not change how records wrap, only how they are rendered
+        self._strips.clear()
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        y += scroll_y
+        width = self.size.width
+        rich_style = self.rich_style
+        if y >= self._line_total:
+            return Strip.blank(width, rich_style)
+        if self._line_starts is None:
+            self._line_starts = list(accumulate(self._line_counts, initial=0))
+        index = bisect_right(self._line_starts, y) - 1
+        strips = self._wrap(self._records[index])
+        line = strips[min(y - self._line_starts[index], len(strips) - 1)]
+        return line.crop_extend(scroll_x, scroll_x + width, rich_style).apply_style(rich_style)
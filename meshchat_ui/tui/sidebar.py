@@ -1,13 +1,102 @@
-from textual.widgets import Static, ListView, ListItem
+from textual.widgets import Static, ListView, ListItem, Input
 from textual.containers import Vertical
 
+from meshchat_ui.tui.contact_list import ContactList
+
+CONTACT_ICONS = {
+    1: "",  # Client
+    2: "",  # Repeater
+    3: "",  # Room Server
+}
+
+
+def contact_display_name(contact: dict) -> str:
+    contact_name = contact.get("name", "Unknown")
+    icon = CONTACT_ICONS.get(contact.get("type"))
+    return f"{icon} {contact_name}" if icon else contact_name
+
+
 class Sidebar(Static):
     """A sidebar with Channels and Contacts lists."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Per list: row key -> (list item, label), in display order
+        self._rows: dict[str, dict[str, tuple[ListItem, str]]] = {"channels": {}}
+
     def compose(self):
         """Create the content of the sidebar."""
         with Vertical():
             yield Static("Channels", classes="header")
             yield ListView(id="channels")
             yield Static("Contacts", classes="header")
-            yield ListView(id="contacts")
+            yield Input(placeholder="Filter contacts", id="contact-filter")
+            yield ContactList(id="contacts")
+
+    def update_channels(self, channels: list[dict]) -> None:
+        self.apply_rows("channels", {str(channel["id"]): channel["name"] for channel in channels})
+
+    def update_contacts(self, contacts: list[dict]) -> None:
+        self.query_one(ContactList).set_contacts(
+            contacts, {contact["public_key"]: contact_display_name(contact) for contact in contacts}
+        )
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        if event.input.id == "contact-filter":
+            event.stop()
+            self.query_one(ContactList).filter(event.value)
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        if event.input.id == "contact-filter":
+            event.stop()
+            self.query_one(ContactList).action_select()
+
+    def apply_rows(self, list_id: str, new_rows: dict[str, str]) -> tuple[int, int, int]:
+        """
+        Applies a keyed diff to a list, leaving it in the order of `new_rows`:
+        rows whose key disappeared are removed, kept rows are relabelled and
+        moved in place, and new keys are inserted where they belong, with new
+        rows at the end added in one batch.
+        Returns the number of (inserted, removed, updated) rows, where a row
+        counts as updated when its label or position changed.
+        """
+        list_view = self.query_one(f"#{list_id}", ListView)
+        rows = self._rows[list_id]
+
+        removed_keys = [key for key in rows if key not in new_rows]
+        if removed_keys:
+            list_view.remove_children([rows.pop(key)[0] for key in removed_keys])
+            if list_view.index is not None:
+                list_view.index = min(list_view.index, len(rows) - 1) if rows else None
+
+        order = list(rows)
+        updated = 0
+        inserted = 0
+        tail_items = []
+        for position, (key, label) in enumerate(new_rows.items()):
+            row = rows.get(key)
+            if row is None:
+                item = ListItem(Static(label))
+                rows[key] = (item, label)
+                inserted += 1
+                if position >= len(order):
+                    tail_items.append(item)
+                else:
+                    list_view.insert(position, [item])
+                order.insert(position, key)
+                continue
+            changed = False
+            if row[1] != label:
+                row[0].query_one(Static).update(label)
+                rows[key] = (row[0], label)
+                changed = True
+            if order[position] != key:
+                order.remove(key)
+                order.insert(position, key)
+                list_view.move_child(row[0], before=position)
+                changed = True
+            updated += changed
+        if tail_items:
+            list_view.extend(tail_items)
+        self._rows[list_id] = {key: rows[key] for key in order}
+        return inserted, len(removed_keys), updated
@@ -3,17 +3,19 @@ import argparse
 import os
 from meshchat_ui.tui.app import MeshChatApp
 from meshchat_ui.logger import get_logger
+from meshchat_ui.config import AUTO_CONNECT
 
 os.environ["TEXTUAL_LOG"] = ""
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the MeshChat TUI application.")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode.")
+    parser.add_argument("--auto-connect", action="store_true", default=AUTO_CONNECT, help="Connect to the last serial radio at startup.")
     args = parser.parse_args()
 
     logger = get_logger(__name__)
     try:
-        app = MeshChatApp(debug_mode=args.debug)
+        app = MeshChatApp(debug_mode=args.debug, auto_connect=args.auto_connect)
         app.run()
     except Exception as e:
         logger.critical("Application failed to run", exc_info=True)
@@ -0,0 +1,56 @@
+from benchmarks.gate import gate, normalize
+
+
+def _report(calibration_ms=10.0, **results):
+    return {"meta": {"calibration_ms": calibration_ms}, "results": results}
+
+
+def _ms(*samples):
+    return {"unit": "ms", "better": "lower", "samples": list(samples)}
+
+
+def _rate(*samples):
+    return {"unit": "msg/s", "better": "higher", "samples": list(samples)}
+
+
+def _status(baseline, current):
+    comparisons, missing = gate(baseline, current)
+    return {c["name"]: "regressed" if c["regressed"] else "improved" if c["improved"] else "ok" for c in comparisons}, missing
+
+
+def test_gate_flags_regressions_beyond_noise_and_tolerance():
+    steady = _ms(10.0, 10.1, 9.9, 10.0, 10.2, 9.8, 10.0)
+    noisy = _ms(8.0, 12.0, 9.0, 11.0, 10.0, 13.0, 7.0)
+    baseline = _report(steady=steady, noisy=noisy)
+
+    status, missing = _status(baseline, _report(steady=_ms(10.5, 10.6, 10.4), noisy=_ms(12.0, 11.8, 12.2)))
+    assert status == {"steady": "ok", "noisy": "ok"}  # Within the 10% tolerance and the baseline's noise
+    assert missing == []
+
+    status, _ = _status(baseline, _report(steady=_ms(15.0, 15.1, 14.9), noisy=_ms(14.0, 14.1, 13.9)))
+    assert status == {"steady": "regressed", "noisy": "regressed"}  # The noise allowance is capped at 30%
+
+    # A noisy current run does not widen the threshold for itself
+    status, _ = _status(baseline, _report(steady=_ms(5.0, 12.5, 20.0, 12.0, 30.0, 1.0, 12.5), noisy=noisy))
+    assert status["steady"] == "regressed"
+
+
+def test_gate_handles_higher_is_better_and_missing_benchmarks():
+    baseline = _report(rate=_rate(1000.0, 1010.0, 990.0), gone=_ms(1.0, 1.0, 1.0))
+    status, missing = _status(baseline, _report(rate=_rate(800.0, 805.0, 795.0)))
+    assert status == {"rate": "regressed"}
+    assert missing == ["gone"]
+    status, _ = _status(baseline, _report(rate=_rate(1200.0, 1210.0, 1190.0), gone=_ms(1.0, 1.0, 1.0)))
+    assert status == {"rate": "improved", "gone": "ok"}
+
+
+def test_normalize_rescales_to_the_baseline_machine_speed():
+    baseline = _report(calibration_ms=10.0, latency=_ms(10.0, 10.0, 10.0), rate=_rate(1000.0, 1000.0, 1000.0))
+    # The same code on a machine running half as fast
+    current = _report(calibration_ms=20.0, latency=_ms(20.0, 20.0, 20.0), rate=_rate(500.0, 500.0, 500.0))
+    normalized = normalize(current, baseline["meta"]["calibration_ms"])
+    assert normalized["results"]["latency"]["samples"] == [10.0, 10.0, 10.0]
+    assert normalized["results"]["rate"]["samples"] == [1000.0, 1000.0, 1000.0]
+    assert _status(baseline, normalized)[0] == {"latency": "ok", "rate": "ok"}
+    assert _status(baseline, current)[0] == {"latency": "regressed", "rate": "regressed"}
+    assert normalize(current, None) is current
@@ -0,0 +1,788 @@
+import asyncio
+import json
+import logging
+import logging.handlers
+import time
+
+from meshcore import EventType
+from meshcore.events import Event, EventDispatcher
+
+from meshchat_ui.config import BLE_MAX_CHANNEL_ATTEMPTS, SUPERVISOR_MAX_FAILURES, load_contact_table
+from meshchat_ui.logger import ROOT_LOGGER_NAME, get_logger
+from meshchat_ui.radio.bootstrap import BootstrapCoordinator
+from meshchat_ui.radio.connector import RadioConnector
+from meshchat_ui.radio.contacts import ContactIndex
+from meshchat_ui.radio.event_queue import EventQueue, OVERFLOW_SPILL
+from meshchat_ui.radio.fake import FakeMeshCore, FakeRadio
+from meshchat_ui.radio.handler import RadioHandler
+from meshchat_ui.radio.json_log import JsonLogWriter, find_segments, load_index, read_segment
+from meshchat_ui.radio.replay import drain, load_recording, replay
+from meshchat_ui.radio.scheduler import CommandCancelled, CommandScheduler, PRIORITY_ACK, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from meshchat_ui.radio.serial_emulator import SerialRadioEmulator
+from meshchat_ui.store import MessageStore
+
+CONTACTS = [
+    {"name": "alice", "type": 1, "public_key": "aa11" + "0" * 60},
+    {"name": "bob", "type": 1, "public_key": "bb22" + "0" * 60},
+    {"name": "bobby", "type": 2, "public_key": "bb23" + "0" * 60},
+]
+
+
+class FakeApp:
+    def __init__(self, contacts=CONTACTS):
+        self.contacts = contacts
+        self.contact_index = ContactIndex(contacts)
+        self.channels = {"#test": 1}
+        self.message_store = MessageStore(":memory:")
+        self.records = []
+        self.notifications = []
+        self.channel_updates = 0
+
+    def add_message_record(self, record):
+        self.records.append(record)
+
+    def update_contacts(self, contacts):
+        self.contacts = contacts
+        self.contact_index.update(contacts)
+
+    def update_channels(self, channels):
+        self.channels = {channel["name"]: channel["id"] for channel in channels}
+        self.channel_updates += 1
+
+    def notify(self, message, **kwargs):
+        self.notifications.append(message)
+
+
+def test_contact_index_lookups():
+    index = ContactIndex(CONTACTS)
+    assert index.get(CONTACTS[0]["public_key"])["name"] == "alice"
+    assert index.get_by_name("bob") is CONTACTS[1]
+    assert [c["name"] for c in index.match_prefix("aa")] == ["alice"]
+    assert [c["name"] for c in index.match_prefix("bb")] == ["bob", "bobby"]
+    assert index.match_prefix("cc") == []
+
+
+def test_contact_index_add_and_remove():
+    index = ContactIndex(CONTACTS)
+    index.add({"name": "carol", "type": 1, "public_key": "cc33" + "0" * 60})
+    assert [c["name"] for c in index.match_prefix("cc")] == ["carol"]
+    index.remove(CONTACTS[1]["public_key"])
+    assert [c["name"] for c in index.match_prefix("bb")] == ["bobby"]
+    assert index.get_by_name("bob") is None
+    assert len(index) == 3
+
+
+def test_contact_index_keeps_other_contacts_with_a_removed_name():
+    first = {"name": "bob", "type": 1, "public_key": "dd" * 32}
+    second = {"name": "bob", "type": 1, "public_key": "ee" * 32}
+    index = ContactIndex([first, second])
+    assert index.get_by_name("bob") is first
+    index.remove(first["public_key"])
+    assert index.get_by_name("bob") is second
+
+    # A renamed contact moves to its new name, leaving the old one to the others
+    index.add(first)
+    renamed = dict(second, name="robert")
+    index.add(renamed)
+    assert index.get_by_name("bob") is first
+    assert index.get_by_name("robert") is renamed
+    index.add(dict(first, type=2))
+    assert index.get_by_name("bob")["type"] == 2
+    index.remove(first["public_key"])
+    assert index.get_by_name("bob") is None
+
+
+def test_message_callback_resolves_sender_by_prefix():
+    async def run():
+        handler.event_queue.start()
+        handler.message_callback(Event(EventType.CONTACT_MSG_RECV, {"pubkey_prefix": "aa11", "text": "hi", "sender_timestamp": 1}))
+        handler.message_callback(Event(EventType.CHANNEL_MSG_RECV, {"pubkey_prefix": "bb", "channel_idx": 1, "text": "hello"}))
+        await handler.event_queue.join()
+        await handler.event_queue.stop()
+
+    app = FakeApp()
+    handler = RadioHandler(None, app)
+    asyncio.run(run())
+    dm, ambiguous = app.records
+    assert dm.sender == "alice" and dm.known_sender
+    assert ambiguous.sender == "bb" and not ambiguous.known_sender
+
+
+def _message_event(i):
+    return Event(EventType.CHANNEL_MSG_RECV, {"channel_idx": 0, "text": f"message {i}"})
+
+
+def test_event_queue_drops_oldest_when_full():
+    async def run():
+        for i in range(10):
+            queue.put(_message_event(i))
+        queue.start()
+        await queue.join()
+        await queue.stop()
+
+    consumed = []
+    queue = EventQueue(lambda event: consumed.append(event.payload["text"]), maxsize=4)
+    asyncio.run(run())
+    assert consumed == [f"message {i}" for i in range(6, 10)]
+    assert queue.dropped_count == 6
+    assert queue.high_water_mark == 4
+
+
+def test_event_queue_spills_to_disk_in_order(tmp_path):
+    async def run():
+        for i in range(10):
+            queue.put(_message_event(i))
+        assert queue.depth == 10
+        queue.start()
+        await queue.join()
+        await queue.stop()
+
+    consumed = []
+    spill_path = tmp_path / "spill.jsonl"
+    queue = EventQueue(lambda event: consumed.append(event.payload["text"]), maxsize=4, overflow_policy=OVERFLOW_SPILL, spill_path=str(spill_path))
+    asyncio.run(run())
+    assert consumed == [f"message {i}" for i in range(10)]
+    assert queue.spilled_count == 6
+    assert queue.high_water_mark == 10
+    assert not spill_path.exists()
+
+
+def test_event_queue_spill_round_trips_events_and_ignores_stale_file(tmp_path):
+    async def run():
+        for event in events:
+            queue.put(event)
+        queue.start()
+        await queue.join()
+        await queue.stop()
+
+    spill_path = tmp_path / "spill.jsonl"
+    spill_path.write_text(json.dumps({"type": EventType.CHANNEL_MSG_RECV.value, "payload": {"text": "stale"}}) + "\n")
+    contacts = {"ab" * 32: {"public_key": "ab" * 32, "adv_name": "alice", "type": 1, "lastmod": 7, "out_path": b"\x01\x02"}}
+    events = [_message_event(0), Event(EventType.CONTACTS, contacts, {"lastmod": 7}), _message_event(1)]
+    consumed = []
+    queue = EventQueue(consumed.append, maxsize=1, overflow_policy=OVERFLOW_SPILL, spill_path=str(spill_path))
+    asyncio.run(run())
+    assert queue.spilled_count == 2
+    assert [event.type for event in consumed] == [event.type for event in events]
+    assert [event.payload for event in consumed] == [event.payload for event in events]
+    assert consumed[1].attributes == {"lastmod": 7}
+    assert consumed[1].payload["ab" * 32]["out_path"] == b"\x01\x02"
+    assert not spill_path.exists()
+
+
+def test_json_log_writer_buffers_until_threshold_or_close(tmp_path):
+    log_path = str(tmp_path / "radio_messages.json")
+    json_log = JsonLogWriter(log_path, flush_bytes=1 << 20, flush_interval=60)
+    for i in range(100):
+        json_log.write({"text": f"message {i}", "raw": b"\x01"})
+    json_log.close()
+    records = [record for segment in find_segments(log_path) for record in read_segment(segment)]
+    assert len(records) == 100
+    assert records[-1] == {"text": "message 99", "raw": "b'\\x01'"}
+    assert json_log.flush_count == 1
+
+    json_log = JsonLogWriter(log_path, flush_bytes=1, flush_interval=60)
+    json_log.write({"text": "flushed"})
+    time.sleep(0.2)
+    segments = find_segments(log_path)
+    assert list(read_segment(segments[-1]))[-1] == {"text": "flushed"}
+    json_log.close()
+
+
+def test_json_log_writer_survives_unserializable_payloads(tmp_path):
+    log_path = str(tmp_path / "radio_messages.json")
+    json_log = JsonLogWriter(log_path, flush_bytes=1, flush_interval=60)
+    circular = {"text": "circular"}
+    circular["self"] = circular
+    json_log.write({"text": "before"})
+    json_log.write({b"\x01": "bytes key"})
+    json_log.write({("a", 1): "tuple key"})
+    json_log.write(circular)
+    json_log.write({"text": "after"})
+    json_log.close()
+    records = [record for segment in find_segments(log_path) for record in read_segment(segment)]
+    assert records == [{"text": "before"}, {"text": "after"}]
+    assert json_log.dropped_count == 3
+    assert json_log.written_count == 2
+
+
+def test_json_log_writer_rotates_and_compresses_segments(tmp_path):
+    log_path = str(tmp_path / "radio_messages.json")
+    json_log = JsonLogWriter(log_path, flush_bytes=1, segment_bytes=200)
+    for i in range(20):
+        json_log.write({"text": f"message {i:02}"})
+    json_log.close()
+
+    index = load_index(log_path)
+    assert len(index) > 1
+    assert all(segment["file"].endswith(".json.gz") for segment in index[:-1])
+    assert all(segment["bytes"] <= 200 for segment in index)
+    assert [record["text"] for segment in find_segments(log_path) for record in read_segment(segment)] == [
+        f"message {i:02}" for i in range(20)
+    ]
+    assert find_segments(log_path, start=index[-1]["end"] + 1) == []
+
+    # A new writer resumes the open segment instead of starting another
+    json_log = JsonLogWriter(log_path, flush_bytes=1, segment_bytes=1 << 20)
+    json_log.write({"text": "resumed"})
+    json_log.close()
+    assert len(load_index(log_path)) == len(index)
+
+
+def test_recorded_events_replay_through_handler(tmp_path):
+    log_path = str(tmp_path / "radio_messages.json")
+    recorder = RadioHandler(None, FakeApp(), debug_mode=True)
+    recorder.json_log = JsonLogWriter(log_path)
+    for i in range(5):
+        recorder.message_callback(_message_event(i))
+    recorder.json_log.close()
+
+    async def run():
+        meshcore = FakeMeshCore()
+        await meshcore.connect()
+        handler = RadioHandler(meshcore, app)
+        await handler.start_listening()
+        stats = await replay(meshcore, events, speed=None)
+        await drain(meshcore, handler)
+        await handler.stop_listening()
+        await meshcore.disconnect()
+        return stats
+
+    events = load_recording(log_path)
+    assert all(received_at is not None for received_at, _ in events)
+    app = FakeApp()
+    stats = asyncio.run(run())
+    assert stats["events"] == 5
+    assert [record.text for record in app.records] == [f"message {i}" for i in range(5)]
+
+
+def test_loggers_share_one_queue_handler():
+    class Formatted:
+        count = 0
+
+        def __str__(self):
+            Formatted.count += 1
+            return "formatted"
+
+    handler_logger = get_logger("meshchat_ui.radio.handler")
+    app_logger = get_logger("meshchat_ui.tui.app", debug_mode=True)
+    root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+    assert not handler_logger.handlers and not app_logger.handlers
+    assert sum(isinstance(handler, logging.handlers.QueueHandler) for handler in root_logger.handlers) == 1
+
+    handler_logger.debug("%s", Formatted())
+    assert Formatted.count == 0
+    app_logger.debug("%s", Formatted())
+    assert Formatted.count > 0
+
+
+class ChannelTableMeshCore:
+    """Answers get_channel with replies that arrive out of order, like a pipelined radio link."""
+
+    def __init__(self, channel_names):
+        self.channel_names = channel_names
+        self.dispatcher = EventDispatcher()
+        self.commands = self
+        self.get_channel_calls = 0
+        self.set_channel_calls = 0
+
+    async def wait_for_event(self, event_type, attribute_filters=None, timeout=None):
+        return await self.dispatcher.wait_for_event(event_type, attribute_filters, timeout)
+
+    async def get_channel(self, idx):
+        self.get_channel_calls += 1
+        reply = self.wait_for_event(EventType.CHANNEL_INFO, timeout=1)
+        payload = {"channel_idx": idx, "channel_name": self.channel_names[idx]}
+        asyncio.get_running_loop().call_later(0.01 * (len(self.channel_names) - idx), lambda: asyncio.ensure_future(
+            self.dispatcher.dispatch(Event(EventType.CHANNEL_INFO, payload, payload))
+        ))
+        return await reply
+
+    async def set_channel(self, idx, name, key):
+        self.set_channel_calls += 1
+        self.channel_names[idx] = name
+        return Event(EventType.OK, {})
+
+
+def test_channel_slots_are_fetched_once_and_reused_for_join():
+    async def run():
+        await meshcore.dispatcher.start()
+        connector.get_meshcore = lambda: _completed(meshcore)
+        data = await connector.get_contacts_and_channels()
+        assert data["channels"] == [{"name": "Public", "id": 0}, {"name": "#test", "id": 2}]
+        assert meshcore.get_channel_calls == BLE_MAX_CHANNEL_ATTEMPTS
+
+        assert await connector.join_public_channel("#test") == (True, None, None)
+        assert await connector.join_public_channel("#new") == (True, None, None)
+        assert connector.channel_slots[1] == "#new"
+        assert meshcore.get_channel_calls == BLE_MAX_CHANNEL_ATTEMPTS
+        assert meshcore.set_channel_calls == 1
+        await meshcore.dispatcher.stop()
+
+    async def _completed(value):
+        return value
+
+    meshcore = ChannelTableMeshCore(["Public", "", "#test"] + [""] * (BLE_MAX_CHANNEL_ATTEMPTS - 3))
+    connector = RadioConnector(FakeApp())
+    asyncio.run(run())
+
+
+class ContactTableMeshCore:
+    """Serves a contact table with per-contact last-modified markers."""
+
+    def __init__(self, entries):
+        self.self_info = {"public_key": "ff" * 32}
+        self.commands = self
+        self.entries = entries
+        self.lastmod_requests = []
+
+    async def get_contacts(self, lastmod=0):
+        self.lastmod_requests.append(lastmod)
+        changed = {key: entry for key, entry in self.entries.items() if entry["lastmod"] > lastmod}
+        newest = max(entry["lastmod"] for entry in self.entries.values())
+        return Event(EventType.CONTACTS, changed, {"lastmod": newest})
+
+
+def test_contacts_are_synced_incrementally(tmp_path, monkeypatch):
+    async def connect_and_fetch():
+        connector = RadioConnector(FakeApp())
+        connector.channel_slots = {}
+        connector.get_meshcore = lambda: _completed(meshcore)
+        connector._load_contact_table(meshcore)
+        return await connector.get_contacts_and_channels()
+
+    async def _completed(value):
+        return value
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    meshcore = ContactTableMeshCore({
+        c["public_key"]: {"adv_name": c["name"], "type": c["type"], "lastmod": i + 1} for i, c in enumerate(CONTACTS)
+    })
+    first = asyncio.run(connect_and_fetch())
+    assert sorted(c["name"] for c in first["contacts"]) == ["alice", "bob", "bobby"]
+
+    meshcore.entries[CONTACTS[0]["public_key"]] = {"adv_name": "alice2", "type": 1, "lastmod": 10}
+    second = asyncio.run(connect_and_fetch())
+    assert sorted(c["name"] for c in second["contacts"]) == ["alice2", "bob", "bobby"]
+    assert meshcore.lastmod_requests == [0, 3]
+
+
+def test_full_contact_sync_drops_deleted_contacts(tmp_path, monkeypatch):
+    async def connect_and_fetch(full_sync):
+        connector = RadioConnector(FakeApp())
+        connector.get_meshcore = lambda: _completed(meshcore)
+        connector._load_contact_table(meshcore)
+        contacts = await connector.get_contacts(full_sync)
+        await connector.flush_contact_table()
+        return sorted(c["name"] for c in contacts)
+
+    async def _completed(value):
+        return value
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    meshcore = ContactTableMeshCore({
+        c["public_key"]: {"adv_name": c["name"], "type": c["type"], "lastmod": i + 1} for i, c in enumerate(CONTACTS)
+    })
+    assert asyncio.run(connect_and_fetch(False)) == ["alice", "bob", "bobby"]
+
+    del meshcore.entries[CONTACTS[1]["public_key"]]
+    # An incremental sync cannot see the deletion
+    assert asyncio.run(connect_and_fetch(False)) == ["alice", "bob", "bobby"]
+    assert asyncio.run(connect_and_fetch(True)) == ["alice", "bobby"]
+    assert sorted(c["name"] for c in load_contact_table("ff" * 32)["contacts"].values()) == ["alice", "bobby"]
+    assert meshcore.lastmod_requests == [0, 3, 0]
+
+
+def test_connector_against_fake_radio(tmp_path, monkeypatch):
+    async def run():
+        connector.radio = FakeRadio(meshcore, connect_failures=1)
+        assert await connector.connect_radio() == (False, "Simulated connection failure")
+        assert await connector.connect_radio() == (True, None)
+
+        data = await connector.get_contacts_and_channels()
+        assert data["channels"] == [{"name": "Public", "id": 0}, {"name": "#test", "id": 2}]
+        assert sorted(c["name"] for c in data["contacts"]) == ["alice", "bob", "bobby"]
+
+        assert await connector.join_public_channel("#new") == (True, None, None)
+        assert meshcore.channel_slots[1] == "#new"
+        for idx in range(3, BLE_MAX_CHANNEL_ATTEMPTS):
+            meshcore.channel_slots[idx] = f"#full{idx}"
+        await connector.get_channel_slots(meshcore, refresh=True)
+        success, result, used_channels = await connector.join_public_channel("#overflow")
+        assert (success, result) == (False, "OVERWRITE_REQUIRED")
+        assert len(used_channels) == BLE_MAX_CHANNEL_ATTEMPTS
+        assert await connector.overwrite_public_channel("#overflow", 2) == (True, None)
+        assert meshcore.channel_slots[2] == "#overflow"
+
+        meshcore.failure_rate = 1.0
+        assert await connector.overwrite_public_channel("#fails", 2) == (False, "Failed to set channel #fails: Simulated set_channel failure")
+        meshcore.failure_rate = 0.0
+
+        await connector.subscribe()
+        await meshcore.receive_channel_message(0, "alice: hello")
+        await meshcore.receive_direct_message(CONTACTS[1]["public_key"][:12], "hi bob")
+        await drain(meshcore, connector.radio_handler)
+        await connector.disconnect()
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    meshcore = FakeMeshCore(
+        channels={0: "Public", 2: "#test"},
+        contacts={c["public_key"]: {"adv_name": c["name"], "type": c["type"], "lastmod": 1} for c in CONTACTS},
+        latency=0.005,
+        jitter=0.01,
+        seed=1,
+    )
+    app = FakeApp()
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    asyncio.run(run())
+    assert [(record.sender, record.text) for record in app.records] == [("alice", "hello"), ("bob", "hi bob")]
+    assert meshcore.command_counts["get_channel"] == 2 * BLE_MAX_CHANNEL_ATTEMPTS
+
+
+def test_bootstrap_subscribes_before_fetching(tmp_path, monkeypatch):
+    async def run():
+        connector.radio = FakeRadio(meshcore)
+        await connector.connect_radio()
+        bootstrap = BootstrapCoordinator(connector, app)
+        task = asyncio.create_task(bootstrap.run())
+        await asyncio.sleep(0.01)
+        await meshcore.receive_channel_message(0, "alice: during bootstrap")
+        await task
+        # Delivered while the channel scan was still running
+        assert [record.text for record in app.records] == ["during bootstrap"]
+        assert bootstrap.errors == {}
+        assert set(bootstrap.timings) == {"subscribe", "info", "contacts", "channels", "total"}
+        assert bootstrap.time_to_first_message < bootstrap.timings["channels"]
+        await drain(meshcore, connector.radio_handler)
+        assert app.channels == {"Public": 0, "#test": 2}
+        assert sorted(c["name"] for c in app.contacts) == ["alice", "bob", "bobby"]
+
+        monkeypatch.setattr("meshchat_ui.radio.bootstrap.BOOTSTRAP_CHANNELS_TIMEOUT", 0.01)
+        connector.channel_slots = None
+        bootstrap = await BootstrapCoordinator(connector, app).run()
+        assert bootstrap.errors == {"channels": "timed out after 0.01 s"}
+        await connector.disconnect()
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    meshcore = FakeMeshCore(
+        channels={0: "Public", 2: "#test"},
+        contacts={c["public_key"]: {"adv_name": c["name"], "type": c["type"], "lastmod": 1} for c in CONTACTS},
+        latency=0.02,
+    )
+    app = FakeApp(contacts=[])
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    asyncio.run(run())
+
+
+def test_supervisor_reconnects_and_resyncs(tmp_path, monkeypatch):
+    async def wait_for(condition):
+        for _ in range(300):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("condition not reached")
+
+    async def run():
+        radio = FakeRadio(meshcore)
+        connector.radio = radio
+        await connector.connect_radio()
+        await BootstrapCoordinator(connector, app).run()
+        await connector.start_supervisor()
+        supervisor = connector.supervisor
+        await drain(meshcore, connector.radio_handler)
+        assert app.channel_updates == 1
+
+        # A disconnect reported by meshcore, with two failed reconnect attempts
+        radio.connect_failures = 2
+        meshcore.update_contact(CONTACTS[0]["public_key"], "alice-renamed")
+        contacts_fetches = meshcore.command_counts["get_contacts"]
+        await meshcore.drop_link()
+        await wait_for(lambda: supervisor.reconnect_count == 1)
+        assert meshcore.command_counts["get_contacts"] == contacts_fetches + 1
+        await drain(meshcore, connector.radio_handler)
+        assert sorted(c["name"] for c in app.contacts) == ["alice-renamed", "bob", "bobby"]
+        assert app.channel_updates == 1  # Channels did not change
+        await meshcore.receive_channel_message(0, "bob: back again")
+        await drain(meshcore, connector.radio_handler)
+        assert app.records[-1].text == "back again"
+
+        # A link that stops answering without a disconnect is found by heartbeats
+        meshcore.drop_rate = 1.0
+        await wait_for(lambda: supervisor.reconnect_count == 2)
+        assert any("heartbeat" in message for message in app.notifications)
+        await connector.disconnect()
+        assert connector.supervisor is None
+
+    class SupervisedApp(FakeApp):
+        def notify(self, message, **kwargs):
+            super().notify(message)
+            if "link lost" in message:
+                meshcore.drop_rate = 0.0
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr("meshchat_ui.radio.supervisor.RECONNECT_BASE_DELAY", 0.01)
+    monkeypatch.setattr("meshchat_ui.radio.supervisor.SUPERVISOR_HEARTBEAT_INTERVAL", 0.05)
+    monkeypatch.setattr("meshchat_ui.radio.supervisor.SUPERVISOR_HEARTBEAT_RETRY_INTERVAL", 0.01)
+    meshcore = FakeMeshCore(
+        channels={0: "Public", 2: "#test"},
+        contacts={c["public_key"]: {"adv_name": c["name"], "type": c["type"], "lastmod": 1} for c in CONTACTS},
+        command_timeout=0.05,
+    )
+    app = SupervisedApp(contacts=[])
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    asyncio.run(run())
+
+
+def test_supervisor_reconnects_when_sends_go_unanswered(tmp_path, monkeypatch):
+    async def run():
+        radio = FakeRadio(meshcore)
+        connector.radio = radio
+        await connector.connect_radio()
+        await connector.start_supervisor()
+        supervisor = connector.supervisor
+
+        # Heartbeats are too far apart to notice, so only the sends can find the dead link
+        meshcore.drop_rate = 1.0
+        for attempt in range(SUPERVISOR_MAX_FAILURES):
+            assert supervisor.consecutive_failures == attempt
+            await connector.send_channel_message(f"hello {attempt}", 0)
+        for _ in range(300):
+            if supervisor.reconnect_count:
+                break
+            await asyncio.sleep(0.01)
+        assert supervisor.reconnect_count == 1
+        assert any("send_chan_msg got no reply" in message for message in app.notifications)
+        await connector.disconnect()
+
+    class SupervisedApp(FakeApp):
+        def notify(self, message, **kwargs):
+            super().notify(message)
+            if "link lost" in message:
+                meshcore.drop_rate = 0.0
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr("meshchat_ui.radio.supervisor.RECONNECT_BASE_DELAY", 0.01)
+    meshcore = FakeMeshCore(channels={0: "Public"}, command_timeout=0.02)
+    app = SupervisedApp(contacts=[])
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    asyncio.run(run())
+
+
+def test_link_health_probe_warns_on_slow_link(tmp_path, monkeypatch):
+    async def wait_for(condition):
+        for _ in range(300):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("condition not reached")
+
+    async def run():
+        connector.radio = FakeRadio(meshcore)
+        await connector.connect_radio()
+        await connector.start_supervisor()
+        supervisor = connector.supervisor
+        await wait_for(lambda: len(supervisor.link_health.samples) >= 6)
+        assert supervisor.heartbeat_interval == 0.08  # Doubled up to the cap while healthy
+        assert not app.notifications
+
+        # Sends keep the link busy, so no heartbeat competes with them
+        queries = meshcore.command_counts["send_device_query"]
+        for _ in range(20):
+            assert await connector.send_channel_message("hi", 0) == (True, None)
+            await asyncio.sleep(0.01)
+        assert meshcore.command_counts["send_device_query"] == queries
+
+        meshcore.latency = 0.1
+        await wait_for(lambda: supervisor.link_health.degraded)
+        assert "Radio link is slow" in app.notifications[-1]
+        assert supervisor.heartbeat_interval < 0.08
+        meshcore.latency = 0.002
+        await wait_for(lambda: not supervisor.link_health.degraded)
+        assert "back to normal" in app.notifications[-1]
+        assert supervisor.reconnect_count == 0
+        assert "median" in supervisor.link_health.summary()
+        await connector.disconnect()
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr("meshchat_ui.radio.supervisor.SUPERVISOR_HEARTBEAT_INTERVAL", 0.02)
+    monkeypatch.setattr("meshchat_ui.radio.supervisor.SUPERVISOR_HEARTBEAT_MAX_INTERVAL", 0.08)
+    monkeypatch.setattr("meshchat_ui.radio.supervisor.SUPERVISOR_HEARTBEAT_RETRY_INTERVAL", 0.01)
+    monkeypatch.setattr("meshchat_ui.radio.link_health.LINK_LATENCY_WARNING", 0.03)
+    meshcore = FakeMeshCore(channels={0: "Public"}, latency=0.002)
+    app = FakeApp(contacts=[])
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    asyncio.run(run())
+
+
+def test_command_scheduler_priorities_timeouts_and_cancellation():
+    async def run():
+        order = []
+        running = []
+        peak = 0
+        gate = asyncio.Event()
+
+        def command(name, wait=None, duration=0.0):
+            async def call():
+                nonlocal peak
+                running.append(name)
+                peak = max(peak, len(running))
+                if wait is not None:
+                    await wait.wait()
+                await asyncio.sleep(duration)
+                running.remove(name)
+                order.append(name)
+                return name
+            return call
+
+        scheduler = CommandScheduler(max_in_flight=2, on_complete=lambda *args: completed.append(args[:2]))
+        # A background sync holds the radio while other commands queue behind it
+        first = asyncio.create_task(scheduler.run("sync", command("sync", gate), PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(scheduler.run(name, command(name, duration=0.01), priority, shared=shared))
+            for name, priority, shared in [
+                ("slot-0", PRIORITY_BACKGROUND, True),
+                ("slot-1", PRIORITY_BACKGROUND, True),
+                ("slot-2", PRIORITY_BACKGROUND, True),
+                ("set_channel", PRIORITY_ACK, False),
+                ("send", PRIORITY_INTERACTIVE, False),
+            ]
+        ]
+        cancelled = asyncio.create_task(scheduler.run("cancelled", command("cancelled"), PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        assert scheduler.in_flight == 1 and scheduler.queued == 6
+        cancelled.cancel()
+        gate.set()
+        assert await asyncio.gather(first, *queued) == ["sync", "slot-0", "slot-1", "slot-2", "set_channel", "send"]
+        assert order == ["sync", "send", "set_channel", "slot-0", "slot-1", "slot-2"]
+        assert peak == 2  # Shared commands run together up to max_in_flight, the rest alone
+        assert scheduler.stats[PRIORITY_INTERACTIVE].cancelled == 1
+        assert "cancelled" not in order
+        assert max(scheduler.stats[PRIORITY_BACKGROUND].queue_wait) > max(scheduler.stats[PRIORITY_INTERACTIVE].queue_wait)
+
+        # A timed-out command frees its slot and is reported
+        try:
+            await scheduler.run("slow", command("slow", duration=1.0), PRIORITY_ACK, timeout=0.01)
+            raise AssertionError("slow command did not time out")
+        except asyncio.TimeoutError:
+            pass
+        assert scheduler.stats[PRIORITY_ACK].timed_out == 1
+        assert completed[-1] == ("slow", PRIORITY_ACK)
+        assert await scheduler.run("after", command("after"), PRIORITY_INTERACTIVE) == "after"
+
+        # Queued commands are dropped when the radio goes away
+        gate.clear()
+        blocker = asyncio.create_task(scheduler.run("blocker", command("blocker", gate), PRIORITY_BACKGROUND))
+        pending = asyncio.create_task(scheduler.run("pending", command("pending"), PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        assert scheduler.cancel_pending() == 1
+        try:
+            await pending
+            raise AssertionError("pending command was not cancelled")
+        except CommandCancelled:
+            pass
+        gate.set()
+        await blocker
+        assert scheduler.in_flight == 0
+        assert "interactive: 2 commands" in scheduler.summary()
+
+    completed = []
+    asyncio.run(run())
+
+
+def test_failed_commands_are_not_round_trip_samples(tmp_path, monkeypatch):
+    async def run():
+        connector.radio = FakeRadio(meshcore)
+        await connector.connect_radio()
+        await connector.start_supervisor()
+        supervisor = connector.supervisor
+
+        await connector.send_channel_message("hello", 0)
+        assert len(supervisor.link_health.samples) == 1
+
+        meshcore.drop_rate = 1.0
+        await connector.send_channel_message("unanswered", 0)
+        await supervisor._heartbeat()
+        assert supervisor.consecutive_failures == 2
+        assert len(supervisor.link_health.samples) == 1
+        assert connector.scheduler.stats[PRIORITY_ACK].count == 1  # The heartbeat went through the scheduler
+        await connector.disconnect()
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr("meshchat_ui.radio.supervisor.SUPERVISOR_MAX_FAILURES", 10)
+    meshcore = FakeMeshCore(channels={0: "Public"}, command_timeout=0.02)
+    app = FakeApp(contacts=[])
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    asyncio.run(run())
+
+
+def test_rejected_commands_keep_the_link_up(tmp_path, monkeypatch):
+    async def run():
+        connector.radio = FakeRadio(meshcore)
+        await connector.connect_radio()
+        await connector.start_supervisor()
+        supervisor = connector.supervisor
+
+        # The radio answers every command with an ERR reply, e.g. DMs to contacts it does not know
+        meshcore.failure_rate = 1.0
+        for attempt in range(SUPERVISOR_MAX_FAILURES + 2):
+            await connector.send_message(f"hello {attempt}", "ab" * 6)
+        await supervisor._heartbeat()
+        await asyncio.sleep(0.05)
+        assert supervisor.consecutive_failures == 0
+        assert supervisor.reconnect_count == 0
+        assert not supervisor.link_health.samples  # Rejections are not round trips
+        assert not any("link lost" in message for message in app.notifications)
+        await connector.disconnect()
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    meshcore = FakeMeshCore(channels={0: "Public"}, command_timeout=0.02)
+    app = FakeApp(contacts=[])
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    asyncio.run(run())
+
+
+def test_serial_radio_against_pty_emulator(tmp_path, monkeypatch):
+    async def run():
+        emulator.start()
+        connector.set_serial_radio(emulator.port, 115200)
+        assert await connector.connect_radio() == (True, None)
+        assert connector.radio_key == emulator.public_key
+
+        data = await connector.get_contacts_and_channels()
+        assert data["channels"] == [{"name": "Public", "id": 0}, {"name": "#test", "id": 2}]
+        assert sorted(c["name"] for c in data["contacts"]) == ["alice", "bob", "bobby"]
+        assert await connector.join_public_channel("#new") == (True, None, None)
+        assert emulator.channel_slots[1] == "#new"
+        assert await connector.send_channel_message("hi all", 0) == (True, None)
+
+        await connector.subscribe()
+        emulator.queue_channel_message(0, "alice: pushed")
+        emulator.push_messages = False
+        emulator.queue_channel_message(0, "bob: fetched")
+        for _ in range(100):
+            if len(app.records) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await connector.disconnect()
+        await emulator.stop()
+
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr("meshchat_ui.config.CONFIG_PATH", str(tmp_path / "serial.json"))
+    emulator = SerialRadioEmulator(
+        channels={0: "Public", 2: "#test"},
+        contacts={c["public_key"]: {"adv_name": c["name"], "type": c["type"], "lastmod": 1} for c in CONTACTS},
+    )
+    app = FakeApp()
+    connector = RadioConnector(app)
+    app.radio_connector = connector
+    asyncio.run(run())
+    assert [(record.sender, record.text) for record in app.records] == [("alice", "pushed"), ("bob", "fetched")]
+    assert emulator.sent_messages == [{"channel_idx": 0, "text": "hi all"}]
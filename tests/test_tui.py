@@ -0,0 +1,234 @@
+import asyncio
+import json
+import subprocess
+import sys
+
+from meshchat_ui.config import MESSAGE_PAGE_SIZE, MESSAGE_UPDATE_INTERVAL, save_serial_connection, save_contact_table, save_channel_list
+from meshchat_ui.radio.serial_emulator import SerialRadioEmulator
+from meshchat_ui.records import MessageRecord, KIND_CHANNEL
+from meshchat_ui.store import MessageStore
+from meshchat_ui.tui.app import MeshChatApp
+from meshchat_ui.tui.message_display import MessageDisplay
+from meshchat_ui.tui.connection_screen import ConnectionScreen
+from meshchat_ui.tui.contact_list import ContactList, NameFilter
+from meshchat_ui.tui.sidebar import Sidebar
+from textual.widgets import Input, ListItem, ListView, Static
+
+
+async def _run_app(test, size=(100, 30), db_path=":memory:"):
+    app = MeshChatApp(message_db_path=db_path)
+    async with app.run_test(size=size) as pilot:
+        app.pop_screen()  # Skip the connection screen
+        await pilot.pause()
+        await test(app, pilot)
+
+
+def test_message_display_is_bounded():
+    async def test(app, pilot):
+        message_display = app.query_one(MessageDisplay)
+        message_display.max_messages = 50
+        for i in range(200):
+            app.add_message(f"message {i}")
+        app.flush_pending_messages()
+        await pilot.pause()
+        assert message_display.message_count == 50
+        assert message_display.line_count == 50
+        assert message_display.is_vertical_scroll_end
+        last_row = message_display.render_line(message_display.size.height - 1).text
+        assert last_row.strip() == "message 199"
+
+    asyncio.run(_run_app(test))
+
+
+def test_message_display_wraps_long_messages():
+    async def test(app, pilot):
+        message_display = app.query_one(MessageDisplay)
+        app.add_message("word " * 100)
+        app.flush_pending_messages()
+        await pilot.pause()
+        assert message_display.message_count == 1
+        assert message_display.line_count > 1
+
+    asyncio.run(_run_app(test))
+
+
+def test_message_display_renders_only_rows_in_view():
+    async def test(app, pilot):
+        message_display = app.query_one(MessageDisplay)
+        for i in range(1000):
+            app.add_message("word " * 100 if i == 1 else f"message {i}")
+        app.flush_pending_messages()
+        await pilot.pause()
+        assert message_display.message_count == 1000
+        assert message_display.line_count > 1000
+        assert 0 < len(message_display._strips) <= message_display.size.height
+
+        message_display.scroll_home(animate=False, immediate=True)
+        await pilot.pause()
+        assert message_display.render_line(0).text.strip() == "message 0"
+        assert message_display.render_line(1).text.startswith("word word")
+        long_rows = message_display.line_count - 999
+        assert message_display.render_line(long_rows).text.strip().startswith("word")
+        assert message_display.render_line(1 + long_rows).text.strip() == "message 2"
+
+    asyncio.run(_run_app(test))
+
+
+def test_message_display_pages_history_from_store(tmp_path):
+    db_path = str(tmp_path / "messages.db")
+    store = MessageStore(db_path)
+    for i in range(500):
+        store.add(MessageRecord(KIND_CHANNEL, text=f"message {i}", sender="alice", channel_idx=0, known_sender=True))
+    store.close()
+
+    async def test(app, pilot):
+        message_display = app.query_one(MessageDisplay)
+        assert message_display.message_count == MESSAGE_PAGE_SIZE
+        assert message_display._records[-1].text == "message 499"
+
+        message_display.scroll_home(animate=False, immediate=True)
+        await pilot.pause()
+        assert message_display.message_count == 2 * MESSAGE_PAGE_SIZE
+        assert message_display._records[0].text == f"message {500 - 2 * MESSAGE_PAGE_SIZE}"
+        assert message_display.scroll_y > 0
+
+    asyncio.run(_run_app(test, db_path=db_path))
+
+
+def test_message_record_format():
+    channel_names = {1: "#test"}
+    known = MessageRecord(KIND_CHANNEL, text="hi", sender="alice", channel_idx=1, sender_timestamp=1700000000, known_sender=True)
+    unknown = MessageRecord(KIND_CHANNEL, text="hi", sender="bob", channel_idx=2)
+    assert known.format(channel_names).endswith("[#test] alice: hi")
+    assert unknown.format(channel_names) == "No timestamp [Channel 2] Unknown Sender: bob: hi"
+
+
+def test_incoming_messages_are_coalesced():
+    async def test(app, pilot):
+        message_display = app.query_one(MessageDisplay)
+        for i in range(100):
+            app.add_message_record(MessageRecord(KIND_CHANNEL, text=f"message {i}", channel_idx=0))
+        assert message_display.message_count == 0
+        await pilot.pause(MESSAGE_UPDATE_INTERVAL * 5)
+        assert message_display.message_count == 100
+        assert app.message_flush_count == 1
+        assert app.messages_coalesced == 99
+
+    asyncio.run(_run_app(test))
+
+
+def test_name_filter_orders_prefix_substring_fuzzy():
+    name_filter = NameFilter()
+    name_filter.update({"a": "Bobcat", "b": "alice", "c": "Big Bob", "d": "b-o-b", "e": "carol"})
+    assert name_filter.filter("bob") == ["a", "c", "d"]
+    assert name_filter.filter("bobc") == ["a"]
+    assert name_filter.filter("") == ["b", "d", "c", "a", "e"]
+
+
+def test_contact_list_renders_only_visible_rows():
+    async def test(app, pilot):
+        contacts = [{"name": f"node-{i}", "type": 1, "public_key": f"{i:064x}"} for i in range(10_000)]
+        app.update_contacts(contacts)
+        await pilot.pause()
+        contact_list = app.query_one(ContactList)
+        assert contact_list.row_count == 10_000
+        assert contact_list.virtual_size.height == 10_000
+
+        filter_input = app.query_one("#contact-filter", Input)
+        filter_input.value = "node-9999"
+        await pilot.pause()
+        assert [contact["name"] for contact in contact_list.visible_contacts][0] == "node-9999"
+
+        contact_list.action_select()
+        await pilot.pause()
+        assert app.query_one("#main-content Input", Input).value == "node-9999 "
+
+    asyncio.run(_run_app(test))
+
+
+def test_sidebar_apply_rows_diffs_by_key():
+    async def test(app, pilot):
+        sidebar = app.query_one(Sidebar)
+        list_view = sidebar.query_one("#channels", ListView)
+
+        def labels():
+            return [str(item.query_one(Static).render()) for item in list_view.query(ListItem)]
+
+        assert sidebar.apply_rows("channels", {"0": "Public", "1": "#test", "2": "#old"}) == (3, 0, 0)
+        await pilot.pause()
+        items = {label: item for label, item in zip(labels(), list_view.query(ListItem))}
+        assert labels() == ["Public", "#test", "#old"]
+
+        # Remove one, relabel and move one to the front, insert one in the middle
+        assert sidebar.apply_rows("channels", {"1": "#renamed", "5": "#new", "0": "Public"}) == (1, 1, 1)
+        await pilot.pause()
+        assert labels() == ["#renamed", "#new", "Public"]
+        assert list_view.query(ListItem)[0] is items["#test"]  # Kept rows are updated in place
+        assert list_view.query(ListItem)[2] is items["Public"]
+
+        assert sidebar.apply_rows("channels", {"1": "#renamed", "5": "#new", "0": "Public"}) == (0, 0, 0)
+        assert sidebar.apply_rows("channels", {}) == (0, 3, 0)
+        await pilot.pause()
+        assert labels() == []
+
+    asyncio.run(_run_app(test))
+
+
+def test_app_import_defers_radio_libraries():
+    code = "import sys, meshchat_ui.tui.app; print(sorted({m.split('.')[0] for m in sys.modules} & {'bleak', 'meshcore', 'serial'}))"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == "[]"
+
+
+def test_auto_connect_warm_starts_from_cache(tmp_path, monkeypatch):
+    async def run():
+        emulator.start()
+        save_serial_connection("radio", emulator.port, "115200")
+        save_contact_table(emulator.public_key, 1, {"ab" * 32: {"name": "cached", "type": 1, "public_key": "ab" * 32}})
+        save_channel_list(emulator.public_key, [{"name": "#cached", "id": 3}])
+        with open(tmp_path / "serial.json") as f:
+            saved = json.load(f)
+        saved["radio_key"] = emulator.public_key
+        with open(tmp_path / "serial.json", "w") as f:
+            json.dump(saved, f)
+
+        app = MeshChatApp(message_db_path=":memory:", auto_connect=True)
+        async with app.run_test(size=(100, 30)) as pilot:
+            # Cached state is shown before the radio has answered
+            assert not isinstance(app.screen, ConnectionScreen)
+            assert [c["name"] for c in app.query_one(ContactList).visible_contacts] == ["cached"]
+            assert app.channels == {"#cached": 3}
+            for _ in range(300):
+                if app.channels == {"Public": 0}:
+                    break
+                await pilot.pause(0.01)
+            assert app.channels == {"Public": 0}
+            # The first sync after connecting fetches the whole table, dropping contacts no longer on the radio
+            for _ in range(300):
+                if [c["name"] for c in app.contacts] == ["alice"]:
+                    break
+                await pilot.pause(0.01)
+            assert [c["name"] for c in app.contacts] == ["alice"]
+            assert [c["name"] for c in app.query_one(ContactList).visible_contacts] == ["alice"]
+            await app.radio_connector.disconnect()
+        await emulator.stop()
+
+    monkeypatch.setattr("meshchat_ui.config.CONFIG_PATH", str(tmp_path / "serial.json"))
+    monkeypatch.setattr("meshchat_ui.config.CONTACTS_CACHE_DIR", str(tmp_path))
+    emulator = SerialRadioEmulator(channels={0: "Public"}, contacts={"aa" * 32: {"adv_name": "alice", "type": 1, "lastmod": 2}})
+    asyncio.run(run())
+
+
+def test_auto_connect_falls_back_to_connection_screen(tmp_path, monkeypatch):
+    async def run():
+        app = MeshChatApp(message_db_path=":memory:", auto_connect=True)
+        async with app.run_test(size=(100, 30)) as pilot:
+            for _ in range(100):
+                if isinstance(app.screen, ConnectionScreen):
+                    break
+                await pilot.pause(0.01)
+            assert isinstance(app.screen, ConnectionScreen)
+
+    monkeypatch.setattr("meshchat_ui.config.CONFIG_PATH", str(tmp_path / "serial.json"))
+    save_serial_connection("radio", str(tmp_path / "missing-port"), "115200")
+    asyncio.run(run())